@@ -0,0 +1,94 @@
+"""
+aggregate_backends.py
+
+Compares the Decimal and float64 statistics of the aggregate, on synthetic
+prices, recording how long each takes and how far the float64 statistics
+are from the Decimal ones.
+
+    python benchmarks/aggregate_backends.py --points 100 1000 10000 > backends.json
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from decimal import Decimal
+from typing import Callable, Dict, List
+
+from xrp_price_aggregate import aggregate_filter, numeric
+from xrp_price_aggregate.quotes import QuoteBatch
+
+
+STATISTICS = ("raw_median", "raw_stdev", "filtered_median", "filtered_mean")
+
+
+def synthetic_results(points: int, seed: int = 0) -> Dict[str, List[Decimal]]:
+    """Prices around 0.72 from a handful of exchanges, like a long window"""
+    rng = random.Random(seed)
+    exchanges = ["binance", "bitstamp", "kraken", "hitbtc", "bitrue", "cex"]
+    results: Dict[str, List[Decimal]] = {exchange: [] for exchange in exchanges}
+    for index in range(points):
+        price = Decimal(f"{rng.gauss(0.72, 0.002):.5f}")
+        results[exchanges[index % len(exchanges)]].append(price)
+    return results
+
+
+def timed(function: Callable[[], object], runs: int) -> float:
+    """Median seconds a call takes"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def measure(points: int, runs: int) -> Dict[str, object]:
+    """Times each backend on the points, with the float64 relative errors"""
+    named = synthetic_results(points)
+    batch = QuoteBatch.from_named(named)
+
+    def compute(backend: str) -> Dict[str, object]:
+        return aggregate_filter._compute_aggregate(  # pylint: disable=protected-access
+            batch, backend=backend
+        )
+
+    exact = compute("decimal")
+    fast = compute("float")
+    numpy = numeric.load_numpy()
+    timings = {"decimal": timed(lambda: compute("decimal"), runs)}
+    timings["float"] = timed(lambda: compute("float"), runs)
+    if numpy is not None:
+        # the plain Python floats, as when NumPy isn't installed
+        numeric.numpy = None
+        try:
+            timings["float_python"] = timed(lambda: compute("float"), runs)
+        finally:
+            numeric.numpy = numpy
+    return {
+        "points": points,
+        "runs": runs,
+        "numpy": numpy is not None,
+        "seconds": timings,
+        "relative_error": {
+            name: float(abs(fast[name] - exact[name]) / abs(exact[name]))
+            for name in STATISTICS
+        },
+        "filtered_differently": abs(
+            len(fast["filtered_results"]) - len(exact["filtered_results"])
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    results = [measure(points, args.runs) for points in args.points]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+end_to_end.py
+
+Benchmarks whole aggregations offline, against the local stand-in for every
+exchange (see ``mock_exchanges``), with its latency, jitter and errors.
+
+For each mode it records the latency of each aggregation (median, p95,
+max), how many aggregations a second are done one after another and
+``--concurrency`` at a time, the CPU time and memory allocated per
+aggregation, and the aggregations that failed by exception type.
+
+    - "fast": ``as_awaitable_dict(fast=True)``
+    - "default": ``as_awaitable_dict()``, every provider
+    - "oracle": ``as_awaitable_dict(oracle=True)``, without the XRPL oracle
+    - "warm": ``Aggregator.aggregate()``, reusing the clients
+    - "streaming": ``Aggregator(streaming=True).aggregate()``, over websockets
+    - "targets": ``as_awaitable_targets()``, XRP/USD, XRP/EUR and XRP/BTC in
+      one go
+    - "separate": each of those targets with its own ``as_awaitable_dict()``
+    - "convert": ``as_awaitable_dict(convert=...)``, fetching the USDT/USD
+      legs along with the prices
+
+    python benchmarks/end_to_end.py --runs 20 --latency 0.05 --jitter 0.02 > e2e.json
+    python benchmarks/end_to_end.py --modes fast warm --error-rate 0.1
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from mock_exchanges import (
+    PROVIDER_PAIRS,
+    LEG_PAIRS,
+    STREAMING_PAIRS,
+    TARGET_PAIRS,
+    Faults,
+    MockExchanges,
+    point_providers,
+)
+from xrp_price_aggregate import Aggregator, as_awaitable_dict, as_awaitable_targets
+
+
+MODES = (
+    "fast",
+    "default",
+    "oracle",
+    "warm",
+    "streaming",
+    "targets",
+    "separate",
+    "convert",
+)
+
+Aggregate = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+async def _timed(aggregate: Aggregate, errors: Counter) -> Optional[Dict[str, float]]:
+    """Wall and CPU seconds of an aggregation, None when it failed"""
+    started, cpu_started = time.perf_counter(), time.process_time()
+    try:
+        await aggregate()
+    except Exception as err:  # pylint: disable=broad-except
+        errors[type(err).__name__] += 1
+        return None
+    return {
+        "wall": time.perf_counter() - started,
+        "cpu": time.process_time() - cpu_started,
+    }
+
+
+async def _allocated(aggregate: Aggregate, runs: int) -> Dict[str, float]:
+    """Median bytes allocated at the peak of an aggregation, and left
+    allocated after it
+    """
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(runs):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            try:
+                await aggregate()
+            except Exception:  # pylint: disable=broad-except
+                continue
+            after, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(after - before)
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_bytes": statistics.median(peaks) if peaks else 0,
+        "retained_bytes": statistics.median(retained) if retained else 0,
+    }
+
+
+async def measure(
+    mode: str, runs: int, concurrency: int, count: int, delay: float
+) -> Dict[str, Any]:
+    """Benchmarks the mode, against the already pointed providers"""
+    aggregator: Optional[Aggregator] = None
+    if mode in ("warm", "streaming"):
+        streaming = mode == "streaming"
+        aggregator = Aggregator(
+            fast=not streaming,
+            streaming=streaming,
+            providers=STREAMING_PAIRS if streaming else PROVIDER_PAIRS,
+        )
+        await aggregator.open()
+
+    async def aggregate() -> Dict[str, Any]:
+        if aggregator is not None:
+            return await aggregator.aggregate(count, delay)
+        if mode == "targets":
+            return await as_awaitable_targets(
+                list(TARGET_PAIRS), count, delay, providers=TARGET_PAIRS
+            )
+        if mode == "separate":
+            return dict(
+                zip(
+                    TARGET_PAIRS,
+                    await asyncio.gather(
+                        *(
+                            as_awaitable_dict(count, delay, providers=provider_pairs)
+                            for provider_pairs in TARGET_PAIRS.values()
+                        )
+                    ),
+                )
+            )
+        return await as_awaitable_dict(
+            count,
+            delay,
+            fast=mode == "fast",
+            oracle=mode == "oracle",
+            providers=PROVIDER_PAIRS,
+            convert=LEG_PAIRS if mode == "convert" else False,
+        )
+
+    errors: Counter = Counter()
+    try:
+        # connects the warm clients, and subscribes the streaming ones
+        await _timed(aggregate, Counter())
+        timings = [await _timed(aggregate, errors) for _ in range(runs)]
+        started = time.perf_counter()
+        concurrent = await asyncio.gather(
+            *(_timed(aggregate, errors) for _ in range(concurrency * runs))
+        )
+        concurrent_seconds = time.perf_counter() - started
+        allocated = await _allocated(aggregate, max(runs // 4, 1))
+    finally:
+        if aggregator is not None:
+            await aggregator.close()
+    succeeded = [timing for timing in timings if timing is not None]
+    walls = sorted(timing["wall"] for timing in succeeded)
+    cpus = [timing["cpu"] for timing in succeeded]
+    return {
+        "mode": mode,
+        "count": count,
+        "runs": runs,
+        "failed": runs - len(succeeded),
+        "errors": dict(errors),
+        "latency_seconds": {
+            "median": statistics.median(walls) if walls else None,
+            "p95": _percentile(walls, 0.95) if walls else None,
+            "max": walls[-1] if walls else None,
+        },
+        "throughput_per_second": {
+            "sequential": len(walls) / sum(walls) if walls else 0,
+            "concurrent": sum(timing is not None for timing in concurrent)
+            / concurrent_seconds,
+        },
+        "concurrency": concurrency,
+        "cpu_seconds": statistics.median(cpus) if cpus else None,
+        **allocated,
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    faults = Faults(args.latency, args.jitter, args.error_rate, args.error_status)
+    async with MockExchanges(faults, args.push_interval) as server:
+        point_providers(server)
+        results = [
+            await measure(mode, args.runs, args.concurrency, args.count, args.delay)
+            for mode in args.modes
+        ]
+        return {
+            "faults": faults._asdict(),
+            "results": results,
+            "requests": dict(server.requests),
+            "injected_failures": dict(server.failed),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--count", type=int, default=1)
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--push-interval", type=float, default=0.05)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
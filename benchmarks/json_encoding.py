@@ -0,0 +1,93 @@
+"""
+json_encoding.py
+
+Compares serializing the aggregate results with ``json.dumps`` and
+``default_for_decimal``, as before, against ``serialize``: preformatted with
+the json module, preformatted with orjson (when installed), and the encoded
+bytes kept for serving the same results to many readers.
+
+    python benchmarks/json_encoding.py --count 1 50 --readers 100 > json.json
+"""
+import argparse
+import json
+
+from decimal import Decimal
+from typing import Dict, Iterator, List
+
+from aggregate_backends import synthetic_results, timed
+from xrp_price_aggregate import aggregate_filter, serialize
+from xrp_price_aggregate.aggregate_filter import default_for_decimal
+from xrp_price_aggregate.quotes import AggregateResults, QuoteBatch
+
+
+# a price from each of the synthetic exchanges every round
+EXCHANGES = 6
+
+
+def aggregate(named: Dict[str, List[Decimal]]) -> AggregateResults:
+    """Fresh aggregate results, without anything encoded yet"""
+    return aggregate_filter._compute_aggregate(  # pylint: disable=protected-access
+        QuoteBatch.from_named(named)
+    )
+
+
+def measure(count: int, readers: int, runs: int) -> Dict[str, object]:
+    """Times each way of serializing the results of ``count`` rounds"""
+    named = synthetic_results(count * EXCHANGES)
+    # json.dumps builds the lists of the results, formatting doesn't need them
+    results, lazy = aggregate(named), aggregate(named)
+    orjson = serialize.load_orjson()
+    timings = {
+        "default_for_decimal": timed(
+            lambda: json.dumps(results, default=default_for_decimal), runs
+        )
+    }
+    serialize.orjson = None
+    try:
+        timings["preformatted"] = timed(
+            lambda: serialize.dumps_preformatted(lazy.formatted()), runs
+        )
+    finally:
+        serialize.orjson = orjson
+    if orjson is not None:
+        timings["preformatted_orjson"] = timed(
+            lambda: serialize.dumps_preformatted(lazy.formatted()), runs
+        )
+
+    # every reader of an aggregate, encoding it for each as before
+    timings["readers_default_for_decimal"] = timed(
+        lambda: [
+            json.dumps(results, default=default_for_decimal).encode()
+            for _ in range(readers)
+        ],
+        runs,
+    )
+    # and encoding it once, fresh results each run so none are kept yet
+    fresh: Iterator[AggregateResults] = iter([aggregate(named) for _ in range(runs)])
+    timings["readers_encoded"] = timed(
+        lambda: [serialize.encode(results) for results in [next(fresh)] * readers],
+        runs,
+    )
+    return {
+        "count": count,
+        "points": len(results["raw_results"]),
+        "readers": readers,
+        "runs": runs,
+        "orjson": orjson is not None,
+        "bytes": len(lazy.encoded()),
+        "seconds": timings,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, nargs="+", default=[1, 50])
+    parser.add_argument("--readers", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+    results = [measure(count, args.readers, args.runs) for count in args.count]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
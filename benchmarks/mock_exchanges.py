@@ -0,0 +1,489 @@
+"""
+mock_exchanges.py
+
+A local stand-in for every endpoint our providers call, over HTTP and
+websockets, so the whole aggregation can be benchmarked offline.
+
+Each route answers in the shape of the exchange it stands in for: Binance,
+Bitrue, Bitstamp, HitBTC and Kraken's ticker endpoints, the XRPL JSON-RPC
+``account_lines``, a ccxt unified ticker, and the websocket streams of
+Binance, Bitstamp, Kraken and the XRPL. Prices are random around 0.72, and
+around 0.999 for the stablecoin legs like USDT/USD.
+
+Every HTTP response is delayed by ``latency`` seconds plus up to ``jitter``
+seconds, and a share ``error_rate`` of them fail with ``error_status``
+instead. Websocket pushes are delayed the same way, with ``error_rate`` of
+them dropping the connection.
+
+    async with MockExchanges(Faults(latency=0.05, jitter=0.02)) as server:
+        point_providers(server)
+        await xrp_price_aggregate.as_awaitable_dict(providers=PROVIDER_PAIRS)
+
+ccxt's exchanges load their markets from each exchange before fetching a
+ticker, so they're not pointed at the stand-in. ``MockCCXT`` fetches a ccxt
+unified ticker instead, standing in for them in ``PROVIDER_PAIRS``, in the
+``TARGET_PAIRS`` of each target and the ``LEG_PAIRS`` of each stablecoin.
+"""
+import asyncio
+import json
+import random
+import time
+
+from collections import Counter
+from decimal import Decimal
+from types import TracebackType
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Type
+from urllib.parse import parse_qs, urlsplit
+
+import websockets
+
+from xrp_price_aggregate.providers import ProviderPairs, register_provider
+from xrp_price_aggregate.providers.base import FakeCCXT
+from xrp_price_aggregate.providers.gen_default import (
+    DEFAULT_LEG_PROVIDER_PAIRS,
+    DEFAULT_TARGET_PROVIDER_PAIRS,
+    STREAMING_PROVIDER_PAIRS,
+)
+
+
+def _mock_ccxt(provider_pairs: ProviderPairs) -> ProviderPairs:
+    """The providers, with the ccxt exchanges stood in for by ``MockCCXT``"""
+    return list(
+        dict.fromkeys(
+            ("mock_ccxt", pair) if name.startswith("ccxt:") else (name, pair)
+            for name, pair in provider_pairs
+        )
+    )
+
+
+# the defaults, with the ccxt exchanges stood in for by ``MockCCXT``
+PROVIDER_PAIRS: ProviderPairs = [
+    ("mock_ccxt", "XRP/USDT"),
+    ("mock_ccxt", "XRP/USD"),
+    ("bitstamp", "XRPUSD"),
+    ("bitstamp", "XRPUSDT"),
+    ("hitbtc", "XRPUSDT"),
+    ("kraken", "XRPUSD"),
+    ("bitrue", "XRPUSDT"),
+    ("binance", "XRPUSDT"),
+    ("xrpl_oracle", "USD"),
+]
+STREAMING_PAIRS: ProviderPairs = list(STREAMING_PROVIDER_PAIRS)
+# the defaults of each target, likewise
+TARGET_PAIRS: Dict[str, ProviderPairs] = {
+    target: _mock_ccxt(provider_pairs)
+    for target, provider_pairs in DEFAULT_TARGET_PROVIDER_PAIRS.items()
+    if target != "XRP/USD"
+}
+TARGET_PAIRS["XRP/USD"] = PROVIDER_PAIRS
+# and of each stablecoin's leg, converting with ``convert=LEG_PAIRS``
+LEG_PAIRS: Dict[str, ProviderPairs] = {
+    stablecoin: _mock_ccxt(provider_pairs)
+    for stablecoin, provider_pairs in DEFAULT_LEG_PROVIDER_PAIRS.items()
+}
+
+# the pairs listed by Bitstamp's endpoint of every ticker
+BITSTAMP_PAIRS = (
+    "XRP/USD",
+    "XRP/USDT",
+    "XRP/EUR",
+    "XRP/BTC",
+    "BTC/USD",
+    "USDT/USD",
+    "USDC/USD",
+)
+STABLECOINS = ("USDT", "USDC")
+
+_REASONS = {
+    200: "OK",
+    404: "Not Found",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    502: "Bad Gateway",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+class Faults(NamedTuple):
+    """What goes wrong with the stand-in's responses"""
+
+    # seconds each response takes, at least
+    latency: float = 0.0
+    # up to how many more seconds each response takes, uniformly
+    jitter: float = 0.0
+    # the share of responses failing
+    error_rate: float = 0.0
+    # the status of the failed HTTP responses
+    error_status: int = 503
+
+
+class MockCCXT(FakeCCXT):
+    """
+    Stands in for a ccxt exchange, fetching a ccxt unified ticker.
+    """
+
+    # like the ccxt exchanges, it's left out of the fast ones
+    fast = False
+    fetch_ticker_url = "http://127.0.0.1/ccxt/ticker"
+
+    @property
+    def id(self) -> str:
+        return "mock_ccxt"
+
+    @classmethod
+    def price_to_precision(cls, _: str, value: str) -> str:
+        """We have no intelligence for precision in this client"""
+        return value
+
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        """The ticker, already in ccxt's shape"""
+        resp = await self.request(
+            "GET", self.fetch_ticker_url, params={"symbol": symbol}
+        )
+        return resp.json()
+
+
+def _price(symbol: str = "") -> str:
+    # the stablecoin legs, like USDT/USD, are about pegged
+    if symbol.upper().startswith(STABLECOINS):
+        return f"{random.gauss(0.999, 0.0005):.5f}"
+    return f"{random.gauss(0.72, 0.002):.5f}"
+
+
+def _book(price: str) -> Tuple[str, str]:
+    """A bid and ask around the price"""
+    spread = Decimal(random.randint(1, 20)) / 100000
+    return str(Decimal(price) - spread), str(Decimal(price) + spread)
+
+
+def _volume() -> str:
+    return f"{random.uniform(1e6, 1e8):.2f}"
+
+
+def _kraken_key(symbol: str) -> str:
+    """Kraken's older pairs are keyed by their legacy names, like XXRPZUSD"""
+    if len(symbol) == 6:
+        return f"X{symbol[:3]}Z{symbol[3:]}"
+    return symbol
+
+
+class MockExchanges:
+    """
+    The stand-in server, listening on a random local port for HTTP and
+    another for websockets.
+
+    ``requests`` counts the HTTP requests by route, and ``failed`` how many of
+    them failed on purpose.
+    """
+
+    def __init__(self, faults: Faults = Faults(), push_interval: float = 0.05):
+        """
+        Args:
+            faults (Faults): What goes wrong with the responses
+            push_interval (float): Seconds between the websocket pushes
+        """
+        self.faults = faults
+        self.push_interval = push_interval
+        self.requests: Counter = Counter()
+        self.failed: Counter = Counter()
+        self.http_url = ""
+        self.ws_url = ""
+        self._http: Optional[asyncio.AbstractServer] = None
+        self._ws: Optional[Any] = None
+        self._routes: List[
+            Tuple[str, Callable[[str, Dict[str, List[str]], bytes], Any]]
+        ] = [
+            ("/binance/api/v3/ticker/price", self._binance),
+            ("/bitrue/api/v1/ticker/price", self._bitrue),
+            ("/bitstamp/api/v2/ticker/", self._bitstamp),
+            ("/hitbtc/api/2/public/ticker/", self._hitbtc),
+            ("/kraken/0/public/Ticker", self._kraken),
+            ("/xrpl", self._xrpl),
+            ("/ccxt/ticker", self._ccxt),
+        ]
+
+    async def start(self) -> None:
+        """Starts listening"""
+        self._http = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self._http.sockets[0].getsockname()[1]
+        self.http_url = f"http://127.0.0.1:{port}"
+        self._ws = await websockets.serve(self._stream, "127.0.0.1", 0)
+        port = next(iter(self._ws.sockets)).getsockname()[1]
+        self.ws_url = f"ws://127.0.0.1:{port}"
+
+    async def close(self) -> None:
+        """Stops listening"""
+        if self._ws is not None:
+            self._ws.close()
+            await self._ws.wait_closed()
+        if self._http is not None:
+            self._http.close()
+            await self._http.wait_closed()
+
+    async def __aenter__(self) -> "MockExchanges":
+        await self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        await self.close()
+
+    async def _delay(self) -> bool:
+        """Waits out the latency, returning whether to fail this time"""
+        faults = self.faults
+        delay = faults.latency + random.uniform(0, faults.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        return random.random() < faults.error_rate
+
+    # HTTP
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answers requests on a kept alive connection"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _, target, _ = request_line.decode().split(" ", 2)
+                length, keep_alive = 0, True
+                while True:
+                    header = (await reader.readline()).decode().lower()
+                    if header in ("\r\n", "\n", ""):
+                        break
+                    name, _, value = header.partition(":")
+                    if name == "content-length":
+                        length = int(value)
+                    elif name == "connection":
+                        keep_alive = "close" not in value
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self._respond(target, body)
+                content = json.dumps(payload).encode()
+                writer.write(
+                    b"HTTP/1.1 %d %s\r\n"
+                    b"Content-Type: application/json\r\n"
+                    b"Content-Length: %d\r\n"
+                    b"\r\n"
+                    % (status, _REASONS.get(status, "Error").encode(), len(content))
+                    + content
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # still answering when the event loop shut down
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, target: str, body: bytes) -> Tuple[int, Any]:
+        url = urlsplit(target)
+        for prefix, route in self._routes:
+            if url.path.startswith(prefix):
+                self.requests[prefix] += 1
+                if await self._delay():
+                    self.failed[prefix] += 1
+                    return self.faults.error_status, {"error": "injected"}
+                return 200, route(url.path[len(prefix) :], parse_qs(url.query), body)
+        return 404, {"error": f"no route for {url.path}"}
+
+    @staticmethod
+    def _binance(_: str, query: Dict[str, List[str]], __: bytes) -> Any:
+        if "symbols" in query:
+            return [
+                {"symbol": symbol, "price": _price()}
+                for symbol in json.loads(query["symbols"][0])
+            ]
+        return {"symbol": query["symbol"][0], "price": _price()}
+
+    @staticmethod
+    def _bitrue(_: str, query: Dict[str, List[str]], __: bytes) -> Any:
+        return {"symbol": query["symbol"][0], "price": _price()}
+
+    @staticmethod
+    def _bitstamp_ticker(
+        pair: Optional[str] = None, symbol: str = ""
+    ) -> Dict[str, Any]:
+        price = _price(pair or symbol)
+        bid, ask = _book(price)
+        ticker = {
+            "last": price,
+            "bid": bid,
+            "ask": ask,
+            "volume": _volume(),
+            "timestamp": str(int(time.time())),
+        }
+        if pair is not None:
+            ticker["pair"] = pair
+        return ticker
+
+    def _bitstamp(self, symbol: str, _: Dict[str, List[str]], __: bytes) -> Any:
+        # every ticker, or the one of the path's symbol like xrpusd/
+        if not symbol:
+            return [self._bitstamp_ticker(pair) for pair in BITSTAMP_PAIRS]
+        return self._bitstamp_ticker(symbol=symbol)
+
+    @staticmethod
+    def _hitbtc(symbol: str, _: Dict[str, List[str]], __: bytes) -> Any:
+        price = _price()
+        bid, ask = _book(price)
+        return {
+            "symbol": symbol,
+            "last": price,
+            "bid": bid,
+            "ask": ask,
+            "volume": _volume(),
+        }
+
+    @staticmethod
+    def _kraken(_: str, query: Dict[str, List[str]], __: bytes) -> Any:
+        result = {}
+        for symbol in query["pair"][0].split(","):
+            price = _price(symbol)
+            bid, ask = _book(price)
+            volume = _volume()
+            result[_kraken_key(symbol)] = {
+                "a": [ask, "1", "1.000"],
+                "b": [bid, "1", "1.000"],
+                "c": [price, "10.0"],
+                "v": [volume, volume],
+            }
+        return {"error": [], "result": result}
+
+    @staticmethod
+    def _account_lines() -> Dict[str, Any]:
+        return {
+            "lines": [
+                {"currency": currency, "limit_peer": _price()}
+                for currency in ("USD", "USD", "USD", "EUR", "JPY")
+            ],
+            "status": "success",
+        }
+
+    def _xrpl(self, _: str, __: Dict[str, List[str]], body: bytes) -> Any:
+        if json.loads(body).get("method") != "account_lines":
+            return {"result": {"status": "error", "error": "unknownCmd"}}
+        return {"result": self._account_lines()}
+
+    @staticmethod
+    def _ccxt(_: str, query: Dict[str, List[str]], __: bytes) -> Any:
+        price = _price(query["symbol"][0])
+        bid, ask = _book(price)
+        return {
+            "symbol": query["symbol"][0],
+            "timestamp": int(time.time() * 1000),
+            "bid": float(bid),
+            "ask": float(ask),
+            "last": float(price),
+            "close": float(price),
+            "baseVolume": float(_volume()),
+        }
+
+    # websockets
+
+    async def _stream(self, websocket: Any, path: str) -> None:
+        """Pushes to the subscribed symbols in the exchange's shape"""
+        exchange = path.strip("/")
+        symbols: List[str] = []
+
+        async def listen() -> None:
+            async for message in websocket:
+                request = json.loads(message)
+                if exchange == "binance":
+                    symbols.extend(
+                        param.split("@")[0].upper() for param in request["params"]
+                    )
+                elif exchange == "bitstamp":
+                    channel = request["data"]["channel"]
+                    symbols.append(channel[len("live_trades_") :])
+                elif exchange == "kraken":
+                    symbols.extend(request["pair"])
+                elif request.get("command") == "account_lines":
+                    await websocket.send(
+                        json.dumps(
+                            {
+                                "id": request["id"],
+                                "status": "success",
+                                "type": "response",
+                                "result": self._account_lines(),
+                            }
+                        )
+                    )
+
+        listening = asyncio.ensure_future(listen())
+        try:
+            while not listening.done():
+                await asyncio.sleep(self.push_interval)
+                if await self._delay():
+                    self.failed[f"ws/{exchange}"] += 1
+                    break
+                for message in self._pushes(exchange, symbols):
+                    self.requests[f"ws/{exchange}"] += 1
+                    await websocket.send(json.dumps(message))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            listening.cancel()
+
+    @staticmethod
+    def _pushes(exchange: str, symbols: List[str]) -> List[Any]:
+        if exchange == "xrpl":
+            # the oracle's account was touched, its lines are read again
+            return [{"type": "transaction", "validated": True}]
+        pushes: List[Any] = []
+        for symbol in symbols:
+            price = _price()
+            if exchange == "binance":
+                pushes.append({"e": "24hrMiniTicker", "s": symbol, "c": price})
+            elif exchange == "bitstamp":
+                pushes.append(
+                    {
+                        "event": "trade",
+                        "channel": f"live_trades_{symbol}",
+                        "data": {"price_str": price},
+                    }
+                )
+            elif exchange == "kraken":
+                pushes.append([1, {"c": [price, "1.0"]}, "ticker", symbol])
+        return pushes
+
+
+def point_providers(server: MockExchanges) -> None:
+    """Points every one of our providers at the stand-in, and registers
+    ``MockCCXT`` as "mock_ccxt"
+    """
+    http, ws = server.http_url, server.ws_url
+    urls: Dict[str, Dict[str, Any]] = {
+        "binance": {"fetch_ticker_url": f"{http}/binance/api/v3/ticker/price"},
+        "bitrue": {"fetch_ticker_url": f"{http}/bitrue/api/v1/ticker/price"},
+        "bitstamp": {
+            "fetch_ticker_template_url": f"{http}/bitstamp/api/v2/ticker/{{symbol}}/",
+            "fetch_tickers_url": f"{http}/bitstamp/api/v2/ticker/",
+        },
+        "hitbtc": {
+            "fetch_ticker_url_template": f"{http}/hitbtc/api/2/public/ticker/{{symbol}}"
+        },
+        "kraken": {"fetch_ticker_url": f"{http}/kraken/0/public/Ticker"},
+        "xrpl_oracle": {"fetch_ticker_urls": [f"{http}/xrpl"]},
+    }
+    for name, attributes in list(urls.items()):
+        # the websocket providers seed their prices from the same endpoints
+        urls[f"{name}_websocket"] = dict(attributes)
+    urls["binance_websocket"]["websocket_url"] = f"{ws}/binance"
+    urls["bitstamp_websocket"]["websocket_url"] = f"{ws}/bitstamp"
+    urls["kraken_websocket"]["websocket_url"] = f"{ws}/kraken"
+    urls["xrpl_oracle_websocket"]["websocket_urls"] = [f"{ws}/xrpl"]
+    for name in ("bitrue_websocket", "hitbtc_websocket"):
+        del urls[name]
+    for name, attributes in urls.items():
+        register_provider(name, **attributes)
+    register_provider("mock_ccxt", MockCCXT, fetch_ticker_url=f"{http}/ccxt/ticker")
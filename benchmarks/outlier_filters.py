@@ -0,0 +1,83 @@
+"""
+outlier_filters.py
+
+Times each outlier filter on synthetic prices, with each backend, recording
+how many of the results it kept.
+
+    python benchmarks/outlier_filters.py --points 10000 > filters.json
+"""
+import argparse
+import json
+
+from decimal import Decimal
+from typing import Dict, List
+
+from aggregate_backends import synthetic_results, timed
+from xrp_price_aggregate import aggregate_filter, numeric
+from xrp_price_aggregate.filters import FILTERS
+from xrp_price_aggregate.quotes import QuoteBatch
+
+
+def with_outliers(points: int) -> Dict[str, List[Decimal]]:
+    """The synthetic prices, with a few far off ones from a stale exchange"""
+    results = synthetic_results(points)
+    results["stale"] = [Decimal("0.65"), Decimal("0.8"), Decimal("0.81")]
+    return results
+
+
+def measure(points: int, runs: int) -> List[Dict[str, object]]:
+    """Times each filter on the points, for each backend"""
+    named = with_outliers(points)
+    batch = QuoteBatch.from_named(named)
+    weights = {name: Decimal(1) for name in named}
+    weights["stale"] = Decimal("0.1")
+    backends = ["decimal", "float"]
+    numpy = numeric.load_numpy()
+    if numpy is not None:
+        backends.append("float_python")
+    measured = []
+    for name in FILTERS:
+        for backend in backends:
+
+            def compute() -> Dict[str, object]:
+                return aggregate_filter._compute_aggregate(  # pylint: disable=protected-access
+                    batch,
+                    weights if name == "weighted" else None,
+                    "decimal" if backend == "decimal" else "float",
+                    name,
+                )
+
+            if backend == "float_python":
+                # the plain Python floats, as when NumPy isn't installed
+                numeric.numpy = None
+            try:
+                kept = len(compute()["filtered_results"])
+                seconds = timed(compute, runs)
+            finally:
+                numeric.numpy = numpy
+            measured.append(
+                {
+                    "filter": name,
+                    "backend": backend,
+                    "points": len(batch),
+                    "runs": runs,
+                    "seconds": seconds,
+                    "kept": kept,
+                }
+            )
+    return measured
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, nargs="+", default=[10000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    results = [
+        result for points in args.points for result in measure(points, args.runs)
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
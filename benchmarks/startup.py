@@ -0,0 +1,76 @@
+"""
+startup.py
+
+Records how long importing the library and creating the clients takes for
+each mode, each in a fresh interpreter so nothing is already imported.
+
+    python benchmarks/startup.py --runs 5 > startup.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from typing import Dict, List
+
+
+MODES = {
+    "fast": "generate_fast",
+    "oracle": "generate_oracle",
+    "default": "generate_default",
+}
+
+# runs in the fresh interpreter, printing its timings as json
+_SCRIPT = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import xrp_price_aggregate
+from xrp_price_aggregate import providers
+imported = time.perf_counter()
+exchanges, _ = providers.{generate}()
+created = time.perf_counter()
+async def close():
+    await asyncio.gather(*(exchange.close() for exchange in exchanges))
+asyncio.run(close())
+print(json.dumps({{
+    "import": imported - started,
+    "create": created - imported,
+    "ccxt": "ccxt" in sys.modules,
+    "websockets": "websockets" in sys.modules,
+}}))
+"""
+
+
+def measure(mode: str, runs: int) -> Dict[str, object]:
+    """Median seconds importing and creating the clients for the mode"""
+    timings: List[Dict[str, object]] = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _SCRIPT.format(generate=MODES[mode])],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        timings.append(json.loads(output.splitlines()[-1]))
+    return {
+        "mode": mode,
+        "runs": runs,
+        "import_seconds": statistics.median(t["import"] for t in timings),
+        "create_seconds": statistics.median(t["create"] for t in timings),
+        "imports_ccxt": timings[-1]["ccxt"],
+        "imports_websockets": timings[-1]["websockets"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--mode", choices=list(MODES), action="append")
+    args = parser.parse_args()
+    results = [measure(mode, args.runs) for mode in args.mode or MODES]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,60 @@
-from .aggregate_filter import as_dict, as_json, as_awaitable_dict, as_awaitable_json
+from .aggregate_filter import (
+    as_dict,
+    as_json,
+    as_awaitable_dict,
+    as_awaitable_json,
+    as_awaitable_targets,
+    as_targets,
+    stream_aggregate,
+)
+from .aggregator import Aggregator
+from .cache import PriceCache
+from .filters import (
+    IQRFilter,
+    MADFilter,
+    OutlierFilter,
+    StdevFilter,
+    TrimmedFilter,
+    WeightedFilter,
+)
+from .latency import HedgePolicy, LatencyTracker
+from .metrics import (
+    MetricsHooks,
+    OpenTelemetryHooks,
+    PrometheusHooks,
+    add_metrics_hooks,
+    remove_metrics_hooks,
+)
+from .providers import load_config, register_provider
+from .rolling import RollingAggregate
+from .status import NoAggregateError
 
 
 __all__ = [
+    "Aggregator",
+    "HedgePolicy",
+    "IQRFilter",
+    "LatencyTracker",
+    "MADFilter",
+    "MetricsHooks",
+    "NoAggregateError",
+    "OpenTelemetryHooks",
+    "OutlierFilter",
+    "PriceCache",
+    "PrometheusHooks",
+    "RollingAggregate",
+    "StdevFilter",
+    "TrimmedFilter",
+    "WeightedFilter",
+    "add_metrics_hooks",
     "as_awaitable_dict",
     "as_awaitable_json",
+    "as_awaitable_targets",
     "as_dict",
     "as_json",
+    "as_targets",
+    "load_config",
+    "register_provider",
+    "remove_metrics_hooks",
+    "stream_aggregate",
 ]
@@ -1,10 +1,15 @@
 import sys
 
-from . import as_json
 
+if sys.argv[1:2] == ["serve"]:
+    from .daemon import main
 
-# call with the fast parameter by default...
-# ...unless provided with a short or long option
-fast = not sys.argv[-1].endswith(("--exhaustive", "-E", "-L", "--long", "--ccxt"))
+    main(sys.argv[2:])
+else:
+    from . import as_json
 
-print(as_json(count=2, delay=0.25, fast=fast))
+    # call with the fast parameter by default...
+    # ...unless provided with a short or long option
+    fast = not sys.argv[-1].endswith(("--exhaustive", "-E", "-L", "--long", "--ccxt"))
+
+    print(as_json(count=2, delay=0.25, fast=fast))
@@ -4,15 +4,20 @@ aggregate_filter.py
 This is the main aggregate and filter workflow.
 """
 import asyncio
-import json
 import logging
 import statistics
+import time
 
 from decimal import Decimal
 from typing import (
+    Any,
+    AsyncIterator,
     Awaitable,
     Dict,
+    Iterable,
     List,
+    Optional,
+    Sequence,
     Set,
     Tuple,
     Union,
@@ -20,17 +25,53 @@ from typing import (
 
 import httpx
 
-from .providers import ExchangeClient, generate_default, generate_fast, generate_oracle
+from .cache import CacheKey, PriceCache
+from .convert import convert_quotes, leg_provider_pairs, quote_currency
+from .latency import LatencyKey, LatencyTracker
+from .filters import DecimalPrices, OutlierFilter, get_filter
+from .metrics import HOOKS, observe_aggregate, observe_filter, observe_request
+from .numeric import BACKENDS, float_prices
+from .quotes import MODES, AggregateResults, Quote, QuoteBatch, quote_from_ticker
+from .serialize import dumps, format_decimal
+from .status import (
+    TIMEOUT,
+    ChainResult,
+    NoAggregateError,
+    ProviderStatuses,
+    describe,
+    provider_statuses,
+    status_of,
+)
+from .providers import (
+    ExchangeClient,
+    ProviderPairs,
+    generate_default,
+    generate_fast,
+    generate_oracle,
+    target_provider_pairs,
+)
+from .providers.gen_default import DEFAULT_PROVIDER_PAIRS
 
 
-AggregateResultValue = Union[Dict[str, List[Decimal]], Decimal, List[Decimal]]
+AggregateResultValue = Union[
+    Dict[str, List[Decimal]],
+    Dict[str, List[str]],
+    Decimal,
+    List[Decimal],
+    ProviderStatuses,
+    str,
+]
+# a chain of tasks, with the exchange and pairs it fetches
+_Chain = Tuple[Awaitable[ChainResult], List[Tuple[ExchangeClient, str]]]
 
 logger = logging.getLogger(__name__)
 # https://docs.python.org/3/howto/logging.html#configuring-logging-for-a-library
 logger.addHandler(logging.NullHandler())
 
-# TODO make this exposed as wrapped exception that can be ignored by us
-_FILTERED_CLIENT_EXCEPTIONS = (httpx.RequestError,)
+# aggregations in progress, shared by concurrent callers asking to coalesce
+_IN_FLIGHT: Dict[
+    Tuple[Any, ...], "asyncio.Future[Dict[str, AggregateResultValue]]"
+] = {}
 
 
 def default_for_decimal(obj: Decimal) -> str:
@@ -42,7 +83,7 @@ def default_for_decimal(obj: Decimal) -> str:
 
 def _format_decimal_result(result: Decimal) -> str:
     """When displaying a result, format to 5 significant digits"""
-    return f"{result:.5f}"
+    return format_decimal(result)
 
 
 def _format_decimal_results(results: List[Decimal]) -> List[str]:
@@ -50,50 +91,1045 @@ def _format_decimal_results(results: List[Decimal]) -> List[str]:
     return [_format_decimal_result(r) for r in results]
 
 
-async def _async_get_price(exchange: ExchangeClient, pair: str) -> Tuple[str, Decimal]:
+def _provider_name(exchange: ExchangeClient) -> str:
+    """The name the provider was selected by, falling back to the exchange's
+    id
+    """
+    return getattr(exchange, "provider_name", None) or exchange.id
+
+
+def _latency_key(exchange: ExchangeClient, pair: str) -> LatencyKey:
+    """The provider's name and the pair"""
+    return _provider_name(exchange), pair
+
+
+async def _fetch_price(
+    exchange: ExchangeClient, pair: str, latency: Optional[LatencyTracker] = None
+) -> Quote:
+    """Fetches the quote from an exchange, its price scaled to the pair's
+    precision
+
+    When given a ``latency`` tracker, the request is timed and maybe hedged.
+    With metrics hooks added, the request is observed, see ``metrics``.
+    """
+    if HOOKS:
+        return await observe_request(
+            _provider_name(exchange), [pair], _request_price(exchange, pair, latency)
+        )
+    return await _request_price(exchange, pair, latency)
+
+
+async def _request_price(
+    exchange: ExchangeClient, pair: str, latency: Optional[LatencyTracker] = None
+) -> Quote:
+    """Requests the quote, see ``fetch_price``"""
+
+    def fetch() -> Awaitable[Dict[str, Any]]:
+        return asyncio.wait_for(
+            exchange.fetch_ticker(pair), getattr(exchange, "request_timeout", None)
+        )
+
+    ticker = await (
+        fetch()
+        if latency is None
+        else latency.fetch([_latency_key(exchange, pair)], fetch)
+    )
+    return _quote(exchange, pair, ticker)
+
+
+def _quote(exchange: ExchangeClient, pair: str, ticker: Dict[str, Any]) -> Quote:
+    """The quote of a ticker, its price scaled to the pair's precision"""
+    return quote_from_ticker(
+        Decimal(
+            exchange.price_to_precision(
+                pair,
+                # "last" is an alias to "close"
+                ticker.get("last"),
+            )
+        ),
+        ticker,
+        pair,
+    )
+
+
+async def _async_get_price(
+    exchange: ExchangeClient,
+    pair: str,
+    cache: Optional[PriceCache] = None,
+    latency: Optional[LatencyTracker] = None,
+    ages: Optional[Dict[CacheKey, float]] = None,
+) -> Tuple[str, Quote]:
     """Utility function for grabbing the price from an exchange
 
     Args:
         exchange (ExchangeClient): A ccxt-like client
         pair (str): A pair like XRP/USD XRPUSD
+        cache (PriceCache): An optional cache to serve the price from
+        latency (LatencyTracker): An optional tracker to record how long the
+                                  request took
+        ages (Dict[CacheKey, float]): Where to record how many seconds old
+                                      the price served from the cache is
 
     Returns:
-        str: The exchange's id or name
-        Decimal: The fetched price
-    """
-    ticker = await exchange.fetch_ticker(pair)
-    return exchange.id, Decimal(
-        exchange.price_to_precision(
-            pair,
-            # "last" is an alias to "close"
-            ticker.get("last"),
+        str: The provider's name, see ``provider_name``
+        Quote: The fetched price, with the rest of its quote
+    """
+    name = _provider_name(exchange)
+    if cache is None:
+        return name, await _fetch_price(exchange, pair, latency)
+    cached = await cache.get(
+        (name, pair), lambda: _fetch_price(exchange, pair, latency)
+    )
+    logger.debug("%s %s is %.3f seconds old", name, pair, cached.age)
+    if ages is not None:
+        ages[(name, pair)] = cached.age
+    return name, cached.quote
+
+
+async def _fetch_prices(
+    exchange: ExchangeClient,
+    pairs: List[str],
+    latency: Optional[LatencyTracker] = None,
+) -> Dict[str, Quote]:
+    """Fetches the quotes from an exchange in one call, see ``fetch_price``"""
+    if HOOKS:
+        return await observe_request(
+            _provider_name(exchange), pairs, _request_prices(exchange, pairs, latency)
         )
+    return await _request_prices(exchange, pairs, latency)
+
+
+async def _request_prices(
+    exchange: ExchangeClient,
+    pairs: List[str],
+    latency: Optional[LatencyTracker] = None,
+) -> Dict[str, Quote]:
+    """Requests the quotes, see ``fetch_prices``"""
+
+    def fetch() -> Awaitable[Dict[str, Dict[str, Any]]]:
+        return asyncio.wait_for(
+            exchange.fetch_tickers(pairs), getattr(exchange, "request_timeout", None)
+        )
+
+    tickers = await (
+        fetch()
+        if latency is None
+        # every pair waits on the same request
+        else latency.fetch([_latency_key(exchange, pair) for pair in pairs], fetch)
     )
+    return {
+        pair: _quote(exchange, pair, tickers[pair]) for pair in pairs if pair in tickers
+    }
+
+
+async def _async_get_prices(
+    exchange: ExchangeClient,
+    pairs: List[str],
+    cache: Optional[PriceCache] = None,
+    latency: Optional[LatencyTracker] = None,
+    ages: Optional[Dict[CacheKey, float]] = None,
+) -> List[Tuple[str, Quote]]:
+    """Utility function for grabbing many prices from an exchange at once
+
+    Args:
+        exchange (ExchangeClient): A ccxt-like client supporting
+                                   ``fetch_tickers``
+        pairs (List[str]): The pairs like XRP/USD XRPUSD
+        cache (PriceCache): An optional cache to serve the prices from
+        latency (LatencyTracker): An optional tracker to record how long the
+                                  request took
+        ages (Dict[CacheKey, float]): Where to record how many seconds old
+                                      the prices served from the cache are
+
+    Returns:
+        List[Tuple[str, Quote]]: The provider's name and the fetched price
+                                 with the rest of its quote, per pair the
+                                 exchange returned
+    """
+    name = _provider_name(exchange)
+    if cache is None:
+        prices = await _fetch_prices(exchange, pairs, latency)
+        return [(name, prices[pair]) for pair in pairs if pair in prices]
+
+    async def fetch_many(keys: List[CacheKey]) -> Dict[CacheKey, Quote]:
+        fetched = await _fetch_prices(exchange, [pair for _, pair in keys], latency)
+        return {(name, pair): price for pair, price in fetched.items()}
+
+    cached = await cache.get_many([(name, pair) for pair in pairs], fetch_many)
+    if ages is not None:
+        ages.update((key, price.age) for key, price in cached.items())
+    return [
+        (name, cached[(name, pair)].quote) for pair in pairs if (name, pair) in cached
+    ]
 
 
 async def _tasks_fn(
-    exchange: ExchangeClient, pair: str, count: int, delay: float
-) -> List[Tuple[str, Decimal]]:
+    exchange: ExchangeClient,
+    pair: str,
+    count: int,
+    delay: float,
+    queue: Optional["asyncio.Queue[Tuple[str, Quote]]"] = None,
+    cache: Optional[PriceCache] = None,
+    latency: Optional[LatencyTracker] = None,
+    ages: Optional[Dict[CacheKey, float]] = None,
+) -> ChainResult:
     """
     The tasks are a chain like:
 
        fetch() -> [delay() -> fetch() -> delay() ...for _ in count]
 
+    When given a ``queue`` each price is also put on it as soon as it's
+    fetched. When given a ``cache`` the prices are served from it, the age of
+    each one recorded in ``ages`` when given. When given a ``latency``
+    tracker each request's latency is recorded.
+
+    A failed request ends the chain, the prices fetched before it are kept
+    along with the error, see ``status``.
+    """
+    results: List[Tuple[str, Quote]] = []
+    try:
+        for _ in range(count):
+            price: Tuple[str, Quote] = await _async_get_price(
+                exchange, pair, cache, latency, ages
+            )
+            logger.debug("price is %s", price)
+            results += [price]
+            if queue is not None:
+                queue.put_nowait(price)
+            # don't delay when calling once
+            if count != 1:
+                await asyncio.sleep(delay)
+    except asyncio.CancelledError:
+        # an Exception before python 3.8, the quorum or deadline cancels us
+        raise
+    except Exception as err:  # pylint: disable=broad-except
+        logger.debug("%s %s failed with %r", _provider_name(exchange), pair, err)
+        return ChainResult(results, err)
+
+    return ChainResult(results)
+
+
+async def _batch_tasks_fn(
+    exchange: ExchangeClient,
+    pairs: List[str],
+    count: int,
+    delay: float,
+    queue: Optional["asyncio.Queue[Tuple[str, Quote]]"] = None,
+    cache: Optional[PriceCache] = None,
+    latency: Optional[LatencyTracker] = None,
+    ages: Optional[Dict[CacheKey, float]] = None,
+) -> ChainResult:
+    """
+    Like ``tasks_fn``, fetching all the pairs of an exchange in one call:
+
+       fetch_many() -> [delay() -> fetch_many() -> delay() ...for _ in count]
+
+    A pair the exchange leaves out of its tickers fails on its own, with a
+    ``KeyError`` in the ``pair_errors`` of the result, and isn't asked for
+    again. The chain ends once none of its pairs are left.
+    """
+    results: List[Tuple[str, Quote]] = []
+    pair_errors: Dict[str, BaseException] = {}
+    try:
+        for _ in range(count):
+            prices = await _async_get_prices(exchange, pairs, cache, latency, ages)
+            logger.debug("prices are %s", prices)
+            results += prices
+            returned = {quote.pair for _, quote in prices}
+            for pair in pairs:
+                if pair not in returned:
+                    pair_errors[pair] = KeyError(pair)
+            pairs = [pair for pair in pairs if pair in returned]
+            if not pairs:
+                break
+            if queue is not None:
+                for price in prices:
+                    queue.put_nowait(price)
+            # don't delay when calling once
+            if count != 1:
+                await asyncio.sleep(delay)
+    except asyncio.CancelledError:
+        raise
+    except Exception as err:  # pylint: disable=broad-except
+        logger.debug("%s %s failed with %r", _provider_name(exchange), pairs, err)
+        return ChainResult(results, err, pair_errors)
+
+    return ChainResult(results, pair_errors=pair_errors)
+
+
+def _chains(
+    exchange_with_pairs: List[Tuple[ExchangeClient, str]],
+    count: int,
+    delay: float,
+    queue: Optional["asyncio.Queue[Tuple[str, Quote]]"] = None,
+    cache: Optional[PriceCache] = None,
+    latency: Optional[LatencyTracker] = None,
+    ages: Optional[Dict[CacheKey, float]] = None,
+) -> List[_Chain]:
+    """Compiles the chains of tasks, along with the exchange and pairs of each
+
+    The pairs of an exchange that can fetch many at once (``has["fetchTickers"]``)
+    share one chain, from ``batch_tasks_fn``, so each round makes one request
+    to that exchange. Otherwise each pair gets its own chain from ``tasks_fn``.
+
+    When given a ``latency`` tracker, the laggards are left out, unless every
+    one of them is a laggard.
+    """
+    if latency is not None:
+        keeping = [
+            (exchange, pair)
+            for exchange, pair in exchange_with_pairs
+            if not latency.is_laggard(_latency_key(exchange, pair))
+        ]
+        if keeping:
+            exchange_with_pairs = keeping
+    pairs_per_exchange: Dict[ExchangeClient, List[str]] = {}
+    for exchange, pair in exchange_with_pairs:
+        pairs_per_exchange.setdefault(exchange, []).append(pair)
+
+    chains: List[_Chain] = []
+    for exchange, pairs in pairs_per_exchange.items():
+        if len(pairs) > 1 and exchange.has.get("fetchTickers") is True:
+            chains.append(
+                (
+                    _batch_tasks_fn(
+                        exchange, pairs, count, delay, queue, cache, latency, ages
+                    ),
+                    [(exchange, pair) for pair in pairs],
+                )
+            )
+        else:
+            chains.extend(
+                (
+                    _tasks_fn(
+                        exchange, pair, count, delay, queue, cache, latency, ages
+                    ),
+                    [(exchange, pair)],
+                )
+                for pair in pairs
+            )
+    return chains
+
+
+def _select_exchanges(
+    fast: bool,
+    oracle: bool,
+    client: Optional[httpx.AsyncClient] = None,
+    providers: Optional[ProviderPairs] = None,
+    latency: Optional[LatencyTracker] = None,
+) -> Tuple[Set[ExchangeClient], List[Tuple[ExchangeClient, str]]]:
+    """Generates the exchanges for the requested mode
+
+    Args:
+        fast (bool): Use only fast clients, that may use optimized endpoints
+                     that only fetches price.
+        oracle (bool): Skip the XRPL oracle client.
+        client (httpx.AsyncClient): An optional shared client for our
+                                    ccxt-like clients.
+        providers (ProviderPairs): The providers to select from, instead of
+                                   the defaults, see ``load_config``
+        latency (LatencyTracker): An optional tracker of each provider's
+                                  latency, fast clients are picked from its
+                                  measurements when there are any
+
+    Returns:
+        Set[ExchangeClient]: The exchange clients
+        List[Tuple[ExchangeClient, str]]: The exchange clients with the pair
+                                          they should be called with
+    """
+    return (
+        generate_fast(client=client, providers=providers, latency=latency)
+        if fast and not oracle
+        else generate_oracle(client=client, providers=providers)
+        if oracle and not fast
+        else generate_default(client, providers)
+    )
+
+
+async def _close_exchanges(exchanges: Set[ExchangeClient]) -> None:
+    """Closes all the exchange clients, even when we're cancelled"""
+    close_exchanges_tasks = [exchange.close() for exchange in exchanges]
+    # shield in case we are timed out, so the clients are closed
+    await asyncio.shield(asyncio.gather(*close_exchanges_tasks, return_exceptions=True))
+
+
+def _per_call(cache: Optional[PriceCache]) -> Optional[PriceCache]:
+    """The view of the cache for a call creating its own clients, see
+    ``PriceCache.per_call``
+    """
+    return None if cache is None else cache.per_call()
+
+
+async def _close_call(
+    exchanges: Set[ExchangeClient], cache: Optional[PriceCache]
+) -> None:
+    """Closes the clients of a call, cancelling what it left in flight with
+    them rather than waiting on it
+    """
+    if cache is not None:
+        await cache.cancel()
+    await _close_exchanges(exchanges)
+
+
+def _ids(providers: List[Tuple[ExchangeClient, str]]) -> List[Tuple[str, str]]:
+    """The provider name and pair of each provider"""
+    return [(_provider_name(exchange), pair) for exchange, pair in providers]
+
+
+def _outcomes(
+    providers: List[Tuple[ExchangeClient, str]], outcome: ChainResult
+) -> List[Tuple[List[Tuple[str, str]], str, Optional[str]]]:
+    """The status and error of a chain's providers, see ``provider_statuses``,
+    the pairs left out of the exchange's tickers with their own
+    """
+    pair_errors = outcome.pair_errors or {}
+    outcomes = [
+        (
+            [(name, pair) for name, pair in _ids(providers) if pair not in pair_errors],
+            status_of(outcome.error),
+            describe(outcome.error),
+        )
+    ]
+    outcomes.extend(
+        ([(_provider_name(exchange), pair)], status_of(error), describe(error))
+        for exchange, pair in providers
+        for error in [pair_errors.get(pair)]
+        if error is not None
+    )
+    return outcomes
+
+
+def _with_legs(
+    providers: Optional[ProviderPairs],
+    convert: Union[bool, Dict[str, ProviderPairs]],
+) -> Tuple[Optional[ProviderPairs], Optional[Dict[str, str]]]:
+    """The providers, along with the legs of the stablecoins they're quoted in
+    when converting, and the stablecoin of each leg's pair, see ``convert``
+    """
+    if convert is False:
+        return providers, None
+    provider_pairs = DEFAULT_PROVIDER_PAIRS if providers is None else providers
+    leg_pairs, pair_legs = leg_provider_pairs(
+        provider_pairs, None if convert is True else convert
+    )
+    return provider_pairs + leg_pairs, pair_legs
+
+
+def _weights(exchanges: Set[ExchangeClient]) -> Optional[Dict[str, Decimal]]:
+    """The weight of each provider by name, None when none of them are
+    weighted
+
+    By name rather than the exchange's id, "kraken" and "ccxt:kraken" are
+    both "kraken" to ccxt but are weighted (and listed) apart.
+    """
+    weights = {
+        _provider_name(exchange): getattr(exchange, "weight", None)
+        for exchange in exchanges
+    }
+    if all(weight is None for weight in weights.values()):
+        return None
+    return {
+        name: Decimal(1) if weight is None else Decimal(str(weight))
+        for name, weight in weights.items()
+    }
+
+
+def _compute_aggregate(
+    batch: QuoteBatch,
+    weights: Optional[Dict[str, Decimal]] = None,
+    backend: str = "decimal",
+    outlier_filter: Union[str, OutlierFilter] = "stdev",
+    length: Optional[int] = None,
+) -> AggregateResults:
+    """Calculates the raw and filtered parts of the aggregate results
+
+    The lists of results are only built from the batch when they're asked
+    for, see ``AggregateResults``.
+
+    Args:
+        batch (QuoteBatch): The quotes of the aggregation
+        weights (Dict[str, Decimal]): The weight per provider, when given the
+                                      ``"filtered_weighted_mean"`` is included
+        backend (str): "decimal" for exact statistics, or "float" for float64
+                       ones (see ``numeric``)
+        outlier_filter (Union[str, OutlierFilter]): Which results make the
+            filtered part, see ``filters``
+        length (int): How many of the batch's quotes to aggregate, every one
+                      when None
+
+    Returns:
+        AggregateResults: The aggregate results, including the
+            ``"filtered_volume_weighted_mean"`` when the batch has volumes
+    """
+    outlier_filter = get_filter(outlier_filter)
+    length = len(batch) if length is None else length
+    raw_results = batch.prices if length == len(batch) else batch.prices[:length]
+    exchange_index = batch.exchange_index[:length]
+    exchange_weights = (
+        None
+        if weights is None
+        else [weights.get(name, Decimal(1)) for name in batch.exchanges]
+    )
+    # the weighted filter weighs each result by its quote's volume, when
+    # there are any
+    volumes = None if batch.volumes is None else batch.volumes[:length]
+    # 1. Calculate raw part of aggregate results
+    # calculate standard deviation and median from all results
+    prices = (
+        float_prices(raw_results, exchange_index, exchange_weights, volumes)
+        if backend == "float"
+        else DecimalPrices(raw_results, exchange_index, exchange_weights, volumes)
+    )
+
+    # 2. Calculate filtered part of the aggregate results
+    # pull acceptable results from all the raw_results, the filter decides
+    # the bounds they're within, e.g. less than a standard deviation from the
+    # median
+    keep, filtered_median, filtered_mean = prices.filter(outlier_filter.bounds(prices))
+    if HOOKS:
+        kept = keep.count(1)
+        observe_filter(outlier_filter.name, kept, length - kept)
+
+    # compile the statistics, the results are built from the batch
+    statistics: Dict[str, AggregateResultValue] = {
+        "raw_median": prices.decimal(prices.raw_median),
+        "raw_stdev": prices.decimal(prices.raw_stdev),
+        "filtered_median": filtered_median,
+        "filtered_mean": filtered_mean,
+    }
+    if exchange_weights is not None:
+        statistics["filtered_weighted_mean"] = _weighted_mean(
+            raw_results, exchange_index, exchange_weights, keep
+        )
+    if batch.volumes is not None:
+        statistics["filtered_volume_weighted_mean"] = _volume_weighted_mean(
+            raw_results, batch.volumes, keep, filtered_mean
+        )
+    logging.debug("statistics are %s", statistics)
+
+    return AggregateResults(batch, length, keep, statistics)
+
+
+def _volume_weighted_mean(
+    raw_results: List[Decimal],
+    volumes: List[Optional[Decimal]],
+    keep: bytearray,
+    filtered_mean: Decimal,
+) -> Decimal:
+    """The mean of the filtered results, weighted by their quote's volume
+
+    The results without a volume are left out, without any it's the
+    ``filtered_mean``.
+    """
+    total = volume_total = Decimal(0)
+    for result, volume, kept in zip(raw_results, volumes, keep):
+        if kept and volume:
+            total += result * volume
+            volume_total += volume
+    return total / volume_total if volume_total else filtered_mean
+
+
+def _weighted_mean(
+    raw_results: List[Decimal],
+    exchange_index: Sequence[int],
+    exchange_weights: List[Decimal],
+    keep: bytearray,
+) -> Decimal:
+    """The mean of the filtered results, weighted per exchange"""
+    total = weight_total = Decimal(0)
+    for result, index, kept in zip(raw_results, exchange_index, keep):
+        if kept:
+            total += exchange_weights[index] * result
+            weight_total += exchange_weights[index]
+    return total / weight_total
+
+
+async def _gather_quorum(
+    exchange_with_pairs: List[Tuple[ExchangeClient, str]],
+    count: int,
+    delay: float,
+    deadline: Optional[float],
+    quorum: Optional[int],
+    cache: Optional[PriceCache] = None,
+    latency: Optional[LatencyTracker] = None,
+    pair_legs: Optional[Dict[str, str]] = None,
+) -> Tuple[List[Tuple[str, Quote]], Dict[str, List[str]], ProviderStatuses]:
+    """Runs the chains of tasks until a quorum or deadline is reached
+
+    A provider (exchange and pair) has answered once its chain finished all of
+    its ``count`` requests without failing. Once ``quorum`` providers have answered, or
+    ``deadline`` seconds have passed, the stragglers are cancelled. Prices the
+    stragglers already fetched are kept.
+
+    The legs of ``pair_legs`` aren't providers of the quorum, though it waits
+    on them until a leg of each stablecoin answered (or every one failed), so
+    the prices in that stablecoin can still be converted.
+
+    Args:
+        exchange_with_pairs (List[Tuple[ExchangeClient, str]]): The exchange
+            clients with the pair they should be called with
+        count (int): How many times to request from all providers
+        delay (int): How long to wait after finishing all provider requests
+                     before repeating
+        deadline (float): How many seconds to wait before cancelling the
+                          stragglers, waits for all when None
+        quorum (int): How many providers need to answer before cancelling the
+                      stragglers, waits for all when None
+        cache (PriceCache): An optional cache to serve the prices from
+        latency (LatencyTracker): An optional tracker of each provider's
+                                  latency, skipping the laggards
+        pair_legs (Dict[str, str]): The stablecoin of each leg's pair, when
+                                    converting, see ``convert``
+
+    Returns:
+        List[Tuple[str, Quote]]: All of the fetched prices
+        Dict[str, List[str]]: The pairs per exchange that were dropped
+        ProviderStatuses: The status per exchange and pair, the dropped ones
+                          timed out
+    """
+    loop = asyncio.get_event_loop()
+    ends_at = None if deadline is None else loop.time() + deadline
+    # every price lands on the queue, so we keep those from cancelled chains
+    queue: "asyncio.Queue[Tuple[str, Quote]]" = asyncio.Queue()
+    ages: Dict[CacheKey, float] = {}
+    tasks = {
+        asyncio.ensure_future(chain): providers
+        for chain, providers in _chains(
+            exchange_with_pairs, count, delay, queue, cache, latency, ages
+        )
+    }
+    legs = pair_legs or {}
+    needed = sum(1 for _, pair in exchange_with_pairs if pair not in legs)
+    if quorum is not None:
+        needed = min(quorum, needed)
+    # the stablecoins still waiting on a leg, and the chains of their legs
+    unconverted = {legs[pair] for _, pair in exchange_with_pairs if pair in legs}
+    leg_tasks = {
+        task
+        for task, providers in tasks.items()
+        if any(pair in legs for _, pair in providers)
+    }
+    answered = 0
+    pending = set(tasks)
+    try:
+        while pending and (answered < needed or (unconverted and leg_tasks & pending)):
+            timeout = None if ends_at is None else ends_at - loop.time()
+            if timeout is not None and timeout <= 0:
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                outcome = task.result()
+                if outcome.error is not None:
+                    continue
+                for _, pair in tasks[task]:
+                    if pair in (outcome.pair_errors or ()):
+                        continue
+                    if pair in legs:
+                        unconverted.discard(legs[pair])
+                    else:
+                        answered += 1
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    dropped: Dict[str, List[str]] = {}
+    for task in pending:
+        for exchange, pair in tasks[task]:
+            dropped.setdefault(_provider_name(exchange), []).append(pair)
+    statuses = provider_statuses(
+        (
+            entry
+            for task, providers in tasks.items()
+            for entry in (
+                [(_ids(providers), TIMEOUT, None)]
+                if task in pending
+                else _outcomes(providers, task.result())
+            )
+        ),
+        ages,
+    )
+    all_results: List[Tuple[str, Quote]] = []
+    while not queue.empty():
+        all_results.append(queue.get_nowait())
+    return all_results, dropped, statuses
+
+
+async def _gather_all(
+    exchange_with_pairs: List[Tuple[ExchangeClient, str]],
+    count: int,
+    delay: float,
+    cache: Optional[PriceCache] = None,
+    latency: Optional[LatencyTracker] = None,
+) -> Tuple[List[Tuple[str, Quote]], ProviderStatuses]:
+    """Runs the chains of tasks, waiting for every provider
+
+    Returns:
+        List[Tuple[str, Quote]]: All of the fetched prices
+        ProviderStatuses: The status per exchange and pair
+    """
+    # [
+    #     [ Exchange fetch() -> delay() -> fetch() -> delay()...],
+    #     [ Exchange fetch() -> ...],
+    #     ...
+    # ]
+    ages: Dict[CacheKey, float] = {}
+    chains = _chains(
+        exchange_with_pairs, count, delay, cache=cache, latency=latency, ages=ages
+    )
+    # a failing chain returns its error, along with the prices it got before
+    outcomes: List[ChainResult] = await asyncio.gather(*(chain for chain, _ in chains))
+    # flattened, in the order of the chains
+    all_results = [price for outcome in outcomes for price in outcome.results]
+    statuses = provider_statuses(
+        (
+            entry
+            for (_, providers), outcome in zip(chains, outcomes)
+            for entry in _outcomes(providers, outcome)
+        ),
+        ages,
+    )
+    return all_results, statuses
+
+
+async def _gather(
+    exchange_with_pairs: List[Tuple[ExchangeClient, str]],
+    count: int,
+    delay: float,
+    deadline: Optional[float] = None,
+    quorum: Optional[int] = None,
+    cache: Optional[PriceCache] = None,
+    latency: Optional[LatencyTracker] = None,
+    pair_legs: Optional[Dict[str, str]] = None,
+) -> Tuple[List[Tuple[str, Quote]], Optional[Dict[str, List[str]]], ProviderStatuses]:
+    """Fetches the prices of every provider, returning early on a quorum or
+    deadline, see ``gather_quorum``, the legs of ``pair_legs`` aren't counted
+    in the quorum
+
+    Returns:
+        List[Tuple[str, Quote]]: All of the fetched prices
+        Dict[str, List[str]]: The pairs per exchange that were dropped, None
+                              without a deadline or quorum
+        ProviderStatuses: The status per exchange and pair
     """
-    results: List[Tuple[str, Decimal]] = []
-    for _ in range(count):
-        price: Tuple[str, Decimal] = await _async_get_price(exchange, pair)
-        logger.debug("price is %s", price)
-        results += [price]
-        # don't delay when calling once
-        if count != 1:
-            await asyncio.sleep(delay)
+    if deadline is None and quorum is None:
+        all_results, statuses = await _gather_all(
+            exchange_with_pairs, count, delay, cache, latency
+        )
+        return all_results, None, statuses
+    return await _gather_quorum(
+        exchange_with_pairs, count, delay, deadline, quorum, cache, latency, pair_legs
+    )
+
+
+def _observe_aggregate(
+    started: float, batches: Iterable[QuoteBatch], dropped: Dict[str, List[str]]
+) -> None:
+    """Sends ``on_aggregate``, with the exchanges that had results"""
+    observe_aggregate(
+        time.perf_counter() - started,
+        len(
+            {
+                batch.exchanges[index]
+                for batch in batches
+                for index in set(batch.exchange_index)
+            }
+        ),
+        sum(len(pairs) for pairs in dropped.values()),
+    )
+
+
+async def _aggregate(
+    exchanges: Set[ExchangeClient],
+    exchange_with_pairs: List[Tuple[ExchangeClient, str]],
+    count: int,
+    delay: float,
+    deadline: Optional[float] = None,
+    quorum: Optional[int] = None,
+    cache: Optional[PriceCache] = None,
+    latency: Optional[LatencyTracker] = None,
+    backend: str = "decimal",
+    outlier_filter: Union[str, OutlierFilter] = "stdev",
+    mode: str = "last",
+    pair_legs: Optional[Dict[str, str]] = None,
+) -> Dict[str, AggregateResultValue]:
+    """Runs the aggregate workflow over already created exchange clients
+
+    The exchange clients are left open, so they can be reused by the caller.
+
+    Args:
+        exchanges (Set[ExchangeClient]): The exchange clients
+        exchange_with_pairs (List[Tuple[ExchangeClient, str]]): The exchange
+            clients with the pair they should be called with
+        count (int): How many times to request from all providers
+        delay (int): How long to wait after finishing all provider requests
+                     before repeating
+        deadline (float): How many seconds to wait for providers before
+                          cancelling the stragglers
+        quorum (int): How many providers need to answer before cancelling the
+                      stragglers
+        cache (PriceCache): An optional cache to serve the prices from
+        latency (LatencyTracker): An optional tracker of each provider's
+                                  latency, skipping the laggards
+        backend (str): "decimal" for exact statistics, or "float" for float64
+                       ones, see ``numeric``
+        outlier_filter (Union[str, OutlierFilter]): Which results make the
+            filtered part, by name or an instance, see ``filters``
+        mode (str): Which price of the quotes is aggregated, "last", "mid"
+                    or "volume", see ``quotes``
+        pair_legs (Dict[str, str]): The stablecoin of each leg's pair, when
+                                    converting, see ``convert``
+
+    Returns:
+        Dict[str, AggregateResultValue]: The aggregate results, including the
+            ``"providers"`` status (see ``status``), which pairs per exchange
+            were ``"dropped"`` when given a deadline or quorum, and the rate
+            of each stablecoin under ``"conversions"`` when converting
+
+    Raises:
+        NoAggregateError: When none of the providers answered, carrying the
+                          rest of the results, see ``status``
+    """
+    _check_backend(backend)
+    _check_mode(mode)
+    outlier_filter = get_filter(outlier_filter)
+    started = time.perf_counter()
+    all_results, dropped, statuses = await _gather(
+        exchange_with_pairs, count, delay, deadline, quorum, cache, latency, pair_legs
+    )
+    conversions = None
+    if pair_legs:
+        all_results, conversions = convert_quotes(all_results, pair_legs)
 
+    # fill our batch with the results
+    batch = QuoteBatch(map(_provider_name, exchanges), mode)
+    batch.extend(all_results)
+
+    results: Dict[str, AggregateResultValue]
+    error: Optional[statistics.StatisticsError] = None
+    try:
+        results = _compute_aggregate(
+            batch, _weights(exchanges), backend, outlier_filter
+        )
+    except statistics.StatisticsError as err:
+        # raised below, along with why there's nothing to aggregate
+        error = err
+        results = {"error": describe(err)}
+    if dropped is not None:
+        results["dropped"] = dropped
+    results["providers"] = statuses
+    if conversions is not None:
+        results["conversions"] = conversions
+    if HOOKS:
+        _observe_aggregate(started, [batch], dropped or {})
+    if error is not None:
+        raise NoAggregateError(results) from error
     return results
 
 
+async def _aggregate_targets(
+    exchanges: Set[ExchangeClient],
+    exchange_with_pairs: List[Tuple[ExchangeClient, str]],
+    pair_targets: Dict[str, str],
+    count: int,
+    delay: float,
+    deadline: Optional[float] = None,
+    quorum: Optional[int] = None,
+    cache: Optional[PriceCache] = None,
+    latency: Optional[LatencyTracker] = None,
+    backend: str = "decimal",
+    outlier_filter: Union[str, OutlierFilter] = "stdev",
+    mode: str = "last",
+    pair_legs: Optional[Dict[str, str]] = None,
+) -> Dict[str, Dict[str, AggregateResultValue]]:
+    """Runs the aggregate workflow for many targets in one go
+
+    Every target's pairs are fetched together, each exchange's pairs in one
+    request when it can (see ``chains``), then the quotes are split by the
+    target of their pair and aggregated per target, like ``aggregate``.
+
+    Args:
+        pair_targets (Dict[str, str]): The target of each pair, see
+                                       ``target_provider_pairs``
+        quorum (int): How many providers need to answer before cancelling the
+                      stragglers, of every target
+
+    The rest of the args are the same as ``aggregate``'s.
+
+    Returns:
+        Dict[str, Dict[str, AggregateResultValue]]: The aggregate results per
+            target, each with its own ``"providers"`` status and
+            ``"dropped"`` pairs, and the ``"conversions"`` of the stablecoins
+            it's quoted in when converting. A target without an aggregate,
+            like when all of its providers failed, only has its ``"error"``
+            along with those
+    """
+    _check_backend(backend)
+    _check_mode(mode)
+    outlier_filter = get_filter(outlier_filter)
+    started = time.perf_counter()
+    all_results, dropped, statuses = await _gather(
+        exchange_with_pairs, count, delay, deadline, quorum, cache, latency, pair_legs
+    )
+    conversions = None
+    if pair_legs:
+        all_results, conversions = convert_quotes(all_results, pair_legs)
+
+    # a batch per target, listing the exchanges of that target
+    target_exchanges: Dict[str, List[str]] = {}
+    target_currencies: Dict[str, Set[Optional[str]]] = {}
+    for exchange, pair in exchange_with_pairs:
+        if pair in pair_targets:
+            target_exchanges.setdefault(pair_targets[pair], []).append(
+                _provider_name(exchange)
+            )
+            target_currencies.setdefault(pair_targets[pair], set()).add(
+                quote_currency(pair)
+            )
+    batches = {
+        target: QuoteBatch(names, mode) for target, names in target_exchanges.items()
+    }
+    for name, quote in all_results:
+        batches[pair_targets[quote.pair]].append(name, quote)
+
+    # and the dropped pairs and statuses of each target
+    target_dropped: Dict[str, Dict[str, List[str]]] = {target: {} for target in batches}
+    for name, pairs in (dropped or {}).items():
+        for pair in pairs:
+            if pair in pair_targets:
+                dropped_of = target_dropped[pair_targets[pair]]
+                dropped_of.setdefault(name, []).append(pair)
+    target_statuses: Dict[str, ProviderStatuses] = {target: {} for target in batches}
+    for name, pair_statuses in statuses.items():
+        for pair, status in pair_statuses.items():
+            if pair not in pair_targets:
+                continue
+            of_target = target_statuses[pair_targets[pair]]
+            of_target.setdefault(name, {})[pair] = status
+
+    weights = _weights(exchanges)
+    aggregates: Dict[str, Dict[str, AggregateResultValue]] = {}
+    for target, batch in batches.items():
+        results: Dict[str, AggregateResultValue]
+        try:
+            results = _compute_aggregate(batch, weights, backend, outlier_filter)
+        except statistics.StatisticsError as err:
+            # none of this target's providers answered, or nothing passed the
+            # filter, the other targets still get their aggregate
+            logger.debug("%s has no aggregate: %r", target, err)
+            results = {"error": describe(err)}
+        if dropped is not None:
+            results["dropped"] = target_dropped[target]
+        results["providers"] = target_statuses[target]
+        if conversions is not None:
+            # only the stablecoins this target is quoted in
+            results["conversions"] = {
+                stablecoin: rate
+                for stablecoin, rate in conversions.items()
+                if stablecoin in target_currencies[target]
+            }
+        aggregates[target] = results
+    if HOOKS:
+        _observe_aggregate(started, batches.values(), dropped or {})
+    return aggregates
+
+
+async def _stream(
+    exchanges: Set[ExchangeClient],
+    exchange_with_pairs: List[Tuple[ExchangeClient, str]],
+    count: int,
+    delay: float,
+    cache: Optional[PriceCache] = None,
+    latency: Optional[LatencyTracker] = None,
+    backend: str = "decimal",
+    outlier_filter: Union[str, OutlierFilter] = "stdev",
+    mode: str = "last",
+) -> AsyncIterator[Dict[str, AggregateResultValue]]:
+    """Runs the aggregate workflow, yielding the aggregate as results arrive
+
+    Each chain of tasks puts its prices on a shared queue, every time
+    one arrives the aggregate is recalculated and yielded, from the very first
+    price (its standard deviation is 0 until a second one arrives).
+
+    The exchange clients are left open, so they can be reused by the caller.
+
+    Args:
+        exchanges (Set[ExchangeClient]): The exchange clients
+        exchange_with_pairs (List[Tuple[ExchangeClient, str]]): The exchange
+            clients with the pair they should be called with
+        count (int): How many times to request from all providers
+        delay (int): How long to wait after finishing all provider requests
+                     before repeating
+        cache (PriceCache): An optional cache to serve the prices from
+        latency (LatencyTracker): An optional tracker of each provider's
+                                  latency, skipping the laggards
+        backend (str): "decimal" for exact statistics, or "float" for float64
+                       ones, see ``numeric``
+        outlier_filter (Union[str, OutlierFilter]): Which results make the
+            filtered part, by name or an instance, see ``filters``
+        mode (str): Which price of the quotes is aggregated, "last", "mid"
+                    or "volume", see ``quotes``
+
+    Yields:
+        Dict[str, AggregateResultValue]: A snapshot of the aggregate results
+    """
+    _check_backend(backend)
+    _check_mode(mode)
+    outlier_filter = get_filter(outlier_filter)
+    loop = asyncio.get_event_loop()
+    deadline = loop.time() + _compute_timeout(count, delay)
+    # None is put on the queue when a chain finishes, successful or not
+    queue: "asyncio.Queue[Optional[Tuple[str, Quote]]]" = asyncio.Queue()
+    tasks = [
+        asyncio.ensure_future(chain)
+        for chain, _ in _chains(
+            exchange_with_pairs, count, delay, queue, cache, latency
+        )
+    ]
+    for task in tasks:
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+    weights = _weights(exchanges)
+    batch = QuoteBatch(map(_provider_name, exchanges), mode)
+    remaining = len(tasks)
+    try:
+        while remaining:
+            price = await asyncio.wait_for(
+                queue.get(), timeout=max(deadline - loop.time(), 0)
+            )
+            if price is None:
+                remaining -= 1
+                continue
+            batch.append(*price)
+            try:
+                # the snapshot is of the batch so far, we keep appending to it
+                yield _compute_aggregate(
+                    batch, weights, backend, outlier_filter, len(batch)
+                )
+            except statistics.StatisticsError:
+                # nothing passed the filter yet
+                logger.debug("skipping snapshot of %s", batch.prices)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
 async def _aggregate_multiple(
-    count: int, delay: float, fast: bool, oracle: bool
+    count: int,
+    delay: float,
+    fast: bool,
+    oracle: bool,
+    deadline: Optional[float] = None,
+    quorum: Optional[int] = None,
+    cache: Optional[PriceCache] = None,
+    providers: Optional[ProviderPairs] = None,
+    latency: Optional[LatencyTracker] = None,
+    backend: str = "decimal",
+    outlier_filter: Union[str, OutlierFilter] = "stdev",
+    mode: str = "last",
+    convert: Union[bool, Dict[str, ProviderPairs]] = False,
 ) -> Dict[str, AggregateResultValue]:
     """Handles the aggregate workflow
 
@@ -110,128 +1146,72 @@ async def _aggregate_multiple(
             ...
         ]
 
+    The exchange clients are created and closed for this one call, see
+    ``Aggregator`` for keeping them around between calls.
+
     Args:
         count (int): How many times to request from all providers
         delay (int): How long to wait after finishing all provider requests
                      before repeating
         fast (bool): Use only fast clients, that may use optimized endpoints
                      that only fetches price.
+        providers (ProviderPairs): The providers to select from, instead of
+                                   the defaults
+        latency (LatencyTracker): An optional tracker of each provider's
+                                  latency, skipping the laggards
+        backend (str): "decimal" for exact statistics, or "float" for float64
+                       ones, see ``numeric``
+        outlier_filter (Union[str, OutlierFilter]): Which results make the
+            filtered part, by name or an instance, see ``filters``
+        mode (str): Which price of the quotes is aggregated, "last", "mid"
+                    or "volume", see ``quotes``
+        convert (Union[bool, Dict[str, ProviderPairs]]): Convert the quotes
+            in a stablecoin (like XRP/USDT) to the currency it stands in for,
+            going by its rate fetched in the same round (see ``convert``),
+            from the given providers of each stablecoin's leg, or the
+            defaults when True
 
     Returns:
         Dict[str, AggregateResultValue]: The aggregate results
     """
     exchanges: Set[ExchangeClient]
     exchange_with_pairs: List[Tuple[ExchangeClient, str]]
-    exchanges, exchange_with_pairs = (
-        generate_fast()
-        if fast and not oracle
-        else generate_oracle()
-        if oracle and not fast
-        else generate_default()
+    providers, pair_legs = _with_legs(providers, convert)
+    cache = _per_call(cache)
+    exchanges, exchange_with_pairs = _select_exchanges(
+        fast, oracle, providers=providers, latency=latency
     )
 
-    raw: Dict[str, AggregateResultValue]
-    filtered: Dict[str, AggregateResultValue]
-    tasks: List[Awaitable[List[Tuple[str, Decimal]]]] = [
-        # [
-        #     [ Exchange fetch() -> delay() -> fetch() -> delay()...],
-        #     [ Exchange fetch() -> ...],
-        #     ...
-        # ]
-        _tasks_fn(exchange, pair, count, delay)
-        for exchange, pair in exchange_with_pairs
-    ]
-    # set up our containers for results
-    raw_results: List[Decimal] = []
-    raw_results_named: Dict[str, List[Decimal]] = {
-        exchange.id: [] for exchange in exchanges
-    }
-
     try:
-        all_results: List[Tuple[str, Decimal]] = list(
-            filter(
-                lambda x: x is not None,
-                [
-                    # the gathered results are nested per client.
-                    # we flatten it in this comprehension
-                    # [
-                    #     [ ("exchange1", result), ("exchange1", result) ]
-                    #     [ ("exchange2", result) ]
-                    #     ...
-                    # ] ->
-                    # [
-                    #     ("exchange1", result),
-                    #     ("exchange1", result),
-                    #     ("exchange2", result),
-                    #     ...
-                    # ]
-                    # we'll get errors of any bad calls, we'll ignore them with this
-                    # predicate
-                    result
-                    if not isinstance(result, _FILTERED_CLIENT_EXCEPTIONS)
-                    else None
-                    # we unpack the results from the gathered tasks
-                    for results in await asyncio.gather(*tasks, return_exceptions=True)
-                    # we unpack each result from each results list
-                    for result in results
-                ],
-            )
-        )
-
-        # fill our containers with {, named} results
-        for exchange_name, raw_result in all_results:
-            raw_results.append(raw_result)
-            raw_results_named[exchange_name].append(raw_result)
-
-        # 1. Calculate raw part of aggregate results
-        # calculate standard deviation and median from all results
-        raw_stdev: Decimal = statistics.stdev(raw_results)
-        raw_median: Decimal = statistics.median(raw_results)
-
-        # compile the raw part of the aggregate results
-        raw = {
-            "raw_results_named": raw_results_named,
-            "raw_results": raw_results,
-            "raw_median": raw_median,
-            "raw_stdev": raw_stdev,
-        }
-        logging.debug("raw is %s", raw)
-
-        # 2. Calculate filtered part of the aggregate results
-        # pull acceptable results from all the raw_results
-        filtered_results: List[Decimal] = list(
-            filter(
-                # produce an accetable result from the raw results
-                # compare result subtracted from the median
-                # if it's lower than the standard deviation, it's acceptable
-                lambda result: abs(result - raw_median) < raw_stdev,
-                raw_results,
-            )
+        return await _aggregate(
+            exchanges,
+            exchange_with_pairs,
+            count,
+            delay,
+            deadline,
+            quorum,
+            cache,
+            latency,
+            backend,
+            outlier_filter,
+            mode,
+            pair_legs,
         )
-        # calculate median and mean from our filtered results
-        filtered_median: Decimal = statistics.median(filtered_results)
-        filtered_mean: Decimal = statistics.mean(filtered_results)
-
-        # compile the filtered part of the aggregate results
-        filtered = {
-            "filtered_results": filtered_results,
-            "filtered_median": filtered_median,
-            "filtered_mean": filtered_mean,
-        }
-        logging.debug("filtered is %s", filtered)
-
-        # compile all parts together, as the aggregate results
-        return {
-            **raw,
-            **filtered,
-        }
     finally:
         # we have no return, this is run "on the way out"
-        close_exchanges_tasks = [exchange.close() for exchange in exchanges]
-        # shield in case we are timed out, so the clients are closed
-        await asyncio.shield(
-            asyncio.gather(*close_exchanges_tasks, return_exceptions=True)
-        )
+        await _close_call(exchanges, cache)
+
+
+def _check_backend(backend: str) -> None:
+    """Fail before fetching anything when the backend is unknown"""
+    if backend not in BACKENDS:
+        raise ValueError(f"backend should be one of {BACKENDS}, not {backend!r}")
+
+
+def _check_mode(mode: str) -> None:
+    """Fail before fetching anything when the mode is unknown"""
+    if mode not in MODES:
+        raise ValueError(f"mode should be one of {MODES}, not {mode!r}")
 
 
 def _compute_timeout(count: int, delay: float) -> int:
@@ -244,13 +1224,38 @@ def _compute_timeout(count: int, delay: float) -> int:
     Empirically, when all default tasks are concurrently requested on my
     machine, it takes around 6 seconds. 15 seconds is double this time with a
     3 seconds of buffer (2 * 6) + 3.
+
+    ``benchmarks/end_to_end.py`` measures it offline, against stand-ins of
+    the exchanges with a given latency, jitter and error rate.
     """
     max_tasks_fn_timeout = 15  # 15 seconds
     return int((count * max_tasks_fn_timeout) + (delay * count))
 
 
+def _wait_timeout(count: int, delay: float, deadline: Optional[float]) -> Optional[int]:
+    """How long to wait for a whole aggregation, see ``compute_timeout``
+
+    A deadline replaces our dumb max timeout, the stragglers are cancelled
+    once it passes rather than the whole aggregation.
+    """
+    return _compute_timeout(count, delay) if deadline is None else None
+
+
 async def as_awaitable_dict(
-    count: int = 1, delay: float = 1, fast: bool = False, oracle: bool = False
+    count: int = 1,
+    delay: float = 1,
+    fast: bool = False,
+    oracle: bool = False,
+    deadline: Optional[float] = None,
+    quorum: Optional[int] = None,
+    cache: Optional[PriceCache] = None,
+    coalesce: bool = False,
+    providers: Optional[ProviderPairs] = None,
+    latency: Optional[LatencyTracker] = None,
+    backend: str = "decimal",
+    outlier_filter: Union[str, OutlierFilter] = "stdev",
+    mode: str = "last",
+    convert: Union[bool, Dict[str, ProviderPairs]] = False,
 ) -> Dict[str, AggregateResultValue]:
     """Returns the raw aggregate without formatting or serialization
 
@@ -261,18 +1266,125 @@ async def as_awaitable_dict(
                      before repeating
         fast (bool): Use only fast clients, that may use optimized endpoints
                      that only fetches price.
+        deadline (float): How many seconds to wait for providers before
+                          cancelling the stragglers
+        quorum (int): How many providers (exchange and pair) need to answer
+                      before cancelling the stragglers
+        cache (PriceCache): An optional cache to serve the prices from, see
+                            ``PriceCache``
+        coalesce (bool): Share one aggregation between concurrent callers
+                         asking with the same arguments, they all get the
+                         same results so treat them as read-only.
+        providers (ProviderPairs): The providers to select from, instead of
+                                   the defaults, see ``load_config``
+        latency (LatencyTracker): An optional tracker of each provider's
+                                  latency, see ``LatencyTracker``
+        backend (str): "decimal" for exact statistics, or "float" for faster
+                       float64 ones, see ``numeric``
+        outlier_filter (Union[str, OutlierFilter]): Which results make the
+            filtered part, by name or an instance, see ``filters``
+        mode (str): Which price of the quotes is aggregated, "last", "mid"
+                    or "volume", see ``quotes``
+        convert (Union[bool, Dict[str, ProviderPairs]]): Convert the quotes
+            in a stablecoin (like XRP/USDT) to the currency it stands in for,
+            going by its rate fetched in the same round (see ``convert``),
+            from the given providers of each stablecoin's leg, or the
+            defaults when True
 
     Returns:
-        Dict[str, AggregateResultValue]: The aggregate results
+        Dict[str, AggregateResultValue]: The aggregate results, including
+            the ``"providers"`` status of each exchange and pair, and which
+            pairs per exchange were ``"dropped"`` when given a deadline or
+            quorum
+
+    Raises:
+        NoAggregateError: When none of the providers answered, its
+                          ``results`` have the ``"providers"`` status and
+                          the ``"dropped"`` pairs
     """
-    return await asyncio.wait_for(
-        _aggregate_multiple(count, delay, fast, oracle),
-        timeout=_compute_timeout(count, delay),
+    if not coalesce:
+        return await asyncio.wait_for(
+            _aggregate_multiple(
+                count,
+                delay,
+                fast,
+                oracle,
+                deadline,
+                quorum,
+                cache,
+                providers,
+                latency,
+                backend,
+                outlier_filter,
+                mode,
+                convert,
+            ),
+            timeout=_wait_timeout(count, delay, deadline),
+        )
+
+    key = (
+        asyncio.get_event_loop(),
+        count,
+        delay,
+        fast,
+        oracle,
+        deadline,
+        quorum,
+        cache,
+        # lists when they're from JSON, like [["kraken", "XRPUSD"]]
+        None if providers is None else tuple(map(tuple, providers)),
+        latency,
+        backend,
+        outlier_filter,
+        mode,
+        convert
+        if isinstance(convert, bool)
+        else tuple(
+            (stablecoin, tuple(map(tuple, legs)))
+            for stablecoin, legs in convert.items()
+        ),
     )
+    in_flight = _IN_FLIGHT.get(key)
+    if in_flight is None:
+        in_flight = asyncio.ensure_future(
+            as_awaitable_dict(
+                count,
+                delay,
+                fast,
+                oracle,
+                deadline,
+                quorum,
+                cache,
+                False,
+                providers,
+                latency,
+                backend,
+                outlier_filter,
+                mode,
+                convert,
+            )
+        )
+        _IN_FLIGHT[key] = in_flight
+        in_flight.add_done_callback(lambda _: _IN_FLIGHT.pop(key, None))
+    # shielded, one caller being cancelled doesn't cancel it for the others
+    return await asyncio.shield(in_flight)
 
 
 async def as_awaitable_json(
-    count: int = 1, delay: float = 1, fast: bool = False, oracle: bool = False
+    count: int = 1,
+    delay: float = 1,
+    fast: bool = False,
+    oracle: bool = False,
+    deadline: Optional[float] = None,
+    quorum: Optional[int] = None,
+    cache: Optional[PriceCache] = None,
+    coalesce: bool = False,
+    providers: Optional[ProviderPairs] = None,
+    latency: Optional[LatencyTracker] = None,
+    backend: str = "decimal",
+    outlier_filter: Union[str, OutlierFilter] = "stdev",
+    mode: str = "last",
+    convert: Union[bool, Dict[str, ProviderPairs]] = False,
 ) -> str:
     """Returns the aggregate as serialized JSON
 
@@ -282,18 +1394,67 @@ async def as_awaitable_json(
                      before repeating
         fast (bool): Use only fast clients, that may use optimized endpoints
                      that only fetches price.
+        deadline (float): How many seconds to wait for providers before
+                          cancelling the stragglers
+        quorum (int): How many providers (exchange and pair) need to answer
+                      before cancelling the stragglers
+        cache (PriceCache): An optional cache to serve the prices from, see
+                            ``PriceCache``
+        coalesce (bool): Share one aggregation between concurrent callers
+                         asking with the same arguments
+        providers (ProviderPairs): The providers to select from, instead of
+                                   the defaults, see ``load_config``
+        latency (LatencyTracker): An optional tracker of each provider's
+                                  latency, see ``LatencyTracker``
+        backend (str): "decimal" for exact statistics, or "float" for faster
+                       float64 ones, see ``numeric``
+        outlier_filter (Union[str, OutlierFilter]): Which results make the
+            filtered part, by name or an instance, see ``filters``
+        mode (str): Which price of the quotes is aggregated, "last", "mid"
+                    or "volume", see ``quotes``
+        convert (Union[bool, Dict[str, ProviderPairs]]): Convert the quotes
+            in a stablecoin (like XRP/USDT) to the currency it stands in for,
+            going by its rate fetched in the same round (see ``convert``),
+            from the given providers of each stablecoin's leg, or the
+            defaults when True
 
     Returns:
-        str: The aggregate results
+        str: The aggregate results, see ``serialize``
     """
-    return json.dumps(
-        await as_awaitable_dict(count, delay, fast, oracle),
-        default=default_for_decimal,
+    return dumps(
+        await as_awaitable_dict(
+            count,
+            delay,
+            fast,
+            oracle,
+            deadline,
+            quorum,
+            cache,
+            coalesce,
+            providers,
+            latency,
+            backend,
+            outlier_filter,
+            mode,
+            convert,
+        )
     )
 
 
 def as_json(
-    count: int = 1, delay: float = 1, fast: bool = False, oracle: bool = False
+    count: int = 1,
+    delay: float = 1,
+    fast: bool = False,
+    oracle: bool = False,
+    deadline: Optional[float] = None,
+    quorum: Optional[int] = None,
+    cache: Optional[PriceCache] = None,
+    providers: Optional[ProviderPairs] = None,
+    latency: Optional[LatencyTracker] = None,
+    backend: str = "decimal",
+    outlier_filter: Union[str, OutlierFilter] = "stdev",
+    mode: str = "last",
+    convert: Union[bool, Dict[str, ProviderPairs]] = False,
 ) -> str:
     """Returns the aggregate as serialized JSON
 
@@ -304,15 +1465,64 @@ def as_json(
                      before repeating
         fast (bool): Use only fast clients, that may use optimized endpoints
                      that only fetches price.
+        deadline (float): How many seconds to wait for providers before
+                          cancelling the stragglers
+        quorum (int): How many providers (exchange and pair) need to answer
+                      before cancelling the stragglers
+        cache (PriceCache): An optional cache to serve the prices from, see
+                            ``PriceCache``
+        providers (ProviderPairs): The providers to select from, instead of
+                                   the defaults, see ``load_config``
+        latency (LatencyTracker): An optional tracker of each provider's
+                                  latency, see ``LatencyTracker``
+        backend (str): "decimal" for exact statistics, or "float" for faster
+                       float64 ones, see ``numeric``
+        outlier_filter (Union[str, OutlierFilter]): Which results make the
+            filtered part, by name or an instance, see ``filters``
+        mode (str): Which price of the quotes is aggregated, "last", "mid"
+                    or "volume", see ``quotes``
+        convert (Union[bool, Dict[str, ProviderPairs]]): Convert the quotes
+            in a stablecoin (like XRP/USDT) to the currency it stands in for,
+            going by its rate fetched in the same round (see ``convert``),
+            from the given providers of each stablecoin's leg, or the
+            defaults when True
 
     Returns:
         str: The aggregate results
     """
-    return asyncio.run(as_awaitable_json(count, delay, fast, oracle))
+    return asyncio.run(
+        as_awaitable_json(
+            count,
+            delay,
+            fast,
+            oracle,
+            deadline,
+            quorum,
+            cache,
+            providers=providers,
+            latency=latency,
+            backend=backend,
+            outlier_filter=outlier_filter,
+            mode=mode,
+            convert=convert,
+        )
+    )
 
 
 def as_dict(
-    count: int = 1, delay: float = 1, fast: bool = False, oracle: bool = False
+    count: int = 1,
+    delay: float = 1,
+    fast: bool = False,
+    oracle: bool = False,
+    deadline: Optional[float] = None,
+    quorum: Optional[int] = None,
+    cache: Optional[PriceCache] = None,
+    providers: Optional[ProviderPairs] = None,
+    latency: Optional[LatencyTracker] = None,
+    backend: str = "decimal",
+    outlier_filter: Union[str, OutlierFilter] = "stdev",
+    mode: str = "last",
+    convert: Union[bool, Dict[str, ProviderPairs]] = False,
 ) -> Dict[str, AggregateResultValue]:
     """Returns the raw aggregate without formatting or serialization
 
@@ -323,8 +1533,234 @@ def as_dict(
                      before repeating
         fast (bool): Use only fast clients, that may use optimized endpoints
                      that only fetches price.
+        deadline (float): How many seconds to wait for providers before
+                          cancelling the stragglers
+        quorum (int): How many providers (exchange and pair) need to answer
+                      before cancelling the stragglers
+        cache (PriceCache): An optional cache to serve the prices from, see
+                            ``PriceCache``
+        providers (ProviderPairs): The providers to select from, instead of
+                                   the defaults, see ``load_config``
+        latency (LatencyTracker): An optional tracker of each provider's
+                                  latency, see ``LatencyTracker``
+        backend (str): "decimal" for exact statistics, or "float" for faster
+                       float64 ones, see ``numeric``
+        outlier_filter (Union[str, OutlierFilter]): Which results make the
+            filtered part, by name or an instance, see ``filters``
+        mode (str): Which price of the quotes is aggregated, "last", "mid"
+                    or "volume", see ``quotes``
+        convert (Union[bool, Dict[str, ProviderPairs]]): Convert the quotes
+            in a stablecoin (like XRP/USDT) to the currency it stands in for,
+            going by its rate fetched in the same round (see ``convert``),
+            from the given providers of each stablecoin's leg, or the
+            defaults when True
 
     Returns:
         Dict[str, AggregateResultValue]: The aggregate results
     """
-    return asyncio.run(as_awaitable_dict(count, delay, fast, oracle))
+    return asyncio.run(
+        as_awaitable_dict(
+            count,
+            delay,
+            fast,
+            oracle,
+            deadline,
+            quorum,
+            cache,
+            providers=providers,
+            latency=latency,
+            backend=backend,
+            outlier_filter=outlier_filter,
+            mode=mode,
+            convert=convert,
+        )
+    )
+
+
+async def as_awaitable_targets(
+    targets: Sequence[str] = ("XRP/USD", "XRP/EUR", "XRP/BTC"),
+    count: int = 1,
+    delay: float = 1,
+    fast: bool = False,
+    oracle: bool = False,
+    deadline: Optional[float] = None,
+    quorum: Optional[int] = None,
+    cache: Optional[PriceCache] = None,
+    providers: Optional[Dict[str, ProviderPairs]] = None,
+    latency: Optional[LatencyTracker] = None,
+    backend: str = "decimal",
+    outlier_filter: Union[str, OutlierFilter] = "stdev",
+    mode: str = "last",
+    convert: Union[bool, Dict[str, ProviderPairs]] = False,
+) -> Dict[str, Dict[str, AggregateResultValue]]:
+    """Returns the raw aggregate of each target, fetched in one go
+
+    The clients are created once for every target, and each exchange's
+    pairs are fetched in one request when it can, instead of a whole
+    aggregation per target.
+
+        >>> results = await as_awaitable_targets(["XRP/USD", "XRP/EUR"])
+        >>> results["XRP/EUR"]["filtered_median"]
+
+    Args:
+        targets (Sequence[str]): The base/quote targets, see
+                                 ``DEFAULT_TARGET_PROVIDER_PAIRS``
+        count (int): How many times to request from all providers
+        delay (int): How long to wait after finishing all provider requests
+                     before repeating
+        fast (bool): Use only fast clients, that may use optimized endpoints
+                     that only fetches price.
+        deadline (float): How many seconds to wait for providers before
+                          cancelling the stragglers
+        quorum (int): How many providers (exchange and pair) of all the
+                      targets need to answer before cancelling the
+                      stragglers
+        cache (PriceCache): An optional cache to serve the prices from, see
+                            ``PriceCache``
+        providers (Dict[str, ProviderPairs]): The providers of each target,
+            instead of the defaults, see ``target_provider_pairs``
+        latency (LatencyTracker): An optional tracker of each provider's
+                                  latency, see ``LatencyTracker``
+        backend (str): "decimal" for exact statistics, or "float" for faster
+                       float64 ones, see ``numeric``
+        outlier_filter (Union[str, OutlierFilter]): Which results make the
+            filtered part, by name or an instance, see ``filters``
+        mode (str): Which price of the quotes is aggregated, "last", "mid"
+                    or "volume", see ``quotes``
+        convert (Union[bool, Dict[str, ProviderPairs]]): Convert the quotes
+            in a stablecoin (like XRP/USDT) to the currency it stands in for,
+            going by its rate fetched in the same round (see ``convert``),
+            from the given providers of each stablecoin's leg, or the
+            defaults when True
+
+    Returns:
+        Dict[str, Dict[str, AggregateResultValue]]: The aggregate results
+            per target, like ``as_awaitable_dict``'s
+    """
+    provider_pairs, pair_targets = target_provider_pairs(targets, providers)
+    provider_pairs, pair_legs = _with_legs(provider_pairs, convert)
+    cache = _per_call(cache)
+    exchanges, exchange_with_pairs = _select_exchanges(
+        fast, oracle, providers=provider_pairs, latency=latency
+    )
+    try:
+        return await asyncio.wait_for(
+            _aggregate_targets(
+                exchanges,
+                exchange_with_pairs,
+                pair_targets,
+                count,
+                delay,
+                deadline,
+                quorum,
+                cache,
+                latency,
+                backend,
+                outlier_filter,
+                mode,
+                pair_legs,
+            ),
+            timeout=_wait_timeout(count, delay, deadline),
+        )
+    finally:
+        await _close_call(exchanges, cache)
+
+
+def as_targets(
+    targets: Sequence[str] = ("XRP/USD", "XRP/EUR", "XRP/BTC"),
+    count: int = 1,
+    delay: float = 1,
+    fast: bool = False,
+    oracle: bool = False,
+    deadline: Optional[float] = None,
+    quorum: Optional[int] = None,
+    cache: Optional[PriceCache] = None,
+    providers: Optional[Dict[str, ProviderPairs]] = None,
+    latency: Optional[LatencyTracker] = None,
+    backend: str = "decimal",
+    outlier_filter: Union[str, OutlierFilter] = "stdev",
+    mode: str = "last",
+    convert: Union[bool, Dict[str, ProviderPairs]] = False,
+) -> Dict[str, Dict[str, AggregateResultValue]]:
+    """Returns the raw aggregate of each target, see ``as_awaitable_targets``"""
+    return asyncio.run(
+        as_awaitable_targets(
+            targets,
+            count,
+            delay,
+            fast,
+            oracle,
+            deadline,
+            quorum,
+            cache,
+            providers,
+            latency,
+            backend,
+            outlier_filter,
+            mode,
+            convert,
+        )
+    )
+
+
+async def stream_aggregate(
+    count: int = 1,
+    delay: float = 1,
+    fast: bool = False,
+    oracle: bool = False,
+    cache: Optional[PriceCache] = None,
+    providers: Optional[ProviderPairs] = None,
+    latency: Optional[LatencyTracker] = None,
+    backend: str = "decimal",
+    outlier_filter: Union[str, OutlierFilter] = "stdev",
+    mode: str = "last",
+) -> AsyncIterator[Dict[str, AggregateResultValue]]:
+    """Yields the raw aggregate each time a provider returns a price
+
+    The first snapshot is yielded as soon as the first price has arrived,
+    the last snapshot includes every price from the workflow.
+
+        async for snapshot in stream_aggregate(count=2, fast=True):
+            print(snapshot["filtered_mean"])
+
+    Args:
+        count (int): How many times to request from all providers
+        delay (int): How long to wait after finishing all provider requests
+                     before repeating
+        fast (bool): Use only fast clients, that may use optimized endpoints
+                     that only fetches price.
+        cache (PriceCache): An optional cache to serve the prices from, see
+                            ``PriceCache``
+        providers (ProviderPairs): The providers to select from, instead of
+                                   the defaults, see ``load_config``
+        latency (LatencyTracker): An optional tracker of each provider's
+                                  latency, see ``LatencyTracker``
+        backend (str): "decimal" for exact statistics, or "float" for faster
+                       float64 ones, see ``numeric``
+        outlier_filter (Union[str, OutlierFilter]): Which results make the
+            filtered part, by name or an instance, see ``filters``
+        mode (str): Which price of the quotes is aggregated, "last", "mid"
+                    or "volume", see ``quotes``
+
+    Yields:
+        Dict[str, AggregateResultValue]: A snapshot of the aggregate results
+    """
+    cache = _per_call(cache)
+    exchanges, exchange_with_pairs = _select_exchanges(
+        fast, oracle, providers=providers, latency=latency
+    )
+    try:
+        async for snapshot in _stream(
+            exchanges,
+            exchange_with_pairs,
+            count,
+            delay,
+            cache,
+            latency,
+            backend,
+            outlier_filter,
+            mode,
+        ):
+            yield snapshot
+    finally:
+        await _close_call(exchanges, cache)
@@ -0,0 +1,341 @@
+"""
+aggregator.py
+
+A long-lived aggregator, keeping exchange clients and their connections warm
+between aggregate calls.
+"""
+from __future__ import annotations
+
+import asyncio
+
+from types import TracebackType
+from typing import (
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
+
+import httpx
+
+from .aggregate_filter import (
+    AggregateResultValue,
+    _aggregate,
+    _aggregate_targets,
+    _close_exchanges,
+    _select_exchanges,
+    _stream,
+    _wait_timeout,
+    _with_legs,
+)
+from .cache import PriceCache
+from .filters import OutlierFilter
+from .latency import LatencyTracker
+from .providers import (
+    ExchangeClient,
+    ProviderPairs,
+    generate_streaming,
+    target_provider_pairs,
+)
+from .providers.gen_default import STREAMING_PROVIDER_PAIRS
+
+
+class Aggregator:
+    """
+    Owns the exchange clients along with a shared, pooled ``httpx.AsyncClient``
+    for our ccxt-like clients, so repeated calls to ``aggregate()`` reuse
+    keep-alive connections instead of setting them up every time.
+
+    Use it as an async context manager:
+
+        async with Aggregator(fast=True) as aggregator:
+            while True:
+                results = await aggregator.aggregate(count=1)
+                ...
+
+    Or call ``open()`` and ``close()`` yourself.
+
+    Given ``targets``, the clients are created for the pairs of all of them
+    and ``aggregate_targets()`` aggregates each target in one go:
+
+        async with Aggregator(targets=["XRP/USD", "XRP/EUR"]) as aggregator:
+            results = await aggregator.aggregate_targets()
+            results["XRP/EUR"]["filtered_median"]
+    """
+
+    def __init__(
+        self,
+        fast: bool = False,
+        oracle: bool = False,
+        streaming: bool = False,
+        cache: Optional[PriceCache] = None,
+        max_connections: Optional[int] = 100,
+        max_keepalive_connections: Optional[int] = 20,
+        keepalive_expiry: Optional[float] = 5.0,
+        providers: Union[ProviderPairs, Dict[str, ProviderPairs], None] = None,
+        latency: Optional[LatencyTracker] = None,
+        backend: str = "decimal",
+        outlier_filter: Union[str, OutlierFilter] = "stdev",
+        mode: str = "last",
+        targets: Optional[Sequence[str]] = None,
+        convert: Union[bool, Dict[str, ProviderPairs]] = False,
+    ) -> None:
+        """
+        Args:
+            fast (bool): Use only fast clients, that may use optimized
+                         endpoints that only fetches price.
+            oracle (bool): Skip the XRPL oracle client.
+            streaming (bool): Use the push-based clients instead, keeping a
+                              websocket open per exchange and reading the
+                              latest prices from memory.
+            cache (PriceCache): An optional cache to serve the prices from,
+                                see ``PriceCache``
+            max_connections (int): Pool size of the shared client
+            max_keepalive_connections (int): How many idle connections the
+                                             shared client keeps alive
+            keepalive_expiry (float): How many seconds an idle connection is
+                                      kept alive for
+            providers (Union[ProviderPairs, Dict[str, ProviderPairs]]): The
+                providers to select from, instead of the defaults (see
+                ``load_config``), per target when given ``targets``
+            latency (LatencyTracker): An optional tracker of each provider's
+                                      latency, skipping the laggards, see
+                                      ``LatencyTracker``
+            backend (str): "decimal" for exact statistics, or "float" for
+                           faster float64 ones, see ``numeric``
+            outlier_filter (Union[str, OutlierFilter]): Which results make the
+                filtered part, by name or an instance, see ``filters``
+            mode (str): Which price of the quotes is aggregated, "last",
+                        "mid" or "volume", see ``quotes``
+            targets (Sequence[str]): The base/quote targets to aggregate with
+                                     ``aggregate_targets()``, like
+                                     ["XRP/USD", "XRP/EUR"]
+            convert (Union[bool, Dict[str, ProviderPairs]]): Convert the
+                quotes in a stablecoin (like XRP/USDT) to the currency it
+                stands in for, going by its rate fetched in the same round
+                (see ``convert``), from the given providers of each
+                stablecoin's leg, or the defaults when True. Not for
+                ``stream()``.
+        """
+        self.fast = fast
+        self.oracle = oracle
+        self.streaming = streaming
+        self.cache = cache
+        self.providers = providers
+        self.latency = latency
+        self.backend = backend
+        self.outlier_filter = outlier_filter
+        self.mode = mode
+        self.targets = targets
+        # the target of each pair, see ``target_provider_pairs``
+        self.pair_targets: Dict[str, str] = {}
+        self.convert = convert
+        # the stablecoin of each leg's pair, see ``convert``
+        self.pair_legs: Optional[Dict[str, str]] = None
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.client: Optional[httpx.AsyncClient] = None
+        self.exchanges: Set[ExchangeClient] = set()
+        self.exchange_with_pairs: List[Tuple[ExchangeClient, str]] = []
+
+    @property
+    def is_open(self) -> bool:
+        """Whether our clients are created and not yet closed"""
+        return self.client is not None
+
+    async def open(self) -> None:
+        """Creates the shared client and the exchange clients"""
+        if self.is_open:
+            return
+        providers: Optional[ProviderPairs]
+        if self.targets is None:
+            providers = self.providers  # type: ignore
+        else:
+            # every target's pairs, selected from like any others
+            providers, self.pair_targets = target_provider_pairs(
+                self.targets, self.providers  # type: ignore
+            )
+        if self.streaming and providers is None:
+            providers = STREAMING_PROVIDER_PAIRS
+        providers, self.pair_legs = _with_legs(providers, self.convert)
+        self.client = httpx.AsyncClient(limits=self.limits)
+        self.exchanges, self.exchange_with_pairs = (
+            generate_streaming(self.client, providers)
+            if self.streaming
+            else _select_exchanges(
+                self.fast, self.oracle, self.client, providers, self.latency
+            )
+        )
+
+    async def close(self) -> None:
+        """Closes the exchange clients and the shared client"""
+        if self.client is None:
+            return
+        try:
+            if self.cache is not None:
+                # let the stale prices refresh before their clients are closed
+                await self.cache.drain()
+            await _close_exchanges(self.exchanges)
+        finally:
+            await self.client.aclose()
+            self.client = None
+            self.exchanges, self.exchange_with_pairs = set(), []
+
+    async def __aenter__(self) -> Aggregator:
+        await self.open()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        await self.close()
+
+    async def aggregate(
+        self,
+        count: int = 1,
+        delay: float = 1,
+        deadline: Optional[float] = None,
+        quorum: Optional[int] = None,
+        outlier_filter: Union[str, OutlierFilter, None] = None,
+    ) -> Dict[str, AggregateResultValue]:
+        """Returns the raw aggregate without formatting or serialization
+
+        Args:
+            count (int): How many times to request from all providers
+            delay (int): How long to wait after finishing all provider requests
+                         before repeating
+            deadline (float): How many seconds to wait for providers before
+                              cancelling the stragglers
+            quorum (int): How many providers (exchange and pair) need to
+                          answer before cancelling the stragglers
+            outlier_filter (Union[str, OutlierFilter]): Which results make the
+                filtered part for this call, the aggregator's when None
+
+        Returns:
+            Dict[str, AggregateResultValue]: The aggregate results, including
+                which pairs per exchange were ``"dropped"`` when given a
+                deadline or quorum
+        """
+        self._check_targets(False)
+        await self.open()
+        return await asyncio.wait_for(
+            _aggregate(
+                self.exchanges,
+                self.exchange_with_pairs,
+                count,
+                delay,
+                deadline,
+                quorum,
+                self.cache,
+                self.latency,
+                self.backend,
+                self.outlier_filter if outlier_filter is None else outlier_filter,
+                self.mode,
+                self.pair_legs,
+            ),
+            timeout=_wait_timeout(count, delay, deadline),
+        )
+
+    async def stream(
+        self,
+        count: int = 1,
+        delay: float = 1,
+        outlier_filter: Union[str, OutlierFilter, None] = None,
+    ) -> AsyncIterator[Dict[str, AggregateResultValue]]:
+        """Yields the raw aggregate each time a provider returns a price
+
+        See ``stream_aggregate`` for more details.
+
+        Args:
+            count (int): How many times to request from all providers
+            delay (int): How long to wait after finishing all provider requests
+                         before repeating
+            outlier_filter (Union[str, OutlierFilter]): Which results make the
+                filtered part for this call, the aggregator's when None
+
+        Yields:
+            Dict[str, AggregateResultValue]: A snapshot of the aggregate results
+        """
+        self._check_targets(False)
+        if self.convert is not False:
+            raise ValueError("converting needs whole rounds, use aggregate()")
+        await self.open()
+        async for snapshot in _stream(
+            self.exchanges,
+            self.exchange_with_pairs,
+            count,
+            delay,
+            self.cache,
+            self.latency,
+            self.backend,
+            self.outlier_filter if outlier_filter is None else outlier_filter,
+            self.mode,
+        ):
+            yield snapshot
+
+    async def aggregate_targets(
+        self,
+        count: int = 1,
+        delay: float = 1,
+        deadline: Optional[float] = None,
+        quorum: Optional[int] = None,
+        outlier_filter: Union[str, OutlierFilter, None] = None,
+    ) -> Dict[str, Dict[str, AggregateResultValue]]:
+        """Returns the raw aggregate of each of our targets, fetched in one go
+
+        See ``as_awaitable_targets`` for more details.
+
+        Args:
+            count (int): How many times to request from all providers
+            delay (int): How long to wait after finishing all provider requests
+                         before repeating
+            deadline (float): How many seconds to wait for providers before
+                              cancelling the stragglers
+            quorum (int): How many providers (exchange and pair) of all the
+                          targets need to answer before cancelling the
+                          stragglers
+            outlier_filter (Union[str, OutlierFilter]): Which results make the
+                filtered part for this call, the aggregator's when None
+
+        Returns:
+            Dict[str, Dict[str, AggregateResultValue]]: The aggregate results
+                per target
+        """
+        self._check_targets(True)
+        await self.open()
+        return await asyncio.wait_for(
+            _aggregate_targets(
+                self.exchanges,
+                self.exchange_with_pairs,
+                self.pair_targets,
+                count,
+                delay,
+                deadline,
+                quorum,
+                self.cache,
+                self.latency,
+                self.backend,
+                self.outlier_filter if outlier_filter is None else outlier_filter,
+                self.mode,
+                self.pair_legs,
+            ),
+            timeout=_wait_timeout(count, delay, deadline),
+        )
+
+    def _check_targets(self, targets: bool) -> None:
+        """Aggregating every pair as one would mix the targets"""
+        if targets and self.targets is None:
+            raise ValueError("aggregate_targets() needs the aggregator's targets")
+        if not targets and self.targets is not None:
+            raise ValueError("aggregate with targets using aggregate_targets()")
@@ -0,0 +1,258 @@
+"""
+cache.py
+
+An in-memory price cache, keyed by provider name and pair, caching the whole
+quote of each price. The age of each price served is reported in the provider
+statuses of the results, see ``status``.
+
+A call creating its own clients and closing them before it returns uses a
+``per_call`` view of the cache, so it never leaves a fetch behind on a closed
+client, nor waits on one before returning.
+"""
+import asyncio
+import copy
+import logging
+import time
+
+from decimal import Decimal
+from functools import partial
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from .quotes import Quote
+
+
+CacheKey = Tuple[str, str]
+FetchMany = Callable[[List[CacheKey]], Awaitable[Dict[CacheKey, Quote]]]
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class CachedPrice(NamedTuple):
+    """A quote along with how many seconds old it is"""
+
+    quote: Quote
+    age: float
+
+    @property
+    def price(self) -> Decimal:
+        """The quote's last price"""
+        return self.quote.price
+
+
+class PriceCache:
+    """
+    Caches prices for ``ttl`` seconds. Once a price is stale it's still
+    served, while it's refreshed in the background (stale-while-revalidate),
+    up until it's ``max_stale`` seconds past the ``ttl`` when it's refreshed
+    before returning.
+
+    Concurrent requests for the same key share one in-flight fetch, except
+    between ``per_call`` views.
+
+    The key is the provider's name and the pair, e.g. ``("kraken", "XRPUSD")``.
+    """
+
+    def __init__(self, ttl: float = 1.0, max_stale: Optional[float] = None) -> None:
+        """
+        Args:
+            ttl (float): How many seconds a price is fresh for
+            max_stale (float): How many seconds past the ttl a stale price is
+                               still served for, always when None
+        """
+        self.ttl = ttl
+        self.max_stale = max_stale
+        # the quote and when it was fetched, on the monotonic clock
+        self._entries: Dict[CacheKey, Tuple[Quote, float]] = {}
+        self._in_flight: Dict[CacheKey, "asyncio.Future[Quote]"] = {}
+        # the requests behind the in-flight fetches, a batch may be behind many
+        self._fetches: Set["asyncio.Future[Any]"] = set()
+        self._background = True
+
+    def per_call(self) -> "PriceCache":
+        """A view of the cache for one call, whose clients are closed once it
+        returns
+
+        It shares the cached prices, but not the in-flight fetches, which are
+        made with the call's clients. A stale price is refreshed before it's
+        served rather than in the background, since nothing would be left to
+        refresh it with, and ``cancel`` cancels whatever the call left in
+        flight, like the fetches of the stragglers past a deadline.
+        """
+        view = copy.copy(self)
+        view._in_flight = {}
+        view._fetches = set()
+        view._background = False
+        return view
+
+    def age(self, key: CacheKey) -> Optional[float]:
+        """How many seconds old the cached price is, None when not cached"""
+        entry = self._entries.get(key)
+        return None if entry is None else time.monotonic() - entry[1]
+
+    async def get(
+        self, key: CacheKey, fetch: Callable[[], Awaitable[Quote]]
+    ) -> CachedPrice:
+        """Returns the cached price, fetching it when needed
+
+        Args:
+            key (CacheKey): The provider name and pair
+            fetch (Callable[[], Awaitable[Quote]]): Fetches a fresh quote
+
+        Returns:
+            CachedPrice: The quote and its age
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            price, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age <= self.ttl:
+                return CachedPrice(price, age)
+            if self._background and self._servable(age):
+                self._refresh(key, fetch)
+                return CachedPrice(price, age)
+        # shielded, others may be waiting on the same fetch
+        price = await asyncio.shield(self._refresh(key, fetch))
+        return CachedPrice(price, self.age(key) or 0.0)
+
+    async def get_many(
+        self, keys: List[CacheKey], fetch_many: FetchMany
+    ) -> Dict[CacheKey, CachedPrice]:
+        """Returns the cached prices, fetching those needed in one call
+
+        Args:
+            keys (List[CacheKey]): The provider names and pairs
+            fetch_many (FetchMany): Fetches fresh quotes for the given keys
+
+        Returns:
+            Dict[CacheKey, CachedPrice]: The quote and its age per key, the
+                                         keys ``fetch_many`` left out are
+                                         left out too
+        """
+        cached: Dict[CacheKey, CachedPrice] = {}
+        to_fetch: List[CacheKey] = []
+        waiting: List[CacheKey] = []
+        now = time.monotonic()
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is not None:
+                price, fetched_at = entry
+                age = now - fetched_at
+                if age <= self.ttl or (self._background and self._servable(age)):
+                    cached[key] = CachedPrice(price, age)
+                    if age > self.ttl and key not in self._in_flight:
+                        to_fetch.append(key)
+                    continue
+            waiting.append(key)
+            if key not in self._in_flight:
+                to_fetch.append(key)
+        if to_fetch:
+            self._refresh_many(to_fetch, fetch_many)
+        if waiting:
+            # shielded, others may be waiting on the same fetch
+            fetched = await asyncio.shield(
+                asyncio.gather(
+                    *(self._in_flight[key] for key in waiting), return_exceptions=True
+                )
+            )
+            for key, price in zip(waiting, fetched):
+                if isinstance(price, KeyError):
+                    # the exchange didn't return it, the rest still did
+                    continue
+                if isinstance(price, BaseException):
+                    raise price
+                cached[key] = CachedPrice(self._entries[key][0], self.age(key) or 0.0)
+        return cached
+
+    async def drain(self) -> None:
+        """Waits for the in-flight fetches, e.g. before closing the clients"""
+        await asyncio.gather(*self._in_flight.values(), return_exceptions=True)
+
+    async def cancel(self) -> None:
+        """Cancels the in-flight fetches, e.g. before closing the clients
+        without waiting on them
+        """
+        in_flight = [*self._fetches, *self._in_flight.values()]
+        for future in in_flight:
+            future.cancel()
+        await asyncio.gather(*in_flight, return_exceptions=True)
+
+    def clear(self) -> None:
+        """Forget every cached price"""
+        self._entries.clear()
+
+    def _servable(self, age: float) -> bool:
+        """Whether a stale price can be served while it's refreshed"""
+        return self.max_stale is None or age <= self.ttl + self.max_stale
+
+    def _refresh(
+        self, key: CacheKey, fetch: Callable[[], Awaitable[Quote]]
+    ) -> "asyncio.Future[Quote]":
+        """Returns the in-flight fetch for the key, starting one if needed"""
+        in_flight = self._in_flight.get(key)
+        if in_flight is None:
+            in_flight = self._track(asyncio.ensure_future(self._fetch(key, fetch)))
+            self._in_flight[key] = in_flight
+            in_flight.add_done_callback(partial(self._done, key))
+        return in_flight
+
+    def _refresh_many(self, keys: List[CacheKey], fetch_many: FetchMany) -> None:
+        """Starts one fetch for all the keys, with an in-flight fetch per key"""
+        batch = self._track(asyncio.ensure_future(self._fetch_many(keys, fetch_many)))
+        for key in keys:
+            in_flight = asyncio.ensure_future(self._pick(batch, key))
+            self._in_flight[key] = in_flight
+            in_flight.add_done_callback(partial(self._done, key))
+
+    def _track(self, fetch: "asyncio.Future[Any]") -> "asyncio.Future[Any]":
+        """Keeps the request until it's done, so it can be cancelled"""
+        self._fetches.add(fetch)
+        fetch.add_done_callback(self._untrack)
+        return fetch
+
+    def _untrack(self, done: "asyncio.Future[Any]") -> None:
+        self._fetches.discard(done)
+        # retrieved here, the keys waiting on it log what went wrong
+        if not done.cancelled():
+            done.exception()
+
+    async def _fetch(
+        self, key: CacheKey, fetch: Callable[[], Awaitable[Quote]]
+    ) -> Quote:
+        price = await fetch()
+        self._entries[key] = (price, time.monotonic())
+        return price
+
+    async def _fetch_many(
+        self, keys: List[CacheKey], fetch_many: FetchMany
+    ) -> Dict[CacheKey, Quote]:
+        prices = await fetch_many(keys)
+        fetched_at = time.monotonic()
+        for key, price in prices.items():
+            self._entries[key] = (price, fetched_at)
+        return prices
+
+    @staticmethod
+    async def _pick(
+        batch: "asyncio.Future[Dict[CacheKey, Quote]]", key: CacheKey
+    ) -> Quote:
+        # shielded, the other keys are waiting on the same batch
+        prices = await asyncio.shield(batch)
+        return prices[key]
+
+    def _done(self, key: CacheKey, done: "asyncio.Future[Quote]") -> None:
+        if self._in_flight.get(key) is done:
+            del self._in_flight[key]
+        # a background refresh has nobody awaiting it, log what went wrong
+        if not done.cancelled() and done.exception() is not None:
+            logger.debug("refreshing %s failed: %r", key, done.exception())
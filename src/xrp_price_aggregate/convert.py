@@ -0,0 +1,146 @@
+"""
+convert.py
+
+Converts the quotes of pairs quoted in a stablecoin to the currency it stands
+in for, like XRP/USDT to XRP/USD, so a depegged stablecoin doesn't skew the
+aggregate.
+
+The rate of each stablecoin (its "leg", like USDT/USD) is fetched in the same
+round as the quotes, along with them, from ``DEFAULT_LEG_PROVIDER_PAIRS``.
+Only the legs of the stablecoins the pairs are quoted in are fetched, the
+exchanges that fetch many pairs at once (see ``aggregate_filter._chains``)
+fetch them in the same request.
+
+Each leg's rate is the median of its quotes, worked out once per aggregation
+and used for every quote in that stablecoin, before the outlier filter. A
+stablecoin without any leg quotes (every one of its providers failed) is
+left as it is, like before.
+"""
+import logging
+import statistics
+
+from decimal import Decimal
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from .providers import ProviderPairs
+from .providers.gen_default import DEFAULT_LEG_PROVIDER_PAIRS
+from .quotes import Quote
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# what each stablecoin stands in for
+STABLECOINS = {"USDT": "USD", "USDC": "USD"}
+
+# the quote currencies of unslashed pairs like XRPUSDT, the longer first so
+# USDT isn't taken for USD
+_QUOTE_CURRENCIES = ("USDT", "USDC", "BUSD", "USD", "EUR", "BTC", "XBT")
+
+
+@lru_cache(maxsize=None)
+def quote_currency(pair: str) -> Optional[str]:
+    """The currency a pair is quoted in
+
+    Args:
+        pair (str): Like XRP/USDT, XRPUSDT or the XRPL oracle's USD
+
+    Returns:
+        str: Like USDT, None when it isn't one we know of
+    """
+    if "/" in pair:
+        # ccxt's, like XRP/USDT or XRP/USDT:USDT
+        return pair.split("/")[1].split(":")[0].upper()
+    for currency in _QUOTE_CURRENCIES:
+        if pair.upper().endswith(currency):
+            return currency
+    return None
+
+
+def leg_provider_pairs(
+    provider_pairs: ProviderPairs, legs: Optional[Dict[str, ProviderPairs]] = None
+) -> Tuple[ProviderPairs, Dict[str, str]]:
+    """The legs of the stablecoins the pairs are quoted in
+
+    Args:
+        provider_pairs (ProviderPairs): The providers and pairs to convert
+        legs (Dict[str, ProviderPairs]): The providers of each stablecoin's
+            leg, instead of ``DEFAULT_LEG_PROVIDER_PAIRS``
+
+    Returns:
+        ProviderPairs: The provider names and pairs of the legs, to fetch
+                       along with ``provider_pairs``
+        Dict[str, str]: The stablecoin of each leg's pair
+    """
+    known = DEFAULT_LEG_PROVIDER_PAIRS if legs is None else legs
+    stablecoins = {
+        currency
+        for currency in map(quote_currency, (pair for _, pair in provider_pairs))
+        if currency in STABLECOINS
+    }
+    leg_pairs: ProviderPairs = []
+    pair_legs: Dict[str, str] = {}
+    for stablecoin in sorted(stablecoins):
+        if stablecoin not in known:
+            logger.warning("%s has no known legs, it's left unconverted", stablecoin)
+            continue
+        for name, pair in known[stablecoin]:
+            leg_pairs.append((name, pair))
+            pair_legs[pair] = stablecoin
+    return leg_pairs, pair_legs
+
+
+def convert_quotes(
+    all_results: List[Tuple[str, Quote]], pair_legs: Dict[str, str]
+) -> Tuple[List[Tuple[str, Quote]], Dict[str, Decimal]]:
+    """Takes the legs out of the results, converting the quotes in their
+    stablecoins
+
+    Args:
+        all_results (List[Tuple[str, Quote]]): The fetched quotes, legs and
+                                               all
+        pair_legs (Dict[str, str]): The stablecoin of each leg's pair, see
+                                    ``leg_provider_pairs``
+
+    Returns:
+        List[Tuple[str, Quote]]: The quotes without the legs, those in a
+                                 stablecoin converted
+        Dict[str, Decimal]: The rate each stablecoin was converted at
+    """
+    leg_prices: Dict[str, List[Decimal]] = {}
+    quotes: List[Tuple[str, Quote]] = []
+    for exchange_id, quote in all_results:
+        stablecoin = pair_legs.get(quote.pair) if quote.pair is not None else None
+        if stablecoin is None:
+            quotes.append((exchange_id, quote))
+        else:
+            leg_prices.setdefault(stablecoin, []).append(quote.price)
+    # once per round, rather than per quote
+    rates = {
+        stablecoin: statistics.median(prices)
+        for stablecoin, prices in leg_prices.items()
+    }
+    for stablecoin in set(pair_legs.values()) - set(rates):
+        logger.warning("no %s legs were fetched, it's left unconverted", stablecoin)
+    if not rates:
+        return quotes, rates
+    return [
+        (exchange_id, _converted(quote, rates)) for exchange_id, quote in quotes
+    ], rates
+
+
+def _converted(quote: Quote, rates: Dict[str, Decimal]) -> Quote:
+    """The quote in the currency its stablecoin stands in for"""
+    rate = None if quote.pair is None else rates.get(quote_currency(quote.pair) or "")
+    if rate is None:
+        return quote
+    return Quote(
+        quote.price * rate,
+        None if quote.bid is None else quote.bid * rate,
+        None if quote.ask is None else quote.ask * rate,
+        # in the base currency, that's unchanged
+        quote.volume,
+        quote.timestamp,
+        quote.pair,
+    )
@@ -0,0 +1,204 @@
+"""
+daemon.py
+
+Keeps aggregating in the background with warm clients, serving the latest
+aggregate from memory over a local HTTP port or Unix socket.
+
+    python -m xrp_price_aggregate serve --interval 5 --port 8080
+    python -m xrp_price_aggregate serve --unix-socket /run/xrp-price.sock
+
+    curl -s localhost:8080
+    curl -s --unix-socket /run/xrp-price.sock http://localhost/
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from typing import Dict, List, Optional
+
+from .aggregate_filter import AggregateResultValue
+from .aggregator import Aggregator
+from .providers import ProviderPairs, load_config
+from .serialize import encode
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class PriceDaemon:
+    """
+    Publishes a new aggregate every ``interval`` seconds, serialized once, so
+    each read is only writing the bytes we already have.
+    """
+
+    def __init__(
+        self,
+        interval: float = 5.0,
+        count: int = 1,
+        delay: float = 1,
+        fast: bool = True,
+        oracle: bool = False,
+        streaming: bool = False,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        unix_socket: Optional[str] = None,
+        providers: Optional[ProviderPairs] = None,
+    ) -> None:
+        """
+        Args:
+            interval (float): How many seconds between publishing aggregates
+            count (int): How many times to request from all providers
+            delay (int): How long to wait after finishing all provider requests
+                         before repeating
+            fast (bool): Use only fast clients, that may use optimized
+                         endpoints that only fetches price.
+            oracle (bool): Skip the XRPL oracle client.
+            streaming (bool): Use the push-based clients instead.
+            host (str): The host to listen on
+            port (int): The port to listen on
+            unix_socket (str): A path to listen on instead of host and port
+            providers (ProviderPairs): The providers to select from, instead
+                                       of the defaults, see ``load_config``
+        """
+        self.interval = interval
+        self.count = count
+        self.delay = delay
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.aggregator = Aggregator(
+            fast=fast, oracle=oracle, streaming=streaming, providers=providers
+        )
+        self.latest: Optional[Dict[str, AggregateResultValue]] = None
+        self.latest_body: Optional[bytes] = None
+        self.published_at: Optional[float] = None
+
+    def publish(self, results: Dict[str, AggregateResultValue]) -> None:
+        """Keep the results, serialized for serving"""
+        self.latest = results
+        self.latest_body = encode(results)
+        self.published_at = time.time()
+
+    async def run(self) -> None:
+        """Serve and keep publishing until cancelled"""
+        async with self.aggregator:
+            if self.unix_socket is not None:
+                server = await asyncio.start_unix_server(self._handle, self.unix_socket)
+            else:
+                server = await asyncio.start_server(self._handle, self.host, self.port)
+            logger.info("serving on %s", self.unix_socket or f"{self.host}:{self.port}")
+            try:
+                await self._publish_forever()
+            finally:
+                server.close()
+                await server.wait_closed()
+
+    async def _publish_forever(self) -> None:
+        loop = asyncio.get_event_loop()
+        while True:
+            started = loop.time()
+            try:
+                self.publish(await self.aggregator.aggregate(self.count, self.delay))
+            except Exception:  # pylint: disable=broad-except
+                # keep serving the last aggregate, we'll try again next time
+                logger.warning("aggregating failed", exc_info=True)
+            await asyncio.sleep(max(self.interval - (loop.time() - started), 0))
+
+    def _response(self) -> bytes:
+        if self.latest_body is None or self.published_at is None:
+            return (
+                b"HTTP/1.1 503 Service Unavailable\r\n"
+                b"Content-Length: 0\r\n"
+                b"Retry-After: 1\r\n"
+                b"\r\n"
+            )
+        age = int(time.time() - self.published_at)
+        return (
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: application/json\r\n"
+            b"Content-Length: %d\r\n"
+            b"Age: %d\r\n"
+            b"\r\n" % (len(self.latest_body), age)
+        ) + self.latest_body
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answers every request with the latest aggregate
+
+        Connections are kept alive, until the client closes them or asks us
+        to with ``Connection: close``.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                keep_alive = not request_line.rstrip().endswith(b"HTTP/1.0")
+                # we don't look at anything else the client tells us
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    if header.lower().startswith(b"connection:"):
+                        keep_alive = b"close" not in header.lower()
+                writer.write(self._response())
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the daemon from the command line"""
+    parser = argparse.ArgumentParser(
+        prog="python -m xrp_price_aggregate serve",
+        description="Serve the latest XRP price aggregate from memory",
+    )
+    parser.add_argument("--interval", type=float, default=5.0)
+    parser.add_argument("--count", type=int, default=1)
+    parser.add_argument("--delay", type=float, default=1)
+    parser.add_argument(
+        "--exhaustive",
+        "-E",
+        "-L",
+        "--long",
+        "--ccxt",
+        dest="fast",
+        action="store_false",
+        help="use every client, not only the fast ones",
+    )
+    parser.add_argument("--oracle", action="store_true")
+    parser.add_argument("--streaming", action="store_true")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix-socket")
+    parser.add_argument(
+        "--config", help="a TOML or JSON file of the providers and pairs to use"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    daemon = PriceDaemon(
+        interval=args.interval,
+        count=args.count,
+        delay=args.delay,
+        fast=args.fast,
+        oracle=args.oracle,
+        streaming=args.streaming,
+        host=args.host,
+        port=args.port,
+        unix_socket=args.unix_socket,
+        providers=(
+            None if args.config is None else load_config(args.config).register()
+        ),
+    )
+    try:
+        asyncio.run(daemon.run())
+    except KeyboardInterrupt:
+        pass
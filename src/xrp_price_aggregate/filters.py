@@ -0,0 +1,398 @@
+"""
+filters.py
+
+The outlier filters deciding which of the raw results make the filtered part
+of the aggregate.
+
+A filter only decides the ``Bounds`` the filtered results are within, from a
+few order statistics of the ``Prices``. The ``Prices`` are in whichever
+numbers the backend computes in (see ``numeric``), and apply the bounds to
+every result at once, vectorized with NumPy for the float backend.
+
+    - "stdev": within a standard deviation of the median, the default
+    - "mad": within a few median absolute deviations of the median
+    - "iqr": within Tukey's fences, a multiple of the interquartile range
+      past the quartiles
+    - "trimmed": without the lowest and highest share of the results
+    - "weighted": within a few weighted median absolute deviations of the
+      weighted median, each result counting as much as its quote's volume
+      (with ``mode="volume"``), otherwise each exchange counting as much as
+      its ``weight`` however many results it had
+
+A filter is picked by name or given as an instance, e.g.
+``MADFilter(threshold=2.5)``.
+"""
+import statistics
+
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+
+# the results are Decimals, or floats with the float backend
+Number = Any
+# scales a median absolute deviation to the standard deviation of normally
+# distributed results
+MAD_SCALE = 1.4826
+
+
+class Bounds(NamedTuple):
+    """The range the filtered results are within"""
+
+    low: Number
+    high: Number
+    # whether the bounds themselves pass the filter
+    inclusive: bool
+
+    def keeps(self, result: Number) -> bool:
+        """Whether the result passes the filter"""
+        if self.inclusive:
+            return self.low <= result <= self.high
+        return self.low < result < self.high
+
+
+class Prices(ABC):
+    """
+    The raw results being filtered, with the order statistics the filters
+    need, in the numbers of the backend.
+
+    ``raw_median`` is the median of all the results, and ``raw_stdev`` their
+    sample standard deviation, 0 for just one result.
+    """
+
+    raw_median: Number
+    raw_stdev: Number
+
+    def __init__(
+        self,
+        raw_results: List[Decimal],
+        exchange_index: Sequence[int],
+        weights: Optional[Sequence[Decimal]],
+        volumes: Optional[Sequence[Optional[Decimal]]] = None,
+    ) -> None:
+        """
+        Args:
+            raw_results (List[Decimal]): All of the results
+            exchange_index (Sequence[int]): The index of each result's
+                                            exchange, see ``QuoteBatch``
+            weights (Sequence[Decimal]): The weight per exchange index, every
+                                         exchange counts the same when None
+            volumes (Sequence[Optional[Decimal]]): The volume of each
+                result's quote, when weighting by volume, see ``weighted``
+        """
+        self.raw_results = raw_results
+        self.exchange_index = exchange_index
+        self.weights = weights
+        # only when at least one of the quotes has a volume
+        self.volumes = volumes if volumes is not None and any(volumes) else None
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """How many results there are"""
+
+    @abstractmethod
+    def at(self, index: int) -> Number:
+        """The result at the index, in order"""
+
+    @abstractmethod
+    def number(self, value: float) -> Number:
+        """The value in the numbers of the backend"""
+
+    @abstractmethod
+    def decimal(self, value: Number) -> Decimal:
+        """The value as a Decimal, for the aggregate results"""
+
+    @abstractmethod
+    def median_deviation(self, center: Number) -> Number:
+        """The median of how far each result is from the center"""
+
+    @abstractmethod
+    def weighted_median(self, center: Optional[Number] = None) -> Number:
+        """The weighted median of the results, or of how far each is from the
+        center when given, see ``weighted``
+        """
+
+    @abstractmethod
+    def filter(self, bounds: Bounds) -> Tuple[bytearray, Decimal, Decimal]:
+        """Applies the bounds to the results
+
+        Returns:
+            bytearray: Whether each result, in the order of the raw results,
+                       passed the filter
+            Decimal: The median of the filtered results
+            Decimal: The mean of the filtered results
+
+        Raises:
+            statistics.StatisticsError: When no results pass the filter
+        """
+
+    def quantile(self, fraction: float) -> Number:
+        """The quantile of the results, interpolating between the closest
+        ones like ``numpy.quantile`` does
+        """
+        position = fraction * (len(self) - 1)
+        index = int(position)
+        low = self.at(index)
+        if index == position:
+            return low
+        return low + (self.at(index + 1) - low) * self.number(position - index)
+
+    def weighted(self) -> Iterator[Tuple[Decimal, Decimal]]:
+        """Each result with its weight, split between its exchange's results
+
+        The weight is the volume of the result's quote, or for a quote
+        without one the median volume (times the exchange's weight), so it
+        counts like a typical quote. Without any volumes it's the exchange's
+        weight, or the same for every exchange without weights.
+        """
+        counts: Dict[int, int] = {}
+        for index in self.exchange_index:
+            counts[index] = counts.get(index, 0) + 1
+        typical = (
+            Decimal(1)
+            if self.volumes is None
+            else statistics.median(sorted(volume for volume in self.volumes if volume))
+        )
+        volumes = self.volumes or [None] * len(self.raw_results)
+        for result, index, volume in zip(
+            self.raw_results, self.exchange_index, volumes
+        ):
+            if volume:
+                weight = volume
+            else:
+                weight = typical * (
+                    Decimal(1) if self.weights is None else self.weights[index]
+                )
+            yield result, weight / counts[index]
+
+
+def _weighted_median(pairs: List[Tuple[Number, Number]]) -> Number:
+    """The weighted median of the values, given (value, weight) pairs"""
+    pairs.sort()
+    half = sum(weight for _, weight in pairs) / 2
+    running = 0
+    for value, weight in pairs:
+        running += weight
+        if running >= half:
+            return value
+    return pairs[-1][0]
+
+
+class DecimalPrices(Prices):
+    """The results as Decimals, for exact statistics"""
+
+    def __init__(
+        self,
+        raw_results: List[Decimal],
+        exchange_index: Sequence[int],
+        weights: Optional[Sequence[Decimal]],
+        volumes: Optional[Sequence[Optional[Decimal]]] = None,
+    ) -> None:
+        """
+        Raises:
+            statistics.StatisticsError: Without any results
+        """
+        super().__init__(raw_results, exchange_index, weights, volumes)
+        self.ordered = sorted(raw_results)
+        self.raw_median = statistics.median(self.ordered)
+        # one result doesn't spread at all
+        self.raw_stdev = (
+            statistics.stdev(raw_results) if len(raw_results) > 1 else Decimal(0)
+        )
+
+    def __len__(self) -> int:
+        return len(self.ordered)
+
+    def at(self, index: int) -> Decimal:
+        return self.ordered[index]
+
+    def number(self, value: float) -> Decimal:
+        return Decimal(str(value))
+
+    def decimal(self, value: Decimal) -> Decimal:
+        return value
+
+    def median_deviation(self, center: Decimal) -> Decimal:
+        return statistics.median([abs(result - center) for result in self.ordered])
+
+    def weighted_median(self, center: Optional[Decimal] = None) -> Decimal:
+        return _weighted_median(
+            [
+                (result if center is None else abs(result - center), weight)
+                for result, weight in self.weighted()
+            ]
+        )
+
+    def filter(self, bounds: Bounds) -> Tuple[bytearray, Decimal, Decimal]:
+        keep = bytearray(bounds.keeps(result) for result in self.raw_results)
+        filtered = [result for result, kept in zip(self.raw_results, keep) if kept]
+        return keep, statistics.median(filtered), statistics.mean(filtered)
+
+
+class OutlierFilter(ABC):
+    """Decides the bounds of the filtered results"""
+
+    name = "unknown"
+
+    @abstractmethod
+    def bounds(self, prices: Prices) -> Bounds:
+        """The range the filtered results are within"""
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({vars(self)})"
+
+
+class StdevFilter(OutlierFilter):
+    """
+    Keeps the results less than a standard deviation from the median.
+
+    When every result is the same (no deviation at all) they're all kept.
+    """
+
+    name = "stdev"
+
+    def bounds(self, prices: Prices) -> Bounds:
+        raw_median, raw_stdev = prices.raw_median, prices.raw_stdev
+        return Bounds(raw_median - raw_stdev, raw_median + raw_stdev, not raw_stdev)
+
+
+class MADFilter(OutlierFilter):
+    """
+    Keeps the results within ``threshold`` median absolute deviations of the
+    median, the deviation scaled to be comparable to a standard deviation.
+
+    Unlike the standard deviation, a few far off results barely move the
+    median absolute deviation.
+    """
+
+    name = "mad"
+
+    def __init__(self, threshold: float = 3.0) -> None:
+        """
+        Args:
+            threshold (float): How many (scaled) median absolute deviations
+                               from the median a result is kept within
+        """
+        self.threshold = threshold
+
+    def bounds(self, prices: Prices) -> Bounds:
+        raw_median = prices.raw_median
+        spread = prices.median_deviation(raw_median) * prices.number(
+            MAD_SCALE * self.threshold
+        )
+        return Bounds(raw_median - spread, raw_median + spread, True)
+
+
+class IQRFilter(OutlierFilter):
+    """
+    Keeps the results within Tukey's fences, ``fence`` interquartile ranges
+    below the first quartile or above the third.
+    """
+
+    name = "iqr"
+
+    def __init__(self, fence: float = 1.5) -> None:
+        """
+        Args:
+            fence (float): How many interquartile ranges past the quartiles
+                           a result is kept within
+        """
+        self.fence = fence
+
+    def bounds(self, prices: Prices) -> Bounds:
+        first, third = prices.quantile(0.25), prices.quantile(0.75)
+        spread = (third - first) * prices.number(self.fence)
+        return Bounds(first - spread, third + spread, True)
+
+
+class TrimmedFilter(OutlierFilter):
+    """
+    Keeps the results between the lowest and highest ``proportion`` of them,
+    so the filtered mean is a trimmed mean.
+
+    Results equal to the lowest or highest one kept are kept too, the
+    middle result is always kept.
+    """
+
+    name = "trimmed"
+
+    def __init__(self, proportion: float = 0.1) -> None:
+        """
+        Args:
+            proportion (float): The share of the results trimmed from each end
+        """
+        self.proportion = proportion
+
+    def bounds(self, prices: Prices) -> Bounds:
+        trimmed = min(int(len(prices) * self.proportion), (len(prices) - 1) // 2)
+        return Bounds(prices.at(trimmed), prices.at(len(prices) - 1 - trimmed), True)
+
+
+class WeightedFilter(OutlierFilter):
+    """
+    Keeps the results within ``threshold`` weighted median absolute
+    deviations of the weighted median.
+
+    With ``mode="volume"`` each result counts as much as its quote's
+    volume, a quote without one counting like the median volume. Otherwise
+    each exchange counts as much as its ``weight``. Either way it's split
+    between the exchange's results, so an exchange answering more often
+    doesn't count more. Without volumes or weights every exchange counts the
+    same.
+    """
+
+    name = "weighted"
+
+    def __init__(self, threshold: float = 3.0) -> None:
+        """
+        Args:
+            threshold (float): How many (scaled) weighted median absolute
+                               deviations from the weighted median a result
+                               is kept within
+        """
+        self.threshold = threshold
+
+    def bounds(self, prices: Prices) -> Bounds:
+        center = prices.weighted_median()
+        spread = prices.weighted_median(center) * prices.number(
+            MAD_SCALE * self.threshold
+        )
+        return Bounds(center - spread, center + spread, True)
+
+
+FILTERS: Dict[str, Type[OutlierFilter]] = {
+    outlier_filter.name: outlier_filter
+    for outlier_filter in (
+        StdevFilter,
+        MADFilter,
+        IQRFilter,
+        TrimmedFilter,
+        WeightedFilter,
+    )
+}
+
+
+def get_filter(outlier_filter: Union[str, OutlierFilter]) -> OutlierFilter:
+    """The filter by name, or the one given
+
+    Raises:
+        ValueError: When there's no filter by that name
+    """
+    if isinstance(outlier_filter, OutlierFilter):
+        return outlier_filter
+    if outlier_filter not in FILTERS:
+        raise ValueError(
+            f"outlier_filter should be one of {tuple(FILTERS)}, not {outlier_filter!r}"
+        )
+    return FILTERS[outlier_filter]()
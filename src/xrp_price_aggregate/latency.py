@@ -0,0 +1,272 @@
+"""
+latency.py
+
+Tracks how long each provider takes to answer, keyed by provider name and
+pair, so fast and slow providers can be told apart from live measurements,
+and hedges the requests that take longer than usual.
+"""
+import asyncio
+import time
+
+from collections import deque
+from typing import (
+    AbstractSet,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+
+LatencyKey = Tuple[str, str]
+T = TypeVar("T")
+
+
+class LatencyStats(NamedTuple):
+    """The latency of a provider over its recent requests, in seconds"""
+
+    count: int
+    p50: float
+    p95: float
+    max: float
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted samples"""
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+class HedgePolicy:
+    """
+    Sends a duplicate of a request that hasn't been answered within its
+    provider's p95 latency, taking whichever answers first and cancelling the
+    other.
+
+    Hedges are paid for from a budget, each request adds ``budget`` tokens
+    (up to ``burst``) and each hedge takes one, so there are never more than
+    ``budget`` hedges per request over time, e.g. 0.1 is at most 10% more
+    requests.
+    """
+
+    def __init__(
+        self,
+        budget: float = 0.1,
+        burst: float = 5.0,
+        providers: Optional[AbstractSet[str]] = None,
+        min_delay: float = 0.01,
+    ) -> None:
+        """
+        Args:
+            budget (float): How many hedges can be sent per request
+            burst (float): How many hedges can be sent in a row
+            providers (AbstractSet[str]): The names of the providers to hedge,
+                                          every provider when None
+            min_delay (float): The least seconds to wait before hedging
+        """
+        self.budget = budget
+        self.burst = burst
+        self.providers = providers
+        self.min_delay = min_delay
+        self.requests = 0
+        self.hedges = 0
+        self._tokens = burst
+
+    def applies(self, name: str) -> bool:
+        """Whether the provider's requests are hedged"""
+        return self.providers is None or name in self.providers
+
+    async def run(self, delay: float, fetch: Callable[[], Awaitable[T]]) -> T:
+        """Fetches, hedging with a second fetch when ``delay`` seconds pass
+
+        Args:
+            delay (float): How many seconds to wait for the first fetch
+            fetch (Callable[[], Awaitable[T]]): Sends the request
+
+        Returns:
+            T: The first successful answer, or the last failure
+        """
+        self.requests += 1
+        self._tokens = min(self._tokens + self.budget, self.burst)
+        attempts: Set["asyncio.Future[T]"] = {asyncio.ensure_future(fetch())}
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=max(delay, self.min_delay))
+            if done or self._tokens < 1:
+                return await next(iter(attempts))
+            self._tokens -= 1
+            self.hedges += 1
+            attempts.add(asyncio.ensure_future(fetch()))
+            pending = set(attempts)
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for attempt in done:
+                    if attempt.exception() is None:
+                        return attempt.result()
+                if not pending:
+                    # both failed, raise the last failure
+                    return done.pop().result()
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+
+class LatencyTracker:
+    """
+    Keeps the most recent ``window`` request latencies per provider and pair,
+    forgetting those older than ``max_age`` seconds.
+
+    A provider is fast while the p95 of every one of its pairs is at most
+    ``fast_p95`` seconds, and a laggard while a pair's p95 is over
+    ``slow_p95`` seconds, a laggard's chain is skipped until its samples
+    age out, when it's tried again. Providers with fewer than
+    ``min_samples`` recent samples aren't judged either way.
+
+    Given a ``hedge`` policy, requests taking longer than their p95 are
+    hedged, see ``HedgePolicy``.
+
+    The key is the provider's name and the pair, e.g. ``("ccxt:kraken",
+    "XRP/USD")``.
+    """
+
+    def __init__(
+        self,
+        window: int = 64,
+        max_age: float = 600.0,
+        fast_p95: float = 1.0,
+        slow_p95: float = 5.0,
+        min_samples: int = 3,
+        hedge: Optional[HedgePolicy] = None,
+    ) -> None:
+        """
+        Args:
+            window (int): How many of the latest samples are kept per key
+            max_age (float): How many seconds a sample is kept for
+            fast_p95 (float): The p95 in seconds a fast provider is within
+            slow_p95 (float): The p95 in seconds a laggard is over
+            min_samples (int): How many samples are needed to judge a key
+            hedge (HedgePolicy): An optional policy for hedging slow requests
+        """
+        self.window = window
+        self.max_age = max_age
+        self.fast_p95 = fast_p95
+        self.slow_p95 = slow_p95
+        self.min_samples = min_samples
+        self.hedge = hedge
+        # each sample is the latency and when it was recorded, on the
+        # monotonic clock
+        self._samples: Dict[LatencyKey, Deque[Tuple[float, float]]] = {}
+
+    def record(self, key: LatencyKey, seconds: float) -> None:
+        """Records how many seconds a request took"""
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append((seconds, time.monotonic()))
+
+    async def fetch(
+        self, keys: List[LatencyKey], fetch: Callable[[], Awaitable[T]]
+    ) -> T:
+        """Fetches, recording how long it took for each key
+
+        When hedging, a request is hedged once the slowest p95 of the keys
+        has passed, requests for keys without enough samples aren't hedged.
+
+        Args:
+            keys (List[LatencyKey]): The provider's name and the pairs the
+                                     request is for
+            fetch (Callable[[], Awaitable[T]]): Sends the request
+
+        Returns:
+            T: The answer
+        """
+        started = time.perf_counter()
+        try:
+            delay = self._hedge_delay(keys)
+            if delay is None:
+                return await fetch()
+            return await self.hedge.run(delay, fetch)  # type: ignore
+        finally:
+            # failures count too, a request timing out was slow
+            elapsed = time.perf_counter() - started
+            for key in keys:
+                self.record(key, elapsed)
+
+    def _hedge_delay(self, keys: List[LatencyKey]) -> Optional[float]:
+        """How long to wait before hedging, None when not hedging"""
+        if self.hedge is None or not all(self.hedge.applies(name) for name, _ in keys):
+            return None
+        p95s = []
+        for key in keys:
+            stats = self.stats(key)
+            if stats is None or stats.count < self.min_samples:
+                return None
+            p95s.append(stats.p95)
+        return max(p95s)
+
+    def stats(self, key: LatencyKey) -> Optional[LatencyStats]:
+        """The latency of the key's recent samples, None without any"""
+        samples = self._samples.get(key)
+        if not samples:
+            return None
+        oldest = time.monotonic() - self.max_age
+        while samples and samples[0][1] < oldest:
+            samples.popleft()
+        if not samples:
+            return None
+        ordered = sorted(seconds for seconds, _ in samples)
+        return LatencyStats(
+            count=len(ordered),
+            p50=_percentile(ordered, 0.5),
+            p95=_percentile(ordered, 0.95),
+            max=ordered[-1],
+        )
+
+    def all_stats(self) -> Dict[LatencyKey, LatencyStats]:
+        """The latency of every key with recent samples"""
+        all_stats = {}
+        for key in list(self._samples):
+            stats = self.stats(key)
+            if stats is not None:
+                all_stats[key] = stats
+        return all_stats
+
+    def is_laggard(self, key: LatencyKey) -> bool:
+        """Whether the key is chronically slow"""
+        stats = self.stats(key)
+        return (
+            stats is not None
+            and stats.count >= self.min_samples
+            and stats.p95 > self.slow_p95
+        )
+
+    def is_fast(self, name: str) -> Optional[bool]:
+        """Whether the provider is fast, None when it hasn't been measured
+
+        Args:
+            name (str): The provider's name
+
+        Returns:
+            Optional[bool]: Whether every measured pair of the provider is
+                            fast, None with too few samples to tell
+        """
+        measured = [
+            stats
+            for stats in (
+                self.stats(key) for key in list(self._samples) if key[0] == name
+            )
+            if stats is not None and stats.count >= self.min_samples
+        ]
+        if not measured:
+            return None
+        return all(stats.p95 <= self.fast_p95 for stats in measured)
+
+    def clear(self) -> None:
+        """Forget every sample"""
+        self._samples.clear()
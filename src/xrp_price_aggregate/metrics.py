@@ -0,0 +1,289 @@
+"""
+metrics.py
+
+Hooks into the aggregation, for seeing which provider is slow or failing:
+
+    - each provider request, with how long it took and the exception it
+      failed with, if any (timeouts, cancelled stragglers, parsing errors...)
+    - how many results the outlier filter kept and rejected
+    - how long each aggregation took, and how many providers answered
+
+Subclass ``MetricsHooks``, overriding the events of interest, and add it with
+``add_metrics_hooks``. ``PrometheusHooks`` and ``OpenTelemetryHooks`` export
+the events, importing ``prometheus_client`` or ``opentelemetry`` only when
+they're created.
+
+    xrp_price_aggregate.add_metrics_hooks(PrometheusHooks())
+    prometheus_client.start_http_server(9100)
+
+Without any hooks added, nothing is timed or counted, each event is just a
+check of ``HOOKS``.
+"""
+import logging
+import time
+
+from typing import Any, Awaitable, Dict, List, Optional, Sequence, TypeVar
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+T = TypeVar("T")
+
+
+class MetricsHooks:
+    """
+    Receives the events of the aggregation, every event does nothing until
+    it's overridden.
+
+    The hooks are called inline, so they should be quick, an exception
+    raised by one is logged and otherwise ignored.
+    """
+
+    def on_request(
+        self,
+        provider: str,
+        pairs: Sequence[str],
+        seconds: float,
+        error: Optional[BaseException],
+    ) -> None:
+        """A request to a provider finished
+
+        Args:
+            provider (str): The provider's name, like "ccxt:kraken"
+            pairs (Sequence[str]): The pairs requested, more than one when
+                                   fetched at once
+            seconds (float): How long the request took
+            error (BaseException): What it failed with, None when it didn't
+        """
+
+    def on_filter(self, outlier_filter: str, kept: int, rejected: int) -> None:
+        """The outlier filter was applied
+
+        Args:
+            outlier_filter (str): The filter's name, like "stdev"
+            kept (int): How many results passed the filter
+            rejected (int): How many results it filtered out
+        """
+
+    def on_aggregate(self, seconds: float, providers: int, dropped: int) -> None:
+        """An aggregation finished
+
+        Args:
+            seconds (float): How long the aggregation took
+            providers (int): How many exchanges there are results from
+            dropped (int): How many pairs were dropped, past the deadline or
+                           once the quorum answered
+        """
+
+
+# the hooks receiving the events, none by default
+HOOKS: List[MetricsHooks] = []
+
+
+def add_metrics_hooks(hooks: MetricsHooks) -> None:
+    """Starts sending the events to the hooks"""
+    if hooks not in HOOKS:
+        HOOKS.append(hooks)
+
+
+def remove_metrics_hooks(hooks: MetricsHooks) -> None:
+    """Stops sending the events to the hooks"""
+    if hooks in HOOKS:
+        HOOKS.remove(hooks)
+
+
+def _emit(event: str, *args: Any) -> None:
+    for hooks in HOOKS:
+        try:
+            getattr(hooks, event)(*args)
+        except Exception:  # pylint: disable=broad-except
+            logger.warning("%r failed on %s", hooks, event, exc_info=True)
+
+
+async def observe_request(
+    provider: str, pairs: Sequence[str], request: Awaitable[T]
+) -> T:
+    """Awaits the request, sending ``on_request`` once it's finished"""
+    started = time.perf_counter()
+    try:
+        result = await request
+    except BaseException as err:
+        _emit("on_request", provider, pairs, time.perf_counter() - started, err)
+        raise
+    _emit("on_request", provider, pairs, time.perf_counter() - started, None)
+    return result
+
+
+def observe_filter(outlier_filter: str, kept: int, rejected: int) -> None:
+    """Sends ``on_filter``"""
+    _emit("on_filter", outlier_filter, kept, rejected)
+
+
+def observe_aggregate(seconds: float, providers: int, dropped: int) -> None:
+    """Sends ``on_aggregate``"""
+    _emit("on_aggregate", seconds, providers, dropped)
+
+
+def _outcome(error: Optional[BaseException]) -> str:
+    """The outcome label, "ok" or the exception's type like TimeoutError"""
+    return "ok" if error is None else type(error).__name__
+
+
+class PrometheusHooks(MetricsHooks):
+    """
+    Exports the events as Prometheus metrics, prefixed with ``namespace``:
+
+        - ``provider_request_seconds``: a histogram by provider
+        - ``provider_requests_total``: a counter by provider and outcome,
+          "ok" or the exception's type
+        - ``filter_results_total``: a counter by filter and whether the
+          results were "kept" or "rejected"
+        - ``aggregation_seconds``: a histogram
+        - ``aggregation_providers``: a gauge of the providers the last
+          aggregation had results from
+        - ``dropped_pairs_total``: a counter
+    """
+
+    def __init__(
+        self, registry: Optional[Any] = None, namespace: str = "xrp_price_aggregate"
+    ) -> None:
+        """
+        Args:
+            registry (prometheus_client.CollectorRegistry): Where to register
+                the metrics, the default registry when None
+            namespace (str): The prefix of the metrics' names
+        """
+        import prometheus_client  # pylint: disable=import-outside-toplevel
+
+        options: Dict[str, Any] = {"namespace": namespace}
+        if registry is not None:
+            options["registry"] = registry
+        self.request_seconds = prometheus_client.Histogram(
+            "provider_request_seconds",
+            "How long each request to a provider took",
+            ["provider"],
+            **options,
+        )
+        self.requests = prometheus_client.Counter(
+            "provider_requests",
+            "Requests to each provider, by outcome",
+            ["provider", "outcome"],
+            **options,
+        )
+        self.filter_results = prometheus_client.Counter(
+            "filter_results",
+            "Results kept and rejected by the outlier filter",
+            ["filter", "outcome"],
+            **options,
+        )
+        self.aggregation_seconds = prometheus_client.Histogram(
+            "aggregation_seconds", "How long each aggregation took", **options
+        )
+        self.aggregation_providers = prometheus_client.Gauge(
+            "aggregation_providers",
+            "How many providers the last aggregation had results from",
+            **options,
+        )
+        self.dropped = prometheus_client.Counter(
+            "dropped_pairs",
+            "Pairs dropped past the deadline or once the quorum answered",
+            **options,
+        )
+
+    def on_request(
+        self,
+        provider: str,
+        pairs: Sequence[str],
+        seconds: float,
+        error: Optional[BaseException],
+    ) -> None:
+        self.request_seconds.labels(provider).observe(seconds)
+        self.requests.labels(provider, _outcome(error)).inc()
+
+    def on_filter(self, outlier_filter: str, kept: int, rejected: int) -> None:
+        self.filter_results.labels(outlier_filter, "kept").inc(kept)
+        self.filter_results.labels(outlier_filter, "rejected").inc(rejected)
+
+    def on_aggregate(self, seconds: float, providers: int, dropped: int) -> None:
+        self.aggregation_seconds.observe(seconds)
+        self.aggregation_providers.set(providers)
+        self.dropped.inc(dropped)
+
+
+class OpenTelemetryHooks(MetricsHooks):
+    """
+    Records the events as OpenTelemetry metrics, prefixed with ``prefix``:
+
+        - ``provider.request.duration``: a histogram by provider
+        - ``provider.requests``: a counter by provider and outcome, "ok" or
+          the exception's type
+        - ``filter.results``: a counter by filter and whether the results
+          were "kept" or "rejected"
+        - ``aggregation.duration``: a histogram
+        - ``aggregation.providers``: a histogram of the providers each
+          aggregation had results from
+        - ``dropped.pairs``: a counter
+    """
+
+    def __init__(
+        self, meter: Optional[Any] = None, prefix: str = "xrp_price_aggregate"
+    ) -> None:
+        """
+        Args:
+            meter (opentelemetry.metrics.Meter): The meter to record with,
+                the global meter provider's when None
+            prefix (str): The prefix of the metrics' names
+        """
+        if meter is None:
+            # pylint: disable=import-outside-toplevel
+            from opentelemetry import metrics
+
+            meter = metrics.get_meter(__name__)
+        self.request_duration = meter.create_histogram(
+            f"{prefix}.provider.request.duration",
+            unit="s",
+            description="How long each request to a provider took",
+        )
+        self.requests = meter.create_counter(
+            f"{prefix}.provider.requests",
+            description="Requests to each provider, by outcome",
+        )
+        self.filter_results = meter.create_counter(
+            f"{prefix}.filter.results",
+            description="Results kept and rejected by the outlier filter",
+        )
+        self.aggregation_duration = meter.create_histogram(
+            f"{prefix}.aggregation.duration",
+            unit="s",
+            description="How long each aggregation took",
+        )
+        self.aggregation_providers = meter.create_histogram(
+            f"{prefix}.aggregation.providers",
+            description="How many providers each aggregation had results from",
+        )
+        self.dropped = meter.create_counter(
+            f"{prefix}.dropped.pairs",
+            description="Pairs dropped past the deadline or once the quorum answered",
+        )
+
+    def on_request(
+        self,
+        provider: str,
+        pairs: Sequence[str],
+        seconds: float,
+        error: Optional[BaseException],
+    ) -> None:
+        self.request_duration.record(seconds, {"provider": provider})
+        self.requests.add(1, {"provider": provider, "outcome": _outcome(error)})
+
+    def on_filter(self, outlier_filter: str, kept: int, rejected: int) -> None:
+        self.filter_results.add(kept, {"filter": outlier_filter, "outcome": "kept"})
+        self.filter_results.add(
+            rejected, {"filter": outlier_filter, "outcome": "rejected"}
+        )
+
+    def on_aggregate(self, seconds: float, providers: int, dropped: int) -> None:
+        self.aggregation_duration.record(seconds)
+        self.aggregation_providers.record(providers)
+        self.dropped.add(dropped)
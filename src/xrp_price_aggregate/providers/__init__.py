@@ -1,5 +1,32 @@
 from .base import ExchangeClient
-from .gen_default import generate_default, generate_fast, generate_oracle
+from .config import (
+    ProviderConfig,
+    ProviderPairs,
+    ProviderSpec,
+    load_config,
+    parse_config,
+)
+from .gen_default import (
+    generate_default,
+    generate_fast,
+    generate_oracle,
+    generate_streaming,
+    target_provider_pairs,
+)
+from .registry import register_provider
 
 
-__all__ = ["ExchangeClient", "generate_default", "generate_fast", "generate_oracle"]
+__all__ = [
+    "ExchangeClient",
+    "ProviderConfig",
+    "ProviderPairs",
+    "ProviderSpec",
+    "generate_default",
+    "generate_fast",
+    "generate_oracle",
+    "generate_streaming",
+    "load_config",
+    "parse_config",
+    "register_provider",
+    "target_provider_pairs",
+]
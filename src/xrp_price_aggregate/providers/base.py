@@ -2,12 +2,86 @@
 Provides base classes for use along with ccxt.base.exchange.Exchange clients
 """
 from __future__ import annotations
+import asyncio
+import logging
+import random
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Type, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Type, Union
 
 import httpx
 
-from ccxt.base import exchange  # type: ignore
+if TYPE_CHECKING:
+    # only for typing, ccxt is imported when a ccxt client is created
+    from ccxt.base import exchange  # type: ignore
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# responses worth trying again, the rest won't get better by asking again
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(httpx.RequestError):
+    """The provider has failed too often lately, it's skipped for now"""
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_budget`` failed requests in a row, then every
+    request is refused for ``cooldown`` seconds. After the cooldown one
+    request is let through (half-open), if it succeeds the circuit closes,
+    otherwise it's open for another cooldown.
+    """
+
+    def __init__(self, failure_budget: int = 5, cooldown: float = 30.0) -> None:
+        """
+        Args:
+            failure_budget (int): How many failures in a row open the circuit
+            cooldown (float): How many seconds the circuit stays open for
+        """
+        self.failure_budget = failure_budget
+        self.cooldown = cooldown
+        self.failures = 0
+        # when the circuit opened, on the monotonic clock, None when closed
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def is_open(self) -> bool:
+        """Whether requests are refused right now"""
+        if self.opened_at is None:
+            return False
+        if self._trial:
+            # the one request of the half-open circuit is in flight
+            return True
+        return time.monotonic() - self.opened_at < self.cooldown
+
+    def allow(self) -> bool:
+        """Whether a request may be sent, a half-open circuit allows one"""
+        if self.is_open:
+            return False
+        if self.opened_at is not None:
+            self._trial = True
+        return True
+
+    def succeeded(self) -> None:
+        """Closes the circuit"""
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def cancelled(self) -> None:
+        """Forgets the request, a half-open circuit lets another through"""
+        self._trial = False
+
+    def failed(self) -> None:
+        """Counts a failure, opening the circuit once over budget"""
+        self.failures += 1
+        if self._trial or self.failures >= self.failure_budget:
+            self.opened_at = time.monotonic()
+        self._trial = False
 
 
 class FakeCCXT(ABC):
@@ -21,10 +95,101 @@ class FakeCCXT(ABC):
 
     # we should assume this client will be fast (use optimized endpoint)
     fast = True
+    # like ccxt's ``Exchange.has``, "fetchTickers" is for an endpoint taking
+    # many symbols at once
+    has: Dict[str, bool] = {"fetchTickers": False}
+    # how much this provider's prices count in the weighted mean, unweighted
+    # (counted once) when None
+    weight: Optional[float] = None
+    # seconds to wait on each request before giving up, no limit when None
+    request_timeout: Optional[float] = None
+    # the name this client was created by in the registry
+    provider_name: Optional[str] = None
+    # how many times ``request`` tries, waiting ``retry_backoff`` seconds
+    # after the first failure and doubling each time, with full jitter
+    retry_attempts = 3
+    retry_backoff = 0.05
+    retry_backoff_max = 1.0
+    # how many failed requests in a row open the circuit, skipping this
+    # provider for ``circuit_cooldown`` seconds, see ``CircuitBreaker``
+    failure_budget = 5
+    circuit_cooldown = 30.0
 
-    def __init__(self) -> None:
-        # having an httpx client seems useful on the base class
-        self.client = httpx.AsyncClient()
+    def __init__(self, client: Optional[httpx.AsyncClient] = None) -> None:
+        # having an httpx client seems useful on the base class, when one is
+        # provided it's shared (pooled) and owned by whoever passed it in
+        self._owns_client = client is None
+        self.client = httpx.AsyncClient() if client is None else client
+        self._circuit: Optional[CircuitBreaker] = None
+
+    @property
+    def circuit(self) -> CircuitBreaker:
+        """The circuit breaker of this client's requests"""
+        # created on first use, so the registry can set the attributes first
+        if self._circuit is None:
+            self._circuit = CircuitBreaker(self.failure_budget, self.circuit_cooldown)
+        return self._circuit
+
+    async def request(
+        self, method: str, url: Union[str, Sequence[str]], **kwargs: Any
+    ) -> httpx.Response:
+        """Sends a request, retrying failures with backoff and jitter
+
+        Connection errors and responses with a ``RETRY_STATUS_CODES`` status
+        are retried, up to ``retry_attempts`` tries, any other response is
+        returned as is. Every failed try counts against the circuit breaker,
+        while it's open requests are refused.
+
+        Given more than one URL, each try goes to the next one, failing over
+        between mirrors of the same endpoint.
+
+        Args:
+            method (str): The HTTP method, like GET
+            url (Union[str, Sequence[str]]): The URL to request, or the URLs
+                                             to take turns requesting
+            **kwargs (Any): Passed on to ``httpx.AsyncClient.request``
+
+        Returns:
+            httpx.Response: The response
+
+        Raises:
+            CircuitOpenError: When the circuit is open
+            httpx.RequestError: When the last try couldn't connect
+            httpx.HTTPStatusError: When the last try had a status worth
+                                   retrying
+        """
+        urls = [url] if isinstance(url, str) else url
+        last_error: httpx.HTTPError
+        backoff = self.retry_backoff
+        for attempt in range(self.retry_attempts):
+            if attempt:
+                # full jitter, so our retries don't line up with everyone's
+                await asyncio.sleep(random.uniform(0, backoff))
+                backoff = min(backoff * 2, self.retry_backoff_max)
+            if not self.circuit.allow():
+                raise CircuitOpenError(f"{self.id} is failing, skipped for now")
+            try:
+                resp = await self.client.request(
+                    method, urls[attempt % len(urls)], **kwargs
+                )
+            except httpx.RequestError as err:
+                self.circuit.failed()
+                last_error = err
+            except asyncio.CancelledError:
+                self.circuit.cancelled()
+                raise
+            else:
+                if resp.status_code not in RETRY_STATUS_CODES:
+                    self.circuit.succeeded()
+                    return resp
+                self.circuit.failed()
+                last_error = httpx.HTTPStatusError(
+                    f"{resp.status_code} from {resp.request.url}",
+                    request=resp.request,
+                    response=resp,
+                )
+            logger.debug("%s try %d failed: %r", self.id, attempt + 1, last_error)
+        raise last_error
 
     @property
     @abstractmethod
@@ -48,9 +213,20 @@ class FakeCCXT(ABC):
     async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
         """Return the results as a ccxt-like client would"""
 
+    async def fetch_tickers(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Return the results per symbol as a ccxt-like client would
+
+        Without ``has["fetchTickers"]`` each symbol is fetched on its own,
+        override this when there's an endpoint for many symbols at once.
+        """
+        tickers = await asyncio.gather(*map(self.fetch_ticker, symbols))
+        return dict(zip(symbols, tickers))
+
     async def close(self) -> None:
         """Add any close logic here"""
-        await self.client.aclose()
+        # a shared client is closed by its owner
+        if self._owns_client:
+            await self.client.aclose()
 
 
-ExchangeClient = Union[FakeCCXT, exchange.Exchange]
+ExchangeClient = Union[FakeCCXT, "exchange.Exchange"]
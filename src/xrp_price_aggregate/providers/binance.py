@@ -1,7 +1,8 @@
 """
 Binance optimized price endpoint provider
 """
-from typing import Dict
+import json
+from typing import Dict, List
 
 from .base import FakeCCXT
 
@@ -12,6 +13,7 @@ class Binance(FakeCCXT):
     """
 
     fetch_ticker_url = "https://api.binance.com/api/v3/ticker/price"
+    has = {"fetchTickers": True}
 
     @property
     def id(self) -> str:
@@ -36,10 +38,36 @@ class Binance(FakeCCXT):
             Dict of [str, str]: The results in a shape that includes our
                                 expected "last" key
         """
-        resp = await self.client.get(self.fetch_ticker_url, params={"symbol": symbol})
+        resp = await self.request(
+            "GET", self.fetch_ticker_url, params={"symbol": symbol}
+        )
         json_resp = resp.json()
         return {
             # default to 0 seems intelligent since it'll definitely be filtered
             # out, but skew the raw, unfiltered results
             "last": json_resp.get("price", "0")
         }
+
+    async def fetch_tickers(self, symbols: List[str]) -> Dict[str, Dict[str, str]]:
+        """Grab the responses for all the symbols in one request
+
+        Args:
+            symbols (List[str]): The symbols to request, like XRPUSDT
+
+        Returns:
+            Dict of [str, Dict of [str, str]]: The results per symbol in a
+                                               shape that includes our
+                                               expected "last" key
+        """
+        resp = await self.request(
+            "GET",
+            self.fetch_ticker_url,
+            # the endpoint wants a compact JSON array, like ["XRPUSDT","XRPBUSD"]
+            params={"symbols": json.dumps(symbols, separators=(",", ":"))},
+        )
+        prices = {ticker["symbol"]: ticker["price"] for ticker in resp.json()}
+        return {
+            # default to 0 like fetch_ticker
+            symbol: {"last": prices.get(symbol, "0")}
+            for symbol in symbols
+        }
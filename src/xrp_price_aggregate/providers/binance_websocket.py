@@ -0,0 +1,38 @@
+"""
+Binance websocket ticker provider
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .binance import Binance
+from .websocket_ticker import WebsocketTicker
+
+
+class BinanceWebsocket(WebsocketTicker, Binance):
+    """
+    Binance pushes a mini ticker of a symbol every second.
+    """
+
+    websocket_url = "wss://stream.binance.com:9443/ws"
+
+    def subscribe_messages(self, symbols: Iterable[str]) -> List[Dict[str, Any]]:
+        """Subscribe to all the symbols' streams at once
+
+        Args:
+            symbols (Iterable[str]): The symbols to subscribe to, like XRPUSDT
+
+        Returns:
+            List of Dict[str, Any]: The messages to send
+        """
+        return [
+            {
+                "method": "SUBSCRIBE",
+                "params": [f"{symbol.lower()}@miniTicker" for symbol in symbols],
+                "id": 1,
+            }
+        ]
+
+    def parse_message(self, message: Any) -> Optional[Tuple[str, str]]:
+        """The close price "c" of a mini ticker event is the last price"""
+        if not isinstance(message, dict) or message.get("e") != "24hrMiniTicker":
+            return None
+        return message["s"], message["c"]
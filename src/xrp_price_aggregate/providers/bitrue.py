@@ -36,7 +36,9 @@ class Bitrue(FakeCCXT):
             Dict of [str, str]: The results in a shape that includes our
                                 expected "last" key
         """
-        resp = await self.client.get(self.fetch_ticker_url, params={"symbol": symbol})
+        resp = await self.request(
+            "GET", self.fetch_ticker_url, params={"symbol": symbol}
+        )
         json_resp = resp.json()
         return {
             # default to 0 seems intelligent since it'll definitely be filtered
@@ -1,17 +1,32 @@
 """
 Bitstamp optimized price endpoint provider
 """
-from typing import Dict
+from typing import Any, Dict, List, Optional
 
 from .base import FakeCCXT
 
 
+def _ticker(json_ticker: Dict[str, Any]) -> Dict[str, Optional[Any]]:
+    """A ccxt-like ticker, from one of Bitstamp's tickers"""
+    timestamp = json_ticker.get("timestamp")
+    return {
+        "last": json_ticker.get("last"),
+        "bid": json_ticker.get("bid"),
+        "ask": json_ticker.get("ask"),
+        "baseVolume": json_ticker.get("volume"),
+        # in seconds, ccxt's are in milliseconds
+        "timestamp": None if timestamp is None else int(timestamp) * 1000,
+    }
+
+
 class Bitstamp(FakeCCXT):
     """
     Bitstamp has a public endpoint for fetching a price of a symbol.
     """
 
     fetch_ticker_template_url = "https://www.bitstamp.net/api/v2/ticker/{symbol}/"
+    fetch_tickers_url = "https://www.bitstamp.net/api/v2/ticker/"
+    has = {"fetchTickers": True}
 
     @property
     def id(self) -> str:
@@ -22,7 +37,7 @@ class Bitstamp(FakeCCXT):
         """We have no intelligence for precision in this client"""
         return value
 
-    async def fetch_ticker(self, symbol: str) -> Dict[str, str]:
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Optional[Any]]:
         """Grab the response from our endpoint
 
         Grab the response from our endpoint, return a dict with the expected
@@ -36,9 +51,36 @@ class Bitstamp(FakeCCXT):
             Dict of [str, str]: The results in a shape that includes our
                                 expected "last" key
         """
-        resp = await self.client.get(
+        resp = await self.request(
+            "GET",
             # Bitstamp's tickers are all lowercase /shrug
-            self.fetch_ticker_template_url.format(symbol=symbol.lower())
+            self.fetch_ticker_template_url.format(symbol=symbol.lower()),
         )
-        json_resp = resp.json()
-        return {"last": json_resp.get("last")}
+        return _ticker(resp.json())
+
+    async def fetch_tickers(
+        self, symbols: List[str]
+    ) -> Dict[str, Dict[str, Optional[Any]]]:
+        """Grab the response for every pair in one request
+
+        Args:
+            symbols (List[str]): The symbols to pick from the response, like
+                                 xrpusd
+
+        Returns:
+            Dict of [str, Dict of [str, str]]: The results per symbol in a
+                                               shape that includes our
+                                               expected "last" key, the
+                                               symbols Bitstamp doesn't list
+                                               are left out like ccxt does
+        """
+        resp = await self.request("GET", self.fetch_tickers_url)
+        # all the pairs are slashed, like XRP/USD
+        tickers = {
+            ticker["pair"].replace("/", "").lower(): ticker for ticker in resp.json()
+        }
+        return {
+            symbol: _ticker(tickers[symbol.lower()])
+            for symbol in symbols
+            if symbol.lower() in tickers
+        }
@@ -0,0 +1,45 @@
+"""
+Bitstamp websocket ticker provider
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .bitstamp import Bitstamp
+from .websocket_ticker import WebsocketTicker
+
+
+class BitstampWebsocket(WebsocketTicker, Bitstamp):
+    """
+    Bitstamp pushes every trade of a symbol.
+    """
+
+    websocket_url = "wss://ws.bitstamp.net"
+    channel_prefix = "live_trades_"
+
+    def subscribe_messages(self, symbols: Iterable[str]) -> List[Dict[str, Any]]:
+        """Subscribe to each symbol's live trades channel
+
+        Args:
+            symbols (Iterable[str]): The symbols to subscribe to, like XRPUSD
+
+        Returns:
+            List of Dict[str, Any]: The messages to send
+        """
+        return [
+            {
+                "event": "bts:subscribe",
+                # Bitstamp's tickers are all lowercase /shrug
+                "data": {"channel": f"{self.channel_prefix}{symbol.lower()}"},
+            }
+            for symbol in symbols
+        ]
+
+    def parse_message(self, message: Any) -> Optional[Tuple[str, str]]:
+        """The price of a trade is the last price"""
+        if message.get("event") != "trade":
+            return None
+        channel_symbol = message["channel"][len(self.channel_prefix) :]
+        # match it up with the symbol as we were asked for it
+        for symbol in self._symbols:
+            if symbol.lower() == channel_symbol:
+                return symbol, message["data"]["price_str"]
+        return None
@@ -0,0 +1,129 @@
+"""
+Loads the providers, and the pairs to call them with, from a TOML or JSON
+file, instead of ``DEFAULT_PROVIDER_PAIRS``.
+
+    # providers.toml
+    [[providers]]
+    name = "kraken"
+    pairs = ["XRPUSD"]
+    weight = 2.0
+    timeout = 1.5
+
+    [[providers]]
+    name = "ccxt:bitfinex"
+    pairs = ["XRP/USD"]
+    fast = true
+
+    [[providers]]
+    name = "myexchange"
+    class = "my_package.exchanges:MyExchange"
+    pairs = ["XRP-USD"]
+
+The same as JSON is ``{"providers": [{"name": "kraken", ...}, ...]}``.
+
+Besides ``name``, ``pairs`` and ``class``, every key is an attribute set on
+the provider's client, ``timeout`` being its ``request_timeout``.
+
+Loading a config doesn't register anything, ``register()`` the loaded config
+before aggregating with its provider pairs:
+
+    providers = load_config("providers.toml").register()
+"""
+import json
+import os
+from typing import Any, Dict, List, NamedTuple, Tuple, Type, Union
+
+from .base import FakeCCXT
+from .registry import ATTRIBUTES, register_provider
+
+try:
+    import tomllib  # type: ignore
+except ImportError:  # pragma: no cover
+    try:
+        import tomli as tomllib  # type: ignore
+    except ImportError:
+        tomllib = None
+
+
+ProviderPairs = List[Tuple[str, str]]
+
+# keys of a provider's entry that are named differently on its client
+_ATTRIBUTE_NAMES = {"timeout": "request_timeout"}
+
+
+class ProviderSpec(NamedTuple):
+    """A configured provider, what ``register_provider`` is called with"""
+
+    # the FakeCCXT subclass or "module:class", None for a known provider
+    provider: Union[str, Type[FakeCCXT], None]
+    attributes: Dict[str, Any]
+
+
+class ProviderConfig(NamedTuple):
+    """The configured providers, and the pairs to call them with"""
+
+    provider_pairs: ProviderPairs
+    providers: Dict[str, ProviderSpec]
+
+    def register(self) -> ProviderPairs:
+        """Registers the configured providers, returning their pairs
+
+        A provider's attributes are replaced by the configured ones, so
+        registering another config doesn't keep those of the one before.
+
+        Returns:
+            ProviderPairs: The provider names with the pair they should be
+                           called with, like ``DEFAULT_PROVIDER_PAIRS``
+        """
+        for name, spec in self.providers.items():
+            ATTRIBUTES.pop(name, None)
+            register_provider(name, spec.provider, **spec.attributes)
+        return list(self.provider_pairs)
+
+
+def parse_config(config: Dict[str, Any]) -> ProviderConfig:
+    """Parses the configured providers, without registering them
+
+    Args:
+        config (Dict[str, Any]): The decoded config, see this module
+
+    Returns:
+        ProviderConfig: The providers with their pairs, see ``register()``
+    """
+    provider_pairs: ProviderPairs = []
+    providers: Dict[str, ProviderSpec] = {}
+    for entry in config.get("providers", []):
+        entry = dict(entry)
+        try:
+            name = entry.pop("name")
+        except KeyError:
+            raise ValueError(f"a provider is missing its name: {entry}") from None
+        pairs = entry.pop("pairs", [])
+        if isinstance(pairs, str):
+            pairs = [pairs]
+        provider = entry.pop("class", None)
+        attributes = {
+            _ATTRIBUTE_NAMES.get(key, key): value for key, value in entry.items()
+        }
+        # a provider listed twice, like registering it twice
+        if name in providers:
+            provider = provider or providers[name].provider
+            attributes = {**providers[name].attributes, **attributes}
+        providers[name] = ProviderSpec(provider, attributes)
+        provider_pairs.extend((name, pair) for pair in pairs)
+    return ProviderConfig(provider_pairs, providers)
+
+
+def load_config(path: Union[str, "os.PathLike[str]"]) -> ProviderConfig:
+    """Loads a TOML or JSON config, going by its extension, see ``parse_config``
+
+    TOML needs Python 3.11+ or ``tomli`` installed.
+    """
+    path = os.fspath(path)
+    if path.endswith(".toml"):
+        if tomllib is None:
+            raise ImportError("loading TOML needs Python 3.11+ or tomli installed")
+        with open(path, "rb") as config_file:
+            return parse_config(tomllib.load(config_file))
+    with open(path, encoding="utf-8") as config_file:
+        return parse_config(json.load(config_file))
@@ -3,22 +3,145 @@ TODO:
     - https://github.com/yyolk/xrp-price-aggregate/issues/13
 """
 from functools import partial
-from typing import Callable, List, Set, Tuple
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
 
-import ccxt.async_support as ccxt  # type: ignore
+import httpx
 
+from ..latency import LatencyTracker
 from .base import ExchangeClient
-from .binance import Binance
-from .bitstamp import Bitstamp
-from .bitrue import Bitrue
-from .hitbtc import Hitbtc
-from .kraken import Kraken
+from .config import ProviderPairs
+from .registry import create_provider, provider_attribute
 
-# from .threexrp import ThreeXRP
-from .xrpl_oracle import XRPLOracle
+
+# this could be more intelligently created, but this literal mapping is
+# known pairs, by provider name in the registry, see ``load_config`` for
+# choosing your own
+DEFAULT_PROVIDER_PAIRS: ProviderPairs = [
+    # get these popular, high volume exchanges from ccxt directly
+    ("ccxt:binance", "XRP/USDT"),
+    ("ccxt:bitfinex", "XRP/USD"),
+    ("ccxt:bitstamp", "XRP/USD"),
+    # use our ccxt-like clients
+    ("bitstamp", "XRPUSD"),
+    ("bitstamp", "XRPUSDT"),
+    ("ccxt:cex", "XRP/USD"),
+    ("ccxt:cex", "XRP/USDT"),
+    ("ccxt:ftx", "XRP/USD"),
+    ("ccxt:ftx", "XRP/USDT"),
+    ("ccxt:hitbtc", "XRP/USDT"),
+    ("hitbtc", "XRPUSDT"),
+    ("ccxt:kraken", "XRP/USD"),
+    ("bitrue", "XRPUSDT"),
+    ("binance", "XRPUSDT"),
+    ("kraken", "XRPUSD"),
+    # ("threexrp", "USD"),
+    ("xrpl_oracle", "USD"),
+]
+
+# the known pairs of each target (base/quote) by provider name, like
+# ``DEFAULT_PROVIDER_PAIRS`` which is XRP/USD's, see ``target_provider_pairs``
+DEFAULT_TARGET_PROVIDER_PAIRS: Dict[str, ProviderPairs] = {
+    "XRP/USD": DEFAULT_PROVIDER_PAIRS,
+    "XRP/EUR": [
+        ("ccxt:bitstamp", "XRP/EUR"),
+        ("bitstamp", "XRPEUR"),
+        ("ccxt:kraken", "XRP/EUR"),
+        ("kraken", "XRPEUR"),
+        ("binance", "XRPEUR"),
+        ("xrpl_oracle", "EUR"),
+    ],
+    "XRP/BTC": [
+        ("ccxt:binance", "XRP/BTC"),
+        ("binance", "XRPBTC"),
+        ("ccxt:bitstamp", "XRP/BTC"),
+        ("bitstamp", "XRPBTC"),
+        ("ccxt:hitbtc", "XRP/BTC"),
+        ("hitbtc", "XRPBTC"),
+        ("ccxt:kraken", "XRP/BTC"),
+        # kraken calls bitcoin XBT
+        ("kraken", "XRPXBT"),
+        ("bitrue", "XRPBTC"),
+    ],
+}
+
+# the known pairs of each stablecoin's rate (the "leg") in the currency it
+# stands in for, like USDT/USD, by provider name, see ``convert``
+DEFAULT_LEG_PROVIDER_PAIRS: Dict[str, ProviderPairs] = {
+    "USDT": [
+        ("ccxt:bitfinex", "USDT/USD"),
+        ("ccxt:bitstamp", "USDT/USD"),
+        ("bitstamp", "USDTUSD"),
+        ("ccxt:kraken", "USDT/USD"),
+        ("kraken", "USDTUSD"),
+    ],
+    "USDC": [
+        ("ccxt:bitstamp", "USDC/USD"),
+        ("bitstamp", "USDCUSD"),
+        ("ccxt:kraken", "USDC/USD"),
+        ("kraken", "USDCUSD"),
+    ],
+}
+
+STREAMING_PROVIDER_PAIRS: ProviderPairs = [
+    ("binance_websocket", "XRPUSDT"),
+    ("bitstamp_websocket", "XRPUSD"),
+    ("bitstamp_websocket", "XRPUSDT"),
+    ("kraken_websocket", "XRP/USD"),
+    ("xrpl_oracle_websocket", "USD"),
+]
+
+
+def target_provider_pairs(
+    targets: Sequence[str], providers: Optional[Dict[str, ProviderPairs]] = None
+) -> Tuple[ProviderPairs, Dict[str, str]]:
+    """The providers of every target, to be fetched in one go
+
+    Args:
+        targets (Sequence[str]): The targets, like ["XRP/USD", "XRP/EUR"]
+        providers (Dict[str, ProviderPairs]): The providers per target,
+            instead of ``DEFAULT_TARGET_PROVIDER_PAIRS``
+
+    Returns:
+        ProviderPairs: The provider names and pairs of all the targets
+        Dict[str, str]: The target of each pair, a pair (like XRPEUR) is only
+                        ever of one target
+    """
+    known = DEFAULT_TARGET_PROVIDER_PAIRS if providers is None else providers
+    provider_pairs: ProviderPairs = []
+    pair_targets: Dict[str, str] = {}
+    for target in targets:
+        if target not in known:
+            raise ValueError(f"no providers are known for {target}")
+        for name, pair in known[target]:
+            if pair_targets.setdefault(pair, target) != target:
+                raise ValueError(
+                    f"{pair} is a pair of both {pair_targets[pair]} and {target}"
+                )
+            provider_pairs.append((name, pair))
+    return provider_pairs, pair_targets
+
+
+def _generate(
+    provider_pairs: ProviderPairs,
+    provider_fpred: Optional[Callable[[str], bool]] = None,
+    client: Optional[httpx.AsyncClient] = None,
+) -> Tuple[Set[ExchangeClient], List[Tuple[ExchangeClient, str]]]:
+    """Creates a client per selected provider, only importing what those need"""
+    clients: Dict[str, ExchangeClient] = {}
+    exchange_with_tickers = []
+    for name, pair in provider_pairs:
+        if provider_fpred is not None and not provider_fpred(name):
+            continue
+        if name not in clients:
+            clients[name] = create_provider(name, client)
+        exchange_with_tickers.append((clients[name], pair))
+    return set(clients.values()), exchange_with_tickers
 
 
-def generate_default() -> Tuple[Set[ExchangeClient], List[Tuple[ExchangeClient, str]]]:
+def generate_default(
+    client: Optional[httpx.AsyncClient] = None,
+    providers: Optional[ProviderPairs] = None,
+) -> Tuple[Set[ExchangeClient], List[Tuple[ExchangeClient, str]]]:
     """
     Generates the default set of exchange clients and those clients with the
     pair should be called.
@@ -26,6 +149,12 @@ def generate_default() -> Tuple[Set[ExchangeClient], List[Tuple[ExchangeClient,
     The shape of this data is just what made sense at the time and is subject
     to change! :)
 
+    When ``client`` is given, our ccxt-like clients share it instead of each
+    creating their own ``httpx.AsyncClient``, the caller owns closing it.
+
+    When ``providers`` is given, those provider names and pairs are used
+    instead of ``DEFAULT_PROVIDER_PAIRS``, e.g. from ``load_config().register()``.
+
 
     Note on ``ExchangeClient.fast == True``:
         When giving an `ExchangeClient` the attribute of `fast = True` it will
@@ -36,118 +165,104 @@ def generate_default() -> Tuple[Set[ExchangeClient], List[Tuple[ExchangeClient,
         call during aggregation seems useful as well, even if it is biasing the
         data those exchanges that are called, it is implicit these calls will
         be staggered over multiple loops of aggregation through ccxt's own
-        `ccxt.base.exchange.Exchange` which has attached market data we're
-        currently not utilizing, for the price aggregate function
+        `ccxt.base.exchange.Exchange` which has attached market data, of
+        which the bid, ask and volume are kept in each quote for the "mid"
+        and "volume" modes of the price aggregate function (see ``quotes``)
 
         Some `ccxt.base.exchange.Exchange`s are faster than others, and can be
         considered to be included in the `generate_fast()` method by attaching
-        the attribute directly:
+        the attribute by id in the registry, without importing ccxt:
 
             # example where we could set a ccxt client as 'fast' directly, not really
             # intelligent, just empirical through synthetic trials
-            # setattr(ftx, "fast", True)
+            # register_provider("ccxt:ftx", fast=True)
+
+        Providers are only imported when selected, ``generate_fast()`` never
+        imports ``ccxt``.
+
+        Rather than trusting ``fast``, give ``generate_fast()`` a
+        ``LatencyTracker`` to go by each provider's measured latency.
 
     """
-    # get these popular, high volume exchanges from ccxt directly
-    binance = ccxt.binance()
-    bitfinex = ccxt.bitfinex()
-    bitstamp = ccxt.bitstamp()
-    cex = ccxt.cex()
-    ftx = ccxt.ftx()
-    hitbtc = ccxt.hitbtc()
-    kraken = ccxt.kraken()
-    # use our ccxt-like clients
-    bitstamp2 = Bitstamp()
-    bitrue = Bitrue()
-    binance2 = Binance()
-    kraken2 = Kraken()
-    hitbtc2 = Hitbtc()
-    # threexrp = ThreeXRP()
-    xrpl_oracle = XRPLOracle()
-    # combine them all into a set for reference and iterating later
-    exchanges = {
-        binance,
-        bitfinex,
-        bitstamp,
-        bitstamp2,
-        cex,
-        ftx,
-        hitbtc,
-        hitbtc2,
-        kraken,
-        bitrue,
-        binance2,
-        kraken2,
-        # threexrp,
-        xrpl_oracle,
-    }
-
-    # this could be more intelligently created, but this literal mapping is
-    # known pairs
-    exchange_with_tickers = [
-        (binance, "XRP/USDT"),
-        (bitfinex, "XRP/USD"),
-        (bitstamp, "XRP/USD"),
-        (bitstamp2, "XRPUSD"),
-        (bitstamp2, "XRPUSDT"),
-        (cex, "XRP/USD"),
-        (cex, "XRP/USDT"),
-        (ftx, "XRP/USD"),
-        (ftx, "XRP/USDT"),
-        (hitbtc, "XRP/USDT"),
-        (hitbtc2, "XRPUSDT"),
-        (kraken, "XRP/USD"),
-        (bitrue, "XRPUSDT"),
-        (binance2, "XRPUSDT"),
-        (kraken2, "XRPUSD"),
-        # (threexrp, "USD"),
-        (xrpl_oracle, "USD"),
-    ]
-    return exchanges, exchange_with_tickers
-
-
-def _filter_on_client_attr(attr: str) -> Callable[[ExchangeClient], bool]:
-    return lambda exchange_client: getattr(exchange_client, attr, False) is True
+    return _generate(
+        DEFAULT_PROVIDER_PAIRS if providers is None else providers, client=client
+    )
+
+
+def generate_streaming(
+    client: Optional[httpx.AsyncClient] = None,
+    providers: Optional[ProviderPairs] = None,
+) -> Tuple[Set[ExchangeClient], List[Tuple[ExchangeClient, str]]]:
+    """
+    Generates the push-based exchange clients and those clients with the pair
+    should be called, in the same shape as ``generate_default()``.
+
+    These keep a websocket open per exchange, so they're only worth it when
+    the clients are kept around between aggregations (see ``Aggregator``).
+    """
+    return _generate(
+        STREAMING_PROVIDER_PAIRS if providers is None else providers, client=client
+    )
+
+
+def _filter_on_provider_attr(attr: str) -> Callable[[str], bool]:
+    return lambda name: provider_attribute(name, attr) is True
 
 
 def _filter_gen(
-    exchange_client_fpred: Callable[[ExchangeClient], bool],
-    exchange_with_ticker_fpred: Callable[[Tuple[ExchangeClient, str]], bool],
+    provider_fpred: Callable[[str], bool],
+    client: Optional[httpx.AsyncClient] = None,
+    providers: Optional[ProviderPairs] = None,
 ) -> Tuple[Set[ExchangeClient], List[Tuple[ExchangeClient, str]]]:
-    exchanges, exchange_with_tickers = generate_default()
-    filtered_exchanges = set(filter(exchange_client_fpred, exchanges))
-    filtered_exchange_with_tickers = list(
-        filter(exchange_with_ticker_fpred, exchange_with_tickers)
+    # filtered by name, so the clients we'd leave out are never created
+    return _generate(
+        DEFAULT_PROVIDER_PAIRS if providers is None else providers,
+        provider_fpred,
+        client,
     )
-    return filtered_exchanges, filtered_exchange_with_tickers
-
-
-# class ProviderFactory:
-#     """A Factory of Providers
-#
-#     To replace gen_default, while retaining a glob-like approache to all
-#     available exchanges with toggles on those clients for filtering what is
-#     added in.
-#     """
-#
-#     def __init__(self, exchange_client_fpred, exchange_with_ticker_fpred):
-#         self.exchange_client_fpred = exchange_client_fpred
-#         self.exchange_with_ticker_fpred = exchange_client_fpred
-
-filter_pred_fast_exchange_client = _filter_on_client_attr("fast")
-filter_pred_non_oracle_client: Callable[[Tuple[ExchangeClient, str]], bool] = (
-    lambda exchange_client: not getattr(exchange_client, "xrpl_oracle", False) is True
-)
 
 
-generate_fast = partial(
-    _filter_gen,
-    filter_pred_fast_exchange_client,
-    lambda exchange_ticker: filter_pred_fast_exchange_client(exchange_ticker[0]),
-)
+filter_pred_fast_provider = _filter_on_provider_attr("fast")
+
+
+def filter_pred_measured_fast_provider(
+    latency: LatencyTracker,
+) -> Callable[[str], bool]:
+    """Whether a provider is fast going by its measured latency, falling back
+    to its ``fast`` attribute until it has been measured
+    """
 
-generate_oracle = partial(
-    _filter_gen,
-    filter_pred_non_oracle_client,
-    lambda exchange_ticker: filter_pred_non_oracle_client(exchange_ticker[0]),
+    def is_fast(name: str) -> bool:
+        measured = latency.is_fast(name)
+        return filter_pred_fast_provider(name) if measured is None else measured
+
+    return is_fast
+
+
+filter_pred_non_oracle_provider: Callable[[str], bool] = (
+    lambda name: not provider_attribute(name, "xrpl_oracle") is True
 )
+
+
+def generate_fast(
+    client: Optional[httpx.AsyncClient] = None,
+    providers: Optional[ProviderPairs] = None,
+    latency: Optional[LatencyTracker] = None,
+) -> Tuple[Set[ExchangeClient], List[Tuple[ExchangeClient, str]]]:
+    """
+    Generates the fast exchange clients, like ``generate_default()``
+
+    When given a ``latency`` tracker the providers it has measured are picked
+    by their live latency, rather than their ``fast`` attribute, see
+    ``LatencyTracker.is_fast``.
+    """
+    return _filter_gen(
+        filter_pred_fast_provider
+        if latency is None
+        else filter_pred_measured_fast_provider(latency),
+        client,
+        providers,
+    )
+
+
+generate_oracle = partial(_filter_gen, filter_pred_non_oracle_provider)
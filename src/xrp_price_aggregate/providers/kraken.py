@@ -1,17 +1,54 @@
 """
 Kraken optimized price endpoint provider
 """
-from typing import Dict
+from typing import Any, Dict, List, Optional
 
 from .base import FakeCCXT
 
 
+class KrakenError(Exception):
+    """Kraken answered with its errors instead of a result, like
+    "EQuery:Unknown asset pair"
+    """
+
+
+def _result_key(result: Dict[str, Any], symbol: str) -> Optional[str]:
+    """Find the symbol's key in the result, None when it isn't in it
+
+    Kraken's older pairs are keyed by their legacy names, prefixing each
+    asset with an X or Z, like XXRPZUSD for XRPUSD. Some newer assets are
+    paired with a legacy one, only that one prefixed, like USDTZUSD for
+    USDTUSD.
+    """
+    for key in result:
+        legacy = len(key) == 8 and key[0] in "XZ" and key[4] in "XZ"
+        if key == symbol or (legacy and key[1:4] + key[5:] == symbol):
+            return key
+        if len(key) > 4 and key[-4] in "XZ" and key[:-4] + key[-3:] == symbol:
+            return key
+    return None
+
+
+def _ticker(json_ticker: Dict[str, Any]) -> Dict[str, str]:
+    """A ccxt-like ticker, from one of Kraken's tickers"""
+    return {
+        # the close "c" is [price, lot volume]
+        "last": json_ticker["c"][0],
+        # the ask "a" and bid "b" are [price, whole lot volume, lot volume]
+        "ask": json_ticker["a"][0],
+        "bid": json_ticker["b"][0],
+        # the volume "v" is [today, last 24 hours]
+        "baseVolume": json_ticker["v"][1],
+    }
+
+
 class Kraken(FakeCCXT):
     """
     Kraken has a public endpoint for fetching a price of a symbol.
     """
 
     fetch_ticker_url = "https://api.kraken.com/0/public/Ticker"
+    has = {"fetchTickers": True}
 
     @property
     def id(self) -> str:
@@ -36,8 +73,35 @@ class Kraken(FakeCCXT):
             Dict of [str, str]: The results in a shape that includes our
                                 expected "last" key
         """
-        resp = await self.client.get(self.fetch_ticker_url, params={"pair": symbol})
+        tickers = await self.fetch_tickers([symbol])
+        return tickers[symbol]
+
+    async def fetch_tickers(self, symbols: List[str]) -> Dict[str, Dict[str, str]]:
+        """Grab the responses for all the symbols in one request
+
+        Args:
+            symbols (List[str]): The symbols to request, like XRPUSD
+
+        Returns:
+            Dict of [str, Dict of [str, str]]: The results per symbol in a
+                                               shape that includes our
+                                               expected "last" key, the
+                                               symbols Kraken left out are
+                                               left out like ccxt does
+
+        Raises:
+            KrakenError: When Kraken answered with errors and no result
+        """
+        resp = await self.request(
+            "GET", self.fetch_ticker_url, params={"pair": ",".join(symbols)}
+        )
         json_resp = resp.json()
         result = json_resp.get("result")
-        price = result["XXRPZUSD"]["c"][0]
-        return {"last": price}
+        if result is None:
+            raise KrakenError(", ".join(json_resp.get("error") or ["no result"]))
+        tickers = {}
+        for symbol in symbols:
+            key = _result_key(result, symbol)
+            if key is not None:
+                tickers[symbol] = _ticker(result[key])
+        return tickers
@@ -0,0 +1,51 @@
+"""
+Kraken websocket ticker provider
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .kraken import Kraken
+from .websocket_ticker import WebsocketTicker
+
+
+class KrakenWebsocket(WebsocketTicker, Kraken):
+    """
+    Kraken pushes the ticker of a symbol whenever it changes.
+
+    Kraken's websocket pairs are slashed, like XRP/USD, where the request
+    endpoint takes XRPUSD.
+    """
+
+    websocket_url = "wss://ws.kraken.com"
+
+    def subscribe_messages(self, symbols: Iterable[str]) -> List[Dict[str, Any]]:
+        """Subscribe to all the symbols' tickers at once
+
+        Args:
+            symbols (Iterable[str]): The symbols to subscribe to, like XRP/USD
+
+        Returns:
+            List of Dict[str, Any]: The messages to send
+        """
+        return [
+            {
+                "event": "subscribe",
+                "pair": list(symbols),
+                "subscription": {"name": "ticker"},
+            }
+        ]
+
+    def parse_message(self, message: Any) -> Optional[Tuple[str, str]]:
+        """Ticker updates are lists, the close "c" is the last price
+
+        Like: [channel_id, {"c": ["0.72", "1.5"], ...}, "ticker", "XRP/USD"]
+        """
+        # everything else (heartbeats, statuses) are dicts
+        if not isinstance(message, list) or message[-2] != "ticker":
+            return None
+        return message[-1], message[1]["c"][0]
+
+    async def request_ticker(self, symbol: str) -> Dict[str, Any]:
+        """Request the slashed symbol's ticker by the unslashed one"""
+        rest_symbol = symbol.replace("/", "")
+        tickers = await Kraken.fetch_tickers(self, [rest_symbol])
+        return tickers[rest_symbol]
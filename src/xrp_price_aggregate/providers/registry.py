@@ -0,0 +1,141 @@
+"""
+A registry of the providers we know of, each is only imported once it's
+selected, so selecting none of the ccxt or websocket providers never imports
+``ccxt`` or ``websockets``.
+
+Register your own ``FakeCCXT`` subclasses (or attributes for a ccxt exchange)
+with ``register_provider()``, they can then be selected by name like any of
+ours.
+"""
+import importlib
+from typing import Any, Dict, Optional, Type, Union
+
+import httpx
+
+from .base import ExchangeClient, FakeCCXT
+
+
+# a provider named like "ccxt:kraken" is the ccxt exchange with that id
+CCXT_PREFIX = "ccxt:"
+
+# ccxt-like clients by name, as their class or "module:class" when they're
+# imported once selected, the module is relative to this package when it
+# starts with a "."
+PROVIDERS: Dict[str, Union[str, Type[FakeCCXT]]] = {
+    "binance": ".binance:Binance",
+    "binance_websocket": ".binance_websocket:BinanceWebsocket",
+    "bitrue": ".bitrue:Bitrue",
+    "bitstamp": ".bitstamp:Bitstamp",
+    "bitstamp_websocket": ".bitstamp_websocket:BitstampWebsocket",
+    "hitbtc": ".hitbtc:Hitbtc",
+    "kraken": ".kraken:Kraken",
+    "kraken_websocket": ".kraken_websocket:KrakenWebsocket",
+    "threexrp": ".threexrp:ThreeXRP",
+    "xrpl_oracle": ".xrpl_oracle:XRPLOracle",
+    "xrpl_oracle_websocket": ".xrpl_oracle_websocket:XRPLOracleWebsocket",
+}
+
+# ccxt exchanges have none of our attributes, like ``fast``, set them here by
+# id without needing to import ccxt, e.g. {"ftx": {"fast": True}}
+CCXT_ATTRIBUTES: Dict[str, Dict[str, Any]] = {}
+
+# attributes set on a provider's client when it's created, by provider name,
+# these take precedence over the class attributes (and ``CCXT_ATTRIBUTES``)
+ATTRIBUTES: Dict[str, Dict[str, Any]] = {}
+
+
+def is_ccxt(name: str) -> bool:
+    """Whether the provider is a ccxt exchange"""
+    return name.startswith(CCXT_PREFIX)
+
+
+def register_provider(
+    name: str,
+    provider: Union[str, Type[FakeCCXT], None] = None,
+    **attributes: Any,
+) -> None:
+    """Registers a provider, or attributes of one, by name
+
+        register_provider("myexchange", MyExchange, fast=True)
+        register_provider("myexchange", "my_package.exchanges:MyExchange")
+        register_provider("ccxt:ftx", fast=True, request_timeout=2.0)
+
+    Args:
+        name (str): The provider's name, prefixed with "ccxt:" for a ccxt
+                    exchange by its id
+        provider (Union[str, Type[FakeCCXT]]): The ``FakeCCXT`` subclass, or
+            "module:class" to import it once it's selected. Not needed for
+            ccxt exchanges, or to set attributes of a known provider
+        **attributes (Any): Set on the provider's client when it's created,
+                            like ``fast``, ``weight`` or ``request_timeout``
+    """
+    if provider is not None:
+        if is_ccxt(name):
+            raise ValueError(f"{name} is a ccxt exchange, it has no provider class")
+        PROVIDERS[name] = provider
+    elif not is_ccxt(name) and name not in PROVIDERS:
+        raise KeyError(f"{name} isn't a known provider, give its class to register it")
+    ATTRIBUTES.setdefault(name, {}).update(attributes)
+
+
+def provider_class(name: str) -> Type[FakeCCXT]:
+    """Imports and returns the class of one of the ccxt-like clients"""
+    provider = PROVIDERS[name]
+    if not isinstance(provider, str):
+        return provider
+    module_name, class_name = provider.split(":")
+    module = importlib.import_module(module_name, __package__)
+    return getattr(module, class_name)
+
+
+def provider_attributes(name: str) -> Dict[str, Any]:
+    """The attributes set on the provider's client when it's created"""
+    if is_ccxt(name):
+        return {
+            **CCXT_ATTRIBUTES.get(name[len(CCXT_PREFIX) :], {}),
+            **ATTRIBUTES.get(name, {}),
+        }
+    return dict(ATTRIBUTES.get(name, {}))
+
+
+def provider_attribute(name: str, attribute: str, default: Any = False) -> Any:
+    """Looks up an attribute of a provider without creating its client
+
+    Args:
+        name (str): The provider's name
+        attribute (str): The attribute, like ``fast``
+        default (Any): When the provider doesn't have the attribute
+
+    Returns:
+        Any: The value of the attribute
+    """
+    attributes = provider_attributes(name)
+    if attribute in attributes or is_ccxt(name):
+        return attributes.get(attribute, default)
+    return getattr(provider_class(name), attribute, default)
+
+
+def create_provider(
+    name: str, client: Optional[httpx.AsyncClient] = None
+) -> ExchangeClient:
+    """Creates the provider's client, importing what it needs
+
+    Args:
+        name (str): The provider's name
+        client (httpx.AsyncClient): An optional shared client for our
+                                    ccxt-like clients
+
+    Returns:
+        ExchangeClient: A ccxt-like client
+    """
+    exchange: ExchangeClient
+    if is_ccxt(name):
+        ccxt = importlib.import_module("ccxt.async_support")
+        exchange = getattr(ccxt, name[len(CCXT_PREFIX) :])()
+    else:
+        exchange = provider_class(name)(client)
+    # so its latency is tracked by the name it's selected by
+    exchange.provider_name = name
+    for attribute, value in provider_attributes(name).items():
+        setattr(exchange, attribute, value)
+    return exchange
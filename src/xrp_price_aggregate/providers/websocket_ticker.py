@@ -0,0 +1,214 @@
+"""
+Provides a base class for push-based providers, keeping one long-lived
+websocket per exchange along with the latest price of each symbol in memory
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+from abc import abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import websockets
+
+from .base import FakeCCXT
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class StalePriceError(Exception):
+    """Nothing was pushed for the symbol lately, and requesting it failed"""
+
+
+class WebsocketTicker(FakeCCXT):
+    """
+    Keeps the latest price of every watched symbol in memory, updated by
+    messages pushed from the exchange over a single websocket.
+
+    Mix it in before a request/response ``FakeCCXT`` provider of the same
+    exchange, that provider's ``fetch_ticker`` seeds a symbol's price when
+    it's first watched, so the first call doesn't wait for a push:
+
+        class BinanceWebsocket(WebsocketTicker, Binance):
+            ...
+
+    The websocket reconnects with exponential backoff and jitter, subscribing
+    to every watched symbol again. Given ``websocket_urls``, each reconnect
+    fails over to the next one.
+
+    A price nothing was pushed for in ``max_age`` seconds, like while the
+    websocket is down or has silently stalled, is requested again instead of
+    served from memory. When that request fails too, ``StalePriceError`` is
+    raised, so the provider shows up as "stale" rather than the last price
+    being taken as fresh.
+    """
+
+    # reading from memory is as fast as it gets
+    fast = True
+    # each symbol is read from memory, there's nothing to batch
+    has = {"fetchTickers": False}
+    websocket_url = "wss://localhost"
+    # mirrors to take turns connecting to, instead of ``websocket_url``
+    websocket_urls: Sequence[str] = ()
+    # seconds to wait before reconnecting, doubling on each failure
+    reconnect_backoff = 0.5
+    reconnect_backoff_max = 30.0
+    # seconds a pushed price is served for, after that it's requested again,
+    # served however old when None
+    max_age: Optional[float] = 60.0
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # the latest price of each watched symbol, and when it came in, in
+        # seconds since the epoch
+        self.prices: Dict[str, str] = {}
+        self.updated: Dict[str, float] = {}
+        self._symbols: Set[str] = set()
+        self._websocket: Optional[Any] = None
+        self._task: Optional["asyncio.Future[None]"] = None
+
+    @abstractmethod
+    def subscribe_messages(self, symbols: Iterable[str]) -> List[Dict[str, Any]]:
+        """Returns the messages to send for subscribing to the symbols"""
+
+    @abstractmethod
+    def parse_message(self, message: Any) -> Optional[Tuple[str, str]]:
+        """Returns the symbol and price from a decoded message
+
+        Return None for messages that don't carry a price (heartbeats,
+        subscription acknowledgements...)
+        """
+
+    async def handle_message(
+        self, websocket: Any, message: Any
+    ) -> Iterable[Tuple[str, str]]:
+        """Returns the symbols and prices from a decoded message
+
+        Override this when a message carries more than one price, or needs
+        something sent back, by default it's ``parse_message``.
+        """
+        # pylint: disable=unused-argument
+        parsed = self.parse_message(message)
+        return () if parsed is None else (parsed,)
+
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        """Return the latest price in memory
+
+        The first time, or once it's older than ``max_age``, the price is
+        requested instead, see ``request_ticker``.
+
+        Args:
+            symbol (str): The symbol to watch
+
+        Returns:
+            Dict of [str, Any]: The results in a shape that includes our
+                                expected "last" key, and when it's from
+        """
+        await self.watch(symbol)
+        if self.is_stale(symbol):
+            # seed it with a request, the pushes take it from here
+            try:
+                ticker = await self.request_ticker(symbol)
+            except Exception as err:  # pylint: disable=broad-except
+                if symbol not in self.prices:
+                    raise
+                age = time.time() - self.updated[symbol]
+                raise StalePriceError(
+                    f"{symbol} is {age:.0f} seconds old, requesting it failed "
+                    f"with {err!r}"
+                ) from err
+            # unless a push beat the request to it
+            if self.is_stale(symbol):
+                self.update(symbol, ticker["last"])
+        return {
+            "last": self.prices[symbol],
+            # ccxt's timestamps are in milliseconds
+            "timestamp": int(self.updated[symbol] * 1000),
+        }
+
+    async def fetch_tickers(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Return the latest prices in memory, see ``fetch_ticker``"""
+        return await FakeCCXT.fetch_tickers(self, symbols)
+
+    async def request_ticker(self, symbol: str) -> Dict[str, Any]:
+        """Request the ticker from the request/response provider we're mixed
+        into, override this when it takes the symbol differently
+        """
+        return await super().fetch_ticker(symbol)  # type: ignore
+
+    def is_stale(self, symbol: str) -> bool:
+        """Whether the symbol has no price, or one older than ``max_age``"""
+        if symbol not in self.prices:
+            return True
+        return (
+            self.max_age is not None
+            and time.time() - self.updated[symbol] > self.max_age
+        )
+
+    def update(self, symbol: str, price: str) -> None:
+        """Keep the latest price of the symbol, as of now"""
+        self.prices[symbol] = price
+        self.updated[symbol] = time.time()
+
+    async def watch(self, symbol: str) -> None:
+        """Subscribes to the symbol, connecting when we haven't yet"""
+        if symbol not in self._symbols:
+            self._symbols.add(symbol)
+            if self._websocket is not None:
+                try:
+                    await self._subscribe(self._websocket, [symbol])
+                except websockets.exceptions.ConnectionClosed:
+                    # we'll subscribe to it when we're reconnected
+                    pass
+        if self._task is None or self._task.done():
+            if self._task is not None and not self._task.cancelled():
+                logger.debug("%s restarting, %r", self.id, self._task.exception())
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _subscribe(self, websocket: Any, symbols: Iterable[str]) -> None:
+        for message in self.subscribe_messages(symbols):
+            await websocket.send(json.dumps(message))
+
+    async def _run(self) -> None:
+        """Keeps the websocket connected, updating our prices"""
+        urls = self.websocket_urls or [self.websocket_url]
+        failures = 0
+        backoff = self.reconnect_backoff
+        while True:
+            try:
+                async with websockets.connect(  # type: ignore
+                    urls[failures % len(urls)]
+                ) as websocket:
+                    self._websocket = websocket
+                    await self._subscribe(websocket, list(self._symbols))
+                    backoff = self.reconnect_backoff
+                    async for message in websocket:
+                        try:
+                            parsed = await self.handle_message(
+                                websocket, json.loads(message)
+                            )
+                        except (ValueError, LookupError):
+                            logger.debug("%s unexpected message %s", self.id, message)
+                            continue
+                        for symbol, price in parsed:
+                            if symbol in self._symbols:
+                                self.update(symbol, price)
+            except (OSError, websockets.exceptions.WebSocketException) as err:
+                logger.debug("%s websocket failed: %r", self.id, err)
+            finally:
+                self._websocket = None
+            failures += 1
+            # jitter the backoff, so we don't reconnect in lockstep
+            await asyncio.sleep(backoff * random.uniform(0.5, 1.5))
+            backoff = min(backoff * 2, self.reconnect_backoff_max)
+
+    async def close(self) -> None:
+        """Stop listening, then close the request client"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await super().close()
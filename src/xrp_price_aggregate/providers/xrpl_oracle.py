@@ -1,10 +1,9 @@
 """
 This will call the XRPL oracle to grab the price
 """
-import asyncio
 import statistics
 from decimal import Decimal
-from typing import Dict
+from typing import Any, Dict, List
 
 from .base import FakeCCXT
 
@@ -13,6 +12,19 @@ from .base import FakeCCXT
 XRPL_ORACLE__UNICORN_CAT = "r9PfV3sQpKLWxccdg3HL2FXKxGW2orAcLE"
 
 
+def average_limit_peer(trust_lines: List[Dict[str, Any]], symbol: str) -> str:
+    """The mean of the oracle's trust lines in the symbol's currency"""
+    # take the mean of all the limit_peer amounts if that amount is
+    # in the currency we're interested in from all the trust_lines
+    # for this oracle account
+    return str(
+        statistics.mean(
+            Decimal(trust_line["limit_peer"])
+            for trust_line in filter(lambda tl: tl["currency"] == symbol, trust_lines)
+        )
+    )
+
+
 class XRPLOracle(FakeCCXT):
     """
     Look up data that was persisted to the XRPL via the XRPL Oracles.
@@ -21,9 +33,18 @@ class XRPLOracle(FakeCCXT):
     # although the retrieval is generally considered 'fast', the frequency of
     # updates isn't (1/min)
     fast = False
-    # assume mainnet
-    fetch_ticker_url = "https://xrplcluster.com"
+    # assume mainnet, each retry fails over to the next node
+    fetch_ticker_urls = [
+        "https://xrplcluster.com",
+        "https://xrpl.ws",
+        "https://s1.ripple.com:51234",
+        "https://s2.ripple.com:51234",
+    ]
     xrpl_oracle = True
+    # every currency is in the same account lines
+    has = {"fetchTickers": True}
+    # the oracle only updates once a minute, it's fine to wait a bit longer
+    retry_attempts = 5
 
     @property
     def id(self) -> str:
@@ -42,38 +63,40 @@ class XRPLOracle(FakeCCXT):
 
 
         Args:
-            symbol (str): The symbol to request from the endpoint, like xrpusd
+            symbol (str): The currency to request from the endpoint, like USD
 
         Returns:
             Dict of [str, str]: The results in a shape that includes our
                                 expected "last" key
         """
-        successful = False
-        # optimistically, the XRPL is always up and reachable, we may need to
-        # add better logic for selecting more than one endpoint
-        while not successful:
-            resp = await self.client.post(
-                self.fetch_ticker_url,
-                json={
-                    "method": "account_lines",
-                    "params": [{"account": XRPL_ORACLE__UNICORN_CAT}],
-                },
-            )
-            if resp.status_code == 200:
-                successful = True
-                json_resp = resp.json()
-                trust_lines = json_resp["result"]["lines"]
-                # take the mean of all the limit_peer amounts if that amount is
-                # in the currency we're interested in from all the trust_lines
-                # for this oracle account
-                average = statistics.mean(
-                    Decimal(trust_line["limit_peer"])
-                    for trust_line in filter(
-                        lambda tl: tl["currency"] == symbol, trust_lines
-                    )
-                )
-            else:
-                # retry every 50 ms, this can be be more intelligent with
-                # backoff and jitter
-                await asyncio.sleep(0.05)
-        return {"last": str(average)}
+        return {"last": average_limit_peer(await self.fetch_lines(), symbol)}
+
+    async def fetch_tickers(self, symbols: List[str]) -> Dict[str, Dict[str, str]]:
+        """Grab the oracle's account lines once for all the currencies
+
+        Args:
+            symbols (List[str]): The currencies to request, like USD and EUR
+
+        Returns:
+            Dict of [str, Dict of [str, str]]: The results per currency in a
+                                               shape that includes our
+                                               expected "last" key
+        """
+        lines = await self.fetch_lines()
+        return {
+            symbol: {"last": average_limit_peer(lines, symbol)} for symbol in symbols
+        }
+
+    async def fetch_lines(self) -> List[Dict[str, Any]]:
+        """The trust lines of the oracle's account"""
+        # retried on the next node with backoff and jitter, skipped for a
+        # while when the nodes keep failing, see ``FakeCCXT.request``
+        resp = await self.request(
+            "POST",
+            self.fetch_ticker_urls,
+            json={
+                "method": "account_lines",
+                "params": [{"account": XRPL_ORACLE__UNICORN_CAT}],
+            },
+        )
+        return resp.json()["result"]["lines"]
@@ -0,0 +1,78 @@
+"""
+XRPL oracle websocket provider
+"""
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .websocket_ticker import WebsocketTicker
+from .xrpl_oracle import XRPL_ORACLE__UNICORN_CAT, XRPLOracle, average_limit_peer
+
+
+# the id of our account_lines requests, telling their responses apart
+ACCOUNT_LINES_ID = "xrpl_oracle_account_lines"
+
+
+class XRPLOracleWebsocket(WebsocketTicker, XRPLOracle):
+    """
+    Subscribes to the oracle's account, reading its trust lines again only
+    when a validated transaction touches it (about once a minute).
+
+    The rippled nodes are taken in turns when reconnecting.
+    """
+
+    websocket_urls = [
+        "wss://xrplcluster.com",
+        "wss://xrpl.ws",
+        "wss://s1.ripple.com",
+        "wss://s2.ripple.com",
+    ]
+    # its trust lines only change about once a minute
+    max_age = 120.0
+
+    def subscribe_messages(self, symbols: Iterable[str]) -> List[Dict[str, Any]]:
+        """Subscribe to the oracle's account, reading its trust lines now
+
+        Every symbol is a currency of the same trust lines, so reading them
+        prices any newly watched symbol.
+
+        Args:
+            symbols (Iterable[str]): The currencies to watch, like USD
+
+        Returns:
+            List of Dict[str, Any]: The messages to send
+        """
+        return [
+            {"command": "subscribe", "accounts": [XRPL_ORACLE__UNICORN_CAT]},
+            self._account_lines_message(),
+        ]
+
+    def parse_message(self, message: Any) -> Optional[Tuple[str, str]]:
+        """No single message carries a price, see ``handle_message``"""
+        return None
+
+    async def handle_message(
+        self, websocket: Any, message: Any
+    ) -> Iterable[Tuple[str, str]]:
+        """Read the trust lines on every validated transaction, pricing every
+        watched currency from their response
+        """
+        if message.get("type") == "transaction" and message.get("validated"):
+            await websocket.send(json.dumps(self._account_lines_message()))
+            return ()
+        if message.get("id") == ACCOUNT_LINES_ID and message.get("status") == "success":
+            lines = message["result"]["lines"]
+            currencies = {line["currency"] for line in lines}
+            return [
+                (symbol, average_limit_peer(lines, symbol))
+                for symbol in self._symbols
+                if symbol in currencies
+            ]
+        return ()
+
+    @staticmethod
+    def _account_lines_message() -> Dict[str, Any]:
+        return {
+            "id": ACCOUNT_LINES_ID,
+            "command": "account_lines",
+            "account": XRPL_ORACLE__UNICORN_CAT,
+        }
@@ -0,0 +1,369 @@
+"""
+quotes.py
+
+A quote is what's kept of each ticker fetched: the last price, along with the
+best bid and ask, the volume and when it's from, whenever the exchange
+returns them (ccxt's tickers have them all).
+
+Which price of the quotes is aggregated depends on the mode:
+
+    - "last": the last price, the default
+    - "mid": the mid-price between the bid and ask, or the last price of the
+      quotes without them
+    - "volume": the last price, adding the ``filtered_volume_weighted_mean``
+      of the filtered results, weighted by each quote's volume
+
+The quotes of an aggregation are kept in the columns of a ``QuoteBatch``, the
+lists of the ``AggregateResults`` are built from it when they're asked for.
+"""
+import math
+import time
+
+from array import array
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .serialize import dumps_preformatted, format_decimal, preformat
+
+
+MODES = ("last", "mid", "volume")
+# the results built from the batch when they're asked for
+_LAZY_RESULTS = ("raw_results_named", "raw_results", "filtered_results")
+
+
+class Quote:
+    """The price of a ticker, with its book and volume when there are any"""
+
+    __slots__ = ("price", "bid", "ask", "volume", "timestamp", "pair")
+
+    def __init__(
+        self,
+        price: Decimal,
+        bid: Optional[Decimal] = None,
+        ask: Optional[Decimal] = None,
+        volume: Optional[Decimal] = None,
+        timestamp: Optional[float] = None,
+        pair: Optional[str] = None,
+    ) -> None:
+        """
+        Args:
+            price (Decimal): The last price
+            bid (Decimal): The best bid
+            ask (Decimal): The best ask
+            volume (Decimal): In the base currency, over the exchange's
+                              rolling 24 hours
+            timestamp (float): When the ticker is from, in seconds since the
+                               epoch
+            pair (str): The pair it was fetched with, like XRPUSD
+        """
+        self.price = price
+        self.bid = bid
+        self.ask = ask
+        self.volume = volume
+        self.timestamp = timestamp
+        self.pair = pair
+
+    def __repr__(self) -> str:
+        return (
+            f"Quote(price={self.price!r}, bid={self.bid!r}, ask={self.ask!r}, "
+            f"volume={self.volume!r}, timestamp={self.timestamp!r}, "
+            f"pair={self.pair!r})"
+        )
+
+    @property
+    def mid(self) -> Decimal:
+        """The mid-price of the book, the last price without one"""
+        if not self.bid or not self.ask:
+            return self.price
+        return (self.bid + self.ask) / 2
+
+    def price_for(self, mode: str) -> Decimal:
+        """The price aggregated in the mode"""
+        return self.mid if mode == "mid" else self.price
+
+
+class QuoteBatch:
+    """
+    The quotes of an aggregation in columns: the index of each quote's
+    exchange, its price for the mode and when it's from, along with its
+    volume when weighting by volume.
+
+    Each price is kept once, the lists of the aggregate results are built
+    from the columns when they're asked for, see ``AggregateResults``. The
+    batch is only ever appended to, so the first ``length`` quotes of it
+    don't change.
+    """
+
+    def __init__(self, exchanges: Iterable[str] = (), mode: str = "last") -> None:
+        """
+        Args:
+            exchanges (Iterable[str]): The names of the providers, those
+                                       without any quotes are still listed
+                                       in ``named``
+            mode (str): Which price of the quotes is kept, see ``MODES``
+        """
+        self.mode = mode
+        self.exchanges: List[str] = []
+        self._indices: Dict[str, int] = {}
+        for exchange in exchanges:
+            self._index(exchange)
+        self.exchange_index = array("H")
+        self.prices: List[Decimal] = []
+        # NaN when the quote has no timestamp
+        self.timestamps = array("d")
+        self.volumes: Optional[List[Optional[Decimal]]] = (
+            [] if mode == "volume" else None
+        )
+
+    @classmethod
+    def from_named(
+        cls, raw_results_named: Dict[str, List[Decimal]], mode: str = "last"
+    ) -> "QuoteBatch":
+        """A batch of the prices per exchange, without timestamps"""
+        batch = cls(raw_results_named, mode)
+        for exchange, prices in raw_results_named.items():
+            for price in prices:
+                batch.append(exchange, Quote(price))
+        return batch
+
+    def _index(self, exchange: str) -> int:
+        index = self._indices.get(exchange)
+        if index is None:
+            index = self._indices[exchange] = len(self.exchanges)
+            self.exchanges.append(exchange)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def append(self, exchange: str, quote: Quote) -> None:
+        """Adds the quote of the exchange"""
+        self.exchange_index.append(self._index(exchange))
+        self.prices.append(quote.price_for(self.mode))
+        self.timestamps.append(math.nan if quote.timestamp is None else quote.timestamp)
+        if self.volumes is not None:
+            self.volumes.append(quote.volume)
+
+    def extend(self, quotes: Iterable[Tuple[str, Quote]]) -> None:
+        """Adds the quotes, each with its exchange"""
+        for exchange, quote in quotes:
+            self.append(exchange, quote)
+
+    def results(self, length: Optional[int] = None) -> List[Decimal]:
+        """The first ``length`` prices, every price when None"""
+        return self.prices[:length]
+
+    def named(self, length: Optional[int] = None) -> Dict[str, List[Decimal]]:
+        """The first ``length`` prices per exchange, every price when None"""
+        named: List[List[Decimal]] = [[] for _ in self.exchanges]
+        for index, price in zip(self.exchange_index, self.results(length)):
+            named[index].append(price)
+        return dict(zip(self.exchanges, named))
+
+
+class AggregateResults(Dict[str, Any]):
+    """
+    The aggregate results, a dict building ``raw_results_named``,
+    ``raw_results`` and ``filtered_results`` from the ``QuoteBatch`` only
+    when they're asked for.
+
+    Asking for one of them builds just that one. Anything going over every
+    key (iterating, ``items()``, ``json.dumps``, ``dict(...)``) builds all of
+    them, from then on it's a plain dict.
+
+    ``encoded()`` serializes them without building the lists of Decimals,
+    see ``serialize``.
+    """
+
+    def __init__(
+        self,
+        batch: QuoteBatch,
+        length: int,
+        keep: bytearray,
+        statistics: Dict[str, Any],
+    ) -> None:
+        """
+        Args:
+            batch (QuoteBatch): The quotes of the aggregation
+            length (int): How many of the batch's quotes are in the aggregate
+            keep (bytearray): Whether each of those passed the filter
+            statistics (Dict[str, Any]): The rest of the aggregate results
+        """
+        super().__init__(statistics)
+        self._batch: Optional[QuoteBatch] = batch
+        self._length = length
+        self._keep = keep
+        self._built: Dict[str, Any] = {}
+        self._encoded: Optional[bytes] = None
+
+    def __missing__(self, key: str) -> Any:
+        if self._batch is None or key not in _LAZY_RESULTS:
+            raise KeyError(key)
+        if key not in self._built:
+            if key == "raw_results_named":
+                self._built[key] = self._batch.named(self._length)
+            elif key == "raw_results":
+                self._built[key] = self._batch.results(self._length)
+            else:
+                self._built[key] = [
+                    result
+                    for result, kept in zip(self._batch.prices, self._keep)
+                    if kept
+                ]
+        return self._built[key]
+
+    def _materialize(self) -> None:
+        """Builds the lazy results, in the order of the aggregate results"""
+        if self._batch is None:
+            return
+        lazy = {key: self[key] for key in _LAZY_RESULTS}
+        rest = dict(dict.items(self))
+        ordered = {
+            "raw_results_named": lazy["raw_results_named"],
+            "raw_results": lazy["raw_results"],
+            "raw_median": rest.pop("raw_median"),
+            "raw_stdev": rest.pop("raw_stdev"),
+            "filtered_results": lazy["filtered_results"],
+            **rest,
+        }
+        dict.clear(self)
+        dict.update(self, ordered)
+        self._batch = None
+        self._built = {}
+
+    def formatted(self) -> Dict[str, Any]:
+        """The results with every Decimal formatted, each price of the batch
+        formatted only once
+        """
+        if self._batch is None:
+            return preformat(self)
+        prices = [format_decimal(price) for price in self._batch.prices[: self._length]]
+        named: List[List[str]] = [[] for _ in self._batch.exchanges]
+        for index, price in zip(self._batch.exchange_index, prices):
+            named[index].append(price)
+        rest = preformat(dict(dict.items(self)))
+        return {
+            "raw_results_named": dict(zip(self._batch.exchanges, named)),
+            "raw_results": prices,
+            "raw_median": rest.pop("raw_median"),
+            "raw_stdev": rest.pop("raw_stdev"),
+            "filtered_results": [
+                price for price, kept in zip(prices, self._keep) if kept
+            ],
+            **rest,
+        }
+
+    def encoded(self) -> bytes:
+        """The results as JSON, encoded once and kept until a key changes"""
+        if self._encoded is None:
+            self._encoded = dumps_preformatted(self.formatted())
+        return self._encoded
+
+    def __contains__(self, key: object) -> bool:
+        return (self._batch is not None and key in _LAZY_RESULTS) or dict.__contains__(
+            self, key
+        )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._encoded = None
+        if key in _LAZY_RESULTS:
+            self._materialize()
+        dict.__setitem__(self, key, value)
+
+    def __iter__(self) -> Any:
+        self._materialize()
+        return dict.__iter__(self)
+
+    def __len__(self) -> int:
+        self._materialize()
+        return dict.__len__(self)
+
+    def __repr__(self) -> str:
+        self._materialize()
+        return dict.__repr__(self)
+
+    def __eq__(self, other: object) -> bool:
+        self._materialize()
+        if isinstance(other, AggregateResults):
+            other._materialize()  # pylint: disable=protected-access
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # pickled and copied as a plain dict
+        return dict, (dict(self.items()),)
+
+    def keys(self) -> Any:
+        self._materialize()
+        return dict.keys(self)
+
+    def values(self) -> Any:
+        self._materialize()
+        return dict.values(self)
+
+    def items(self) -> Any:
+        self._materialize()
+        return dict.items(self)
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def pop(self, *args: Any) -> Any:
+        self._encoded = None
+        self._materialize()
+        return dict.pop(self, *args)
+
+    def popitem(self) -> Tuple[str, Any]:
+        self._encoded = None
+        self._materialize()
+        return dict.popitem(self)
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        self._encoded = None
+        self._materialize()
+        return dict.setdefault(self, key, default)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        self._encoded = None
+        self._materialize()
+        dict.update(self, *args, **kwargs)
+
+    def __delitem__(self, key: str) -> None:
+        self._encoded = None
+        self._materialize()
+        dict.__delitem__(self, key)
+
+
+def _to_decimal(value: Any) -> Optional[Decimal]:
+    """ccxt's numbers are floats, ours are strings, either may be missing"""
+    return None if value is None else Decimal(str(value))
+
+
+def quote_from_ticker(
+    price: Decimal, ticker: Dict[str, Any], pair: Optional[str] = None
+) -> Quote:
+    """Keeps what's useful of a ccxt-like ticker
+
+    Args:
+        price (Decimal): The ticker's last price, already scaled to precision
+        ticker (Dict[str, Any]): The ticker, in the shape ccxt returns
+        pair (str): The pair it was fetched with
+
+    Returns:
+        Quote: The quote, from now when the ticker has no timestamp
+    """
+    # ccxt's timestamps are in milliseconds
+    timestamp = ticker.get("timestamp")
+    return Quote(
+        price,
+        _to_decimal(ticker.get("bid")),
+        _to_decimal(ticker.get("ask")),
+        _to_decimal(ticker.get("baseVolume")),
+        time.time() if timestamp is None else timestamp / 1000,
+        pair,
+    )
@@ -0,0 +1,307 @@
+"""
+rolling.py
+
+An incremental aggregate over a sliding window of time, for asking for a
+rolling price (e.g. over the last 5 minutes) often, without recomputing the
+statistics from every result each time.
+
+Prices are kept ordered in a treap, each node knowing the size and sum of
+its subtree, so adding, evicting, the median (any order statistic) and the
+sum of a range of prices are O(log n). The variance is kept with Welford's
+running update, extended to removals.
+"""
+import random
+import statistics
+import time
+
+from collections import deque
+from decimal import Decimal
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from .aggregate_filter import AggregateResultValue
+
+
+class Sample(NamedTuple):
+    """A price from an exchange, and when it was fetched"""
+
+    exchange: str
+    price: Decimal
+    timestamp: float
+    # tells apart equal prices in the treap
+    seq: int
+
+
+class _Node:
+    __slots__ = ("key", "priority", "left", "right", "size", "total")
+
+    def __init__(self, key: Tuple[Decimal, int]) -> None:
+        self.key = key
+        self.priority = random.random()
+        self.left: Optional[_Node] = None
+        self.right: Optional[_Node] = None
+        self.size = 1
+        self.total = key[0]
+
+    def update(self) -> None:
+        self.size = 1
+        self.total = self.key[0]
+        if self.left is not None:
+            self.size += self.left.size
+            self.total += self.left.total
+        if self.right is not None:
+            self.size += self.right.size
+            self.total += self.right.total
+
+
+def _split(
+    node: Optional[_Node], key: Tuple[Decimal, int]
+) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """Splits into the nodes before the key, and those from it on"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, right = _split(node.right, key)
+        node.update()
+        return node, right
+    left, node.left = _split(node.left, key)
+    node.update()
+    return left, node
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    """Merges two treaps, every key of ``left`` before those of ``right``"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        left.update()
+        return left
+    right.left = _merge(left, right.left)
+    right.update()
+    return right
+
+
+class RollingAggregate:
+    """
+    Keeps the prices of the last ``window`` seconds, with the statistics of
+    the aggregate available at any moment:
+
+        rolling = RollingAggregate(window=300)
+        async with Aggregator(fast=True) as aggregator:
+            while True:
+                rolling.add_results((await aggregator.aggregate())["raw_results_named"])
+                print(rolling.filtered_median)
+
+    The statistics are those of the aggregate results with the default
+    "stdev" filter, ``filtered_*`` are of the prices within a ``raw_stdev``
+    of the ``raw_median``. They raise ``statistics.StatisticsError`` like the
+    aggregate does, without any prices.
+
+    Timestamps are on the ``clock``, the monotonic clock by default. The
+    prices are kept in the order of their timestamps to evict the oldest
+    first, a price older than the newest one is slotted in where it belongs.
+    """
+
+    def __init__(
+        self, window: float = 300.0, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """
+        Args:
+            window (float): How many seconds a price is kept for
+            clock (Callable[[], float]): Tells the time of a price without a
+                                         timestamp, and when to evict
+        """
+        self.window = window
+        self.clock = clock
+        self._samples: Deque[Sample] = deque()
+        self._root: Optional[_Node] = None
+        self._seq = 0
+        # Welford's running mean and sum of squared differences
+        self._mean = Decimal(0)
+        self._m2 = Decimal(0)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(
+        self, exchange: str, price: Decimal, timestamp: Optional[float] = None
+    ) -> None:
+        """Adds a price, evicting those that fell out of the window
+
+        Args:
+            exchange (str): The exchange's id or name
+            price (Decimal): The price
+            timestamp (float): When it was fetched, now when None, a price
+                               older than the window is evicted right away
+        """
+        sample = Sample(
+            exchange, price, self.clock() if timestamp is None else timestamp, self._seq
+        )
+        self._seq += 1
+        # usually the newest, otherwise only a few are newer than it
+        index = len(self._samples)
+        while index and self._samples[index - 1].timestamp > sample.timestamp:
+            index -= 1
+        self._samples.insert(index, sample)
+        left, right = _split(self._root, (price, sample.seq))
+        self._root = _merge(_merge(left, _Node((price, sample.seq))), right)
+        delta = price - self._mean
+        self._mean += delta / len(self._samples)
+        self._m2 += delta * (price - self._mean)
+        self.evict()
+
+    def add_results(
+        self,
+        raw_results_named: Dict[str, List[Decimal]],
+        timestamp: Optional[float] = None,
+    ) -> None:
+        """Adds every price of an aggregate's ``raw_results_named``"""
+        timestamp = self.clock() if timestamp is None else timestamp
+        for exchange, prices in raw_results_named.items():
+            for price in prices:
+                self.add(exchange, price, timestamp)
+
+    def evict(self, now: Optional[float] = None) -> None:
+        """Removes the prices older than the window"""
+        oldest = (self.clock() if now is None else now) - self.window
+        while self._samples and self._samples[0].timestamp < oldest:
+            self._remove(self._samples.popleft())
+
+    def _remove(self, sample: Sample) -> None:
+        left, right = _split(self._root, (sample.price, sample.seq))
+        _, right = _split(right, (sample.price, sample.seq + 1))
+        self._root = _merge(left, right)
+        if not self._samples:
+            self._mean = self._m2 = Decimal(0)
+            return
+        delta = sample.price - self._mean
+        self._mean -= delta / len(self._samples)
+        self._m2 -= delta * (sample.price - self._mean)
+
+    def _kth(self, index: int) -> Decimal:
+        """The price at the index, in order"""
+        node = self._root
+        while node is not None:
+            left_size = 0 if node.left is None else node.left.size
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node.key[0]
+            else:
+                index -= left_size + 1
+                node = node.right
+        raise IndexError(index)
+
+    def _rank(self, price: Decimal, inclusive: bool) -> Tuple[int, Decimal]:
+        """How many prices are below (or at, when inclusive) the price, and
+        their sum
+        """
+        count, total = 0, Decimal(0)
+        node = self._root
+        while node is not None:
+            if node.key[0] < price or (inclusive and node.key[0] == price):
+                if node.left is not None:
+                    count += node.left.size
+                    total += node.left.total
+                count += 1
+                total += node.key[0]
+                node = node.right
+            else:
+                node = node.left
+        return count, total
+
+    def _median_between(self, start: int, stop: int) -> Decimal:
+        count = stop - start
+        if count <= 0:
+            raise statistics.StatisticsError("no median for empty data")
+        middle = start + count // 2
+        if count % 2:
+            return self._kth(middle)
+        return (self._kth(middle - 1) + self._kth(middle)) / 2
+
+    @property
+    def raw_median(self) -> Decimal:
+        """The median of every price in the window"""
+        return self._median_between(0, len(self._samples))
+
+    @property
+    def raw_mean(self) -> Decimal:
+        """The mean of every price in the window"""
+        if not self._samples:
+            raise statistics.StatisticsError("mean requires at least one data point")
+        return self._mean
+
+    @property
+    def raw_stdev(self) -> Decimal:
+        """The sample standard deviation of every price in the window"""
+        if not self._samples:
+            raise statistics.StatisticsError(
+                "variance requires at least two data points"
+            )
+        if len(self._samples) == 1:
+            # one price doesn't spread at all
+            return Decimal(0)
+        # removals can leave a rounding error just under zero
+        return (max(self._m2, Decimal(0)) / (len(self._samples) - 1)).sqrt()
+
+    def _filtered_range(self) -> Tuple[int, int, Decimal]:
+        """The indices of the filtered prices, and their sum"""
+        raw_median, raw_stdev = self.raw_median, self.raw_stdev
+        # within a stdev of the median: median - stdev < price < median + stdev,
+        # every price is kept when they're all the same
+        start, below = self._rank(raw_median - raw_stdev, inclusive=bool(raw_stdev))
+        stop, up_to = self._rank(raw_median + raw_stdev, inclusive=not raw_stdev)
+        return start, stop, up_to - below
+
+    @property
+    def filtered_median(self) -> Decimal:
+        """The median of the prices within a stdev of the median"""
+        start, stop, _ = self._filtered_range()
+        return self._median_between(start, stop)
+
+    @property
+    def filtered_mean(self) -> Decimal:
+        """The mean of the prices within a stdev of the median"""
+        start, stop, total = self._filtered_range()
+        if stop <= start:
+            raise statistics.StatisticsError("mean requires at least one data point")
+        return total / (stop - start)
+
+    def summary(self) -> Dict[str, AggregateResultValue]:
+        """The statistics of the aggregate, without the results"""
+        start, stop, total = self._filtered_range()
+        if stop <= start:
+            raise statistics.StatisticsError("no median for empty data")
+        return {
+            "raw_median": self.raw_median,
+            "raw_stdev": self.raw_stdev,
+            "filtered_median": self._median_between(start, stop),
+            "filtered_mean": total / (stop - start),
+        }
+
+    def as_dict(self) -> Dict[str, AggregateResultValue]:
+        """The window in the shape of the aggregate results
+
+        Listing the results is O(n), see ``summary`` for the statistics only.
+        """
+        summary = self.summary()
+        raw_median, raw_stdev = self.raw_median, self.raw_stdev
+        raw_results_named: Dict[str, List[Decimal]] = {}
+        for sample in self._samples:
+            raw_results_named.setdefault(sample.exchange, []).append(sample.price)
+        raw_results = [sample.price for sample in self._samples]
+        return {
+            "raw_results_named": raw_results_named,
+            "raw_results": raw_results,
+            "raw_median": raw_median,
+            "raw_stdev": raw_stdev,
+            "filtered_results": [
+                price
+                for price in raw_results
+                if abs(price - raw_median) < raw_stdev or not raw_stdev
+            ],
+            "filtered_median": summary["filtered_median"],
+            "filtered_mean": summary["filtered_mean"],
+        }
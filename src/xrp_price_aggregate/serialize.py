@@ -0,0 +1,80 @@
+"""
+serialize.py
+
+Serializes the aggregate results to JSON, formatting each Decimal once
+beforehand so the encoder never calls back into Python.
+
+With ``json.dumps(results, default=default_for_decimal)`` the encoder calls
+the default for every Decimal it meets, and each price is in the results up
+to three times (``raw_results_named``, ``raw_results`` and
+``filtered_results``). Here the results are first turned into plain strings,
+lists and dicts, ``AggregateResults`` formatting each price of their batch
+only once, then encoded in one go by the C encoder, or by orjson when it's
+installed.
+
+The encoded bytes are kept on ``AggregateResults``, so serving the same
+aggregate to many readers encodes it once. Changing a key of the results
+encodes them again, changing the lists inside them doesn't.
+
+Without orjson the JSON is the same as ``json.dumps`` gives, orjson's is
+without the spaces after the separators. orjson is only imported the first
+time something is encoded, so importing the package doesn't pay for it.
+"""
+import json
+
+from decimal import Decimal
+from typing import Any, Callable, Optional
+
+
+# set by ``load_orjson``, None until then and when it isn't installed
+orjson: Any = None
+_orjson_loaded = False
+
+
+def load_orjson() -> Any:
+    """Imports orjson the first time it's needed, None when it isn't installed"""
+    global orjson, _orjson_loaded  # pylint: disable=global-statement
+    if not _orjson_loaded:
+        _orjson_loaded = True
+        try:
+            import orjson as module  # pylint: disable=import-outside-toplevel
+        except ImportError:  # pragma: no cover
+            module = None
+        orjson = module
+    return orjson
+
+
+def format_decimal(result: Decimal) -> str:
+    """When displaying a result, format to 5 significant digits"""
+    return f"{result:.5f}"
+
+
+def preformat(value: Any) -> Any:
+    """The value with every Decimal in it formatted, in plain lists and dicts"""
+    if isinstance(value, Decimal):
+        return format_decimal(value)
+    if isinstance(value, dict):
+        return {key: preformat(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [preformat(item) for item in value]
+    return value
+
+
+def dumps_preformatted(value: Any) -> bytes:
+    """Encodes a value without any Decimals left in it"""
+    if load_orjson() is not None:
+        return orjson.dumps(value)
+    return json.dumps(value).encode()
+
+
+def encode(results: Any) -> bytes:
+    """The results as JSON, kept by ``AggregateResults`` once encoded"""
+    encoded: Optional[Callable[[], bytes]] = getattr(results, "encoded", None)
+    if encoded is not None:
+        return encoded()
+    return dumps_preformatted(preformat(results))
+
+
+def dumps(results: Any) -> str:
+    """The results as a JSON string, see ``encode``"""
+    return encode(results).decode()
@@ -0,0 +1,126 @@
+"""
+status.py
+
+The status of each provider (exchange and pair) in an aggregation:
+
+    - "ok": every request of its chain answered
+    - "timeout": a request timed out, or it was dropped past the deadline
+      or once the quorum answered
+    - "rate-limited": the provider answered 429, or ccxt's
+      ``RateLimitExceeded`` / ``DDoSProtection``
+    - "stale": a websocket provider had nothing pushed lately, and requesting
+      the price failed too, see ``WebsocketTicker``
+    - "error": anything else, like a parser failing on a changed response
+
+A provider whose price was served from the cache also has the ``age`` of
+that price, in seconds.
+
+A chain stops at its first failure, keeping the prices it already fetched,
+so one broken provider doesn't cost the rest of the round. A pair an
+exchange leaves out of the tickers it fetched many at once only fails that
+pair.
+"""
+import statistics
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import httpx
+
+from .quotes import Quote
+
+
+OK = "ok"
+TIMEOUT = "timeout"
+ERROR = "error"
+RATE_LIMITED = "rate-limited"
+STALE = "stale"
+STATUSES = (OK, TIMEOUT, ERROR, RATE_LIMITED, STALE)
+
+# matched by name, so ccxt's (and the websocket providers') exceptions are
+# classified without importing them
+_TIMEOUT_NAMES = frozenset({"TimeoutError", "TimeoutException", "RequestTimeout"})
+_RATE_LIMITED_NAMES = frozenset({"RateLimitExceeded", "DDoSProtection"})
+
+ProviderStatuses = Dict[str, Dict[str, Dict[str, Union[str, float, None]]]]
+
+
+class ChainResult(NamedTuple):
+    """The prices a chain of tasks fetched, and what stopped it early
+
+    ``pair_errors`` are the pairs an exchange left out of the tickers it
+    fetched many at once, with the error of each, the chain kept going with
+    the rest of its pairs.
+    """
+
+    results: List[Tuple[str, Quote]]
+    error: Optional[BaseException] = None
+    pair_errors: Optional[Dict[str, BaseException]] = None
+
+
+class NoAggregateError(statistics.StatisticsError):
+    """
+    None of the providers answered, before the deadline or quorum when given
+    one, or none of their prices passed the filter.
+
+    ``results`` are the aggregate results explaining why, without the
+    aggregate: the ``"error"``, the ``"providers"`` status and the
+    ``"dropped"`` pairs when given a deadline or quorum, like a target
+    without an aggregate has.
+    """
+
+    def __init__(self, results: Dict[str, Any]) -> None:
+        super().__init__(results["error"])
+        self.results = results
+
+
+def status_of(error: Optional[BaseException]) -> str:
+    """The status of a provider that failed with ``error``, "ok" when None"""
+    if error is None:
+        return OK
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & _RATE_LIMITED_NAMES or (
+        isinstance(error, httpx.HTTPStatusError) and error.response.status_code == 429
+    ):
+        return RATE_LIMITED
+    if names & _TIMEOUT_NAMES:
+        return TIMEOUT
+    if "StalePriceError" in names:
+        return STALE
+    return ERROR
+
+
+def describe(error: Optional[BaseException]) -> Optional[str]:
+    """The error as shown in the results, like "KeyError: 'XXRPZUSD'" """
+    if error is None:
+        return None
+    return f"{type(error).__name__}: {error}"
+
+
+def provider_statuses(
+    outcomes: Iterable[Tuple[Iterable[Tuple[str, str]], str, Optional[str]]],
+    ages: Optional[Dict[Tuple[str, str], float]] = None,
+) -> ProviderStatuses:
+    """The status per provider name and pair, as included in the results
+
+    Args:
+        outcomes (Iterable[Tuple[Iterable[Tuple[str, str]], str, str]]): The
+            provider names and pairs of each chain, with its status and error
+        ages (Dict[Tuple[str, str], float]): How many seconds old the price
+            of each provider name and pair served from the cache is
+
+    Returns:
+        ProviderStatuses: Like
+            ``{"kraken": {"XRPUSD": {"status": "error", "error": "..."}}}``,
+            with an ``"age"`` when the price was served from the cache
+    """
+    statuses: ProviderStatuses = {}
+    for providers, status, error in outcomes:
+        for name, pair in providers:
+            entry: Dict[str, Union[str, float, None]] = {
+                "status": status,
+                "error": error,
+            }
+            if ages and (name, pair) in ages:
+                entry["age"] = round(ages[(name, pair)], 3)
+            statuses.setdefault(name, {})[pair] = entry
+    return statuses
@@ -0,0 +1,426 @@
+"""
+Gathering the prices of stand-in exchanges, answering from memory
+"""
+import asyncio
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional
+
+import pytest
+
+from xrp_price_aggregate.aggregate_filter import (
+    _aggregate,
+    _aggregate_targets,
+    _gather,
+    _stream,
+    as_awaitable_dict,
+)
+from xrp_price_aggregate.aggregator import Aggregator
+from xrp_price_aggregate.cache import PriceCache
+from xrp_price_aggregate.providers.base import FakeCCXT
+from xrp_price_aggregate.providers.registry import (
+    ATTRIBUTES,
+    PROVIDERS,
+    register_provider,
+)
+from xrp_price_aggregate.status import NoAggregateError
+
+
+class Exchange:
+    """A ccxt-like client answering the price of each of its pairs"""
+
+    def __init__(
+        self,
+        name: str,
+        prices: Dict[str, str],
+        batched: bool = False,
+        delay: float = 0.0,
+    ) -> None:
+        self.id = name  # pylint: disable=invalid-name
+        self.has = {"fetchTickers": batched}
+        self.prices = prices
+        self.delay = delay
+        self.requests = 0
+
+    @classmethod
+    def price_to_precision(cls, _: str, value: str) -> str:
+        return value
+
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        return {"last": self.prices[symbol]}
+
+    async def fetch_tickers(
+        self, symbols: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        # left out when it isn't listed, like ccxt
+        return {
+            symbol: {"last": self.prices[symbol]}
+            for symbol in symbols or []
+            if symbol in self.prices
+        }
+
+
+class Book(Exchange):
+    """Answering tickers with a book and volume, ``prices`` being the last"""
+
+    def __init__(self, name: str, prices: Dict[str, str], **book: str) -> None:
+        super().__init__(name, prices)
+        self.book = book
+
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        return {**await super().fetch_ticker(symbol), **self.book}
+
+
+def test_mid_mode_aggregates_the_mid_prices() -> None:
+    async def main() -> None:
+        kraken = Book("kraken", {"XRPUSD": "0.7"}, bid="0.49", ask="0.51")
+        bitstamp = Book("bitstamp", {"xrpusd": "0.8"}, bid="0.59", ask="0.61")
+        # without a book it's the last price
+        binance = Exchange("binance", {"XRPUSDT": "0.55"})
+        providers = [(kraken, "XRPUSD"), (bitstamp, "xrpusd"), (binance, "XRPUSDT")]
+        results = await _aggregate(
+            {kraken, bitstamp, binance}, providers, 1, 0.0, mode="mid"
+        )
+        assert results["raw_results_named"] == {
+            "kraken": [Decimal("0.50")],
+            "bitstamp": [Decimal("0.60")],
+            "binance": [Decimal("0.55")],
+        }
+        assert results["raw_median"] == Decimal("0.55")
+        assert "filtered_volume_weighted_mean" not in results
+
+    asyncio.run(main())
+
+
+def test_volume_mode_weighs_the_filtered_results_by_volume() -> None:
+    async def main() -> None:
+        kraken = Book("kraken", {"XRPUSD": "0.5"}, baseVolume="300")
+        bitstamp = Book("bitstamp", {"xrpusd": "0.6"}, baseVolume="100")
+        providers = [(kraken, "XRPUSD"), (bitstamp, "xrpusd")]
+        results = await _aggregate({kraken, bitstamp}, providers, 1, 0.0, mode="volume")
+        # the last prices
+        assert results["raw_results"] == [Decimal("0.5"), Decimal("0.6")]
+        assert results["filtered_mean"] == Decimal("0.55")
+        assert results["filtered_volume_weighted_mean"] == Decimal("0.525")
+
+        # without any volume it's the filtered mean
+        plain = Exchange("kraken", {"XRPUSD": "0.5", "XRPEUR": "0.6"})
+        results = await _aggregate(
+            {plain}, [(plain, "XRPUSD"), (plain, "XRPEUR")], 1, 0.0, mode="volume"
+        )
+        assert results["filtered_volume_weighted_mean"] == Decimal("0.55")
+
+    asyncio.run(main())
+
+
+def test_statuses_have_the_age_of_cached_prices() -> None:
+    async def main() -> None:
+        kraken = Exchange("kraken", {"XRPUSD": "0.5"})
+        bitstamp = Exchange("bitstamp", {"xrpusd": "0.6", "xrpeur": "0.55"}, True)
+        providers = [(kraken, "XRPUSD"), (bitstamp, "xrpusd"), (bitstamp, "xrpeur")]
+        cache = PriceCache(ttl=60.0)
+
+        _, _, statuses = await _gather(providers, 1, 0.0)
+        assert "age" not in statuses["kraken"]["XRPUSD"]
+
+        await _gather(providers, 1, 0.0, cache=cache)
+        await asyncio.sleep(0.05)
+        _, _, statuses = await _gather(providers, 1, 0.0, quorum=3, cache=cache)
+        assert statuses["kraken"]["XRPUSD"]["status"] == "ok"
+        for name, pair in (("kraken", "XRPUSD"), ("bitstamp", "xrpeur")):
+            assert statuses[name][pair]["age"] >= 0.05
+        # served from the cache the second time
+        assert kraken.requests == 2 and bitstamp.requests == 2
+
+    asyncio.run(main())
+
+
+def test_batches_the_pairs_of_an_exchange() -> None:
+    async def main() -> None:
+        bitstamp = Exchange("bitstamp", {"xrpusd": "0.6", "xrpeur": "0.55"}, True)
+        kraken = Exchange("kraken", {"XRPUSD": "0.5", "XRPEUR": "0.45"})
+        providers = [
+            (bitstamp, "xrpusd"),
+            (bitstamp, "xrpeur"),
+            (kraken, "XRPUSD"),
+            (kraken, "XRPEUR"),
+        ]
+        results, _, _ = await _gather(providers, 3, 0.0)
+        assert len(results) == 12
+        # one request of each round for both pairs, without fetchTickers one each
+        assert bitstamp.requests == 3
+        assert kraken.requests == 6
+
+    asyncio.run(main())
+
+
+def test_splits_the_quotes_by_target() -> None:
+    async def main() -> None:
+        kraken = Exchange("kraken", {"XRPUSD": "0.5", "XRPEUR": "0.45"}, True)
+        bitstamp = Exchange("bitstamp", {"xrpusd": "0.6"})
+        providers = [
+            (kraken, "XRPUSD"),
+            (kraken, "XRPEUR"),
+            (bitstamp, "xrpusd"),
+            (bitstamp, "xrpgbp"),
+        ]
+        pair_targets = {
+            "XRPUSD": "XRP/USD",
+            "xrpusd": "XRP/USD",
+            "XRPEUR": "XRP/EUR",
+            "xrpgbp": "XRP/GBP",
+        }
+        aggregates = await _aggregate_targets(
+            {kraken, bitstamp}, providers, pair_targets, 1, 0.0
+        )
+        # the pairs of every target in one request
+        assert kraken.requests == 1
+
+        usd, eur = aggregates["XRP/USD"], aggregates["XRP/EUR"]
+        assert usd["raw_results_named"] == {
+            "kraken": [Decimal("0.5")],
+            "bitstamp": [Decimal("0.6")],
+        }
+        assert usd["providers"] == {
+            "kraken": {"XRPUSD": {"status": "ok", "error": None}},
+            "bitstamp": {"xrpusd": {"status": "ok", "error": None}},
+        }
+        assert eur["raw_results_named"] == {"kraken": [Decimal("0.45")]}
+        assert list(eur["providers"]) == ["kraken"]
+        # without an aggregate, the other targets still have theirs
+        assert aggregates["XRP/GBP"] == {
+            "error": "StatisticsError: no median for empty data",
+            "providers": {
+                "bitstamp": {
+                    "xrpgbp": {"status": "error", "error": "KeyError: 'xrpgbp'"}
+                }
+            },
+        }
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_missing_pair_only_fails_itself(cached: bool) -> None:
+    async def main() -> None:
+        bitstamp = Exchange("bitstamp", {"xrpusd": "0.6", "xrpeur": "0.55"}, True)
+        providers = [(bitstamp, "xrpusd"), (bitstamp, "xrpgbp"), (bitstamp, "xrpeur")]
+        results, _, statuses = await _gather(
+            providers, 2, 0.0, cache=PriceCache(ttl=0.0) if cached else None
+        )
+        assert [quote.pair for _, quote in results] == ["xrpusd", "xrpeur"] * 2
+        assert statuses["bitstamp"]["xrpusd"]["status"] == "ok"
+        assert statuses["bitstamp"]["xrpeur"]["status"] == "ok"
+        assert statuses["bitstamp"]["xrpgbp"]["status"] == "error"
+        assert statuses["bitstamp"]["xrpgbp"]["error"] == "KeyError: 'xrpgbp'"
+
+    asyncio.run(main())
+
+
+def test_quorum_doesnt_count_the_legs() -> None:
+    async def main() -> None:
+        fast = Exchange("fast", {"XRPUSD": "0.5", "USDTUSD": "1.0"})
+        slow = Exchange("slow", {"XRPUSDT": "0.5"}, delay=0.2)
+        leg = Exchange("leg", {"USDTUSD": "1.0"}, delay=0.05)
+        providers = [(fast, "XRPUSD"), (slow, "XRPUSDT"), (leg, "USDTUSD")]
+        pair_legs = {"USDTUSD": "USDT"}
+
+        # the leg answering isn't the second provider answering
+        _, dropped, _ = await _gather(
+            providers[:2] + [(fast, "USDTUSD")], 1, 0.0, quorum=2, pair_legs=pair_legs
+        )
+        assert not dropped
+
+        # a leg of each stablecoin is still waited on
+        _, dropped, statuses = await _gather(
+            providers, 1, 0.0, quorum=1, pair_legs=pair_legs
+        )
+        assert dropped == {"slow": ["XRPUSDT"]}
+        assert statuses["leg"]["USDTUSD"]["status"] == "ok"
+
+    asyncio.run(main())
+
+
+def test_stream_yields_from_the_first_price() -> None:
+    async def main() -> None:
+        kraken = Exchange("kraken", {"XRPUSD": "0.5"})
+        snapshots = [
+            snapshot
+            async for snapshot in _stream({kraken}, [(kraken, "XRPUSD")], 1, 0.0)
+        ]
+        assert len(snapshots) == 1
+        assert snapshots[0]["raw_results_named"] == {"kraken": [Decimal("0.5")]}
+        assert snapshots[0]["filtered_median"] == Decimal("0.5")
+
+    asyncio.run(main())
+
+
+class Counting(FakeCCXT):
+    """A registered provider answering from memory, counting its requests"""
+
+    requests = 0
+
+    @property
+    def id(self) -> str:
+        return "counting"
+
+    @classmethod
+    def price_to_precision(cls, _: str, value: str) -> str:
+        return value
+
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        Counting.requests += 1
+        await asyncio.sleep(0.01)
+        return {"last": "0.5"}
+
+
+def test_coalesces_list_typed_providers() -> None:
+    register_provider("counting", Counting)
+
+    async def main() -> None:
+        # like they're loaded from JSON
+        providers: Any = [["counting", "XRPUSD"]]
+        convert: Any = {"USDT": [["counting", "USDTUSD"]]}
+        first, second = await asyncio.gather(
+            *(
+                as_awaitable_dict(coalesce=True, providers=providers, convert=convert)
+                for _ in range(2)
+            )
+        )
+        assert first is second
+        assert Counting.requests == 1
+
+    try:
+        asyncio.run(main())
+    finally:
+        PROVIDERS.pop("counting")
+        ATTRIBUTES.pop("counting", None)
+
+
+class Slow(FakeCCXT):
+    """A registered provider answering its ``price`` after ``delay`` seconds"""
+
+    delay = 0.3
+    price = "0.5"
+    requests = 0
+    cancelled = 0
+
+    @property
+    def id(self) -> str:
+        return "slow"
+
+    @classmethod
+    def price_to_precision(cls, _: str, value: str) -> str:
+        return value
+
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        type(self).requests += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            type(self).cancelled += 1
+            raise
+        return {"last": self.price}
+
+
+class Quick(Slow):
+    delay = 0.0
+    requests = 0
+
+    @property
+    def id(self) -> str:
+        return "quick"
+
+
+@pytest.fixture(name="registered")
+def fixture_registered() -> Iterator[None]:
+    """Registers the stand-in providers, forgetting them afterwards"""
+    Slow.price, Slow.requests, Slow.cancelled, Quick.requests = "0.5", 0, 0, 0
+    register_provider("slow", Slow)
+    register_provider("quick", Quick)
+    yield
+    for name in ("slow", "quick"):
+        PROVIDERS.pop(name)
+        ATTRIBUTES.pop(name, None)
+
+
+def test_one_shot_call_fetches_a_stale_price_once(registered: None) -> None:
+    async def main() -> None:
+        cache = PriceCache(ttl=0.05)
+        providers = [("slow", "XRPUSD")]
+        await as_awaitable_dict(providers=providers, cache=cache)
+        await asyncio.sleep(0.1)
+        Slow.price = "0.6"
+
+        loop = asyncio.get_event_loop()
+        started = loop.time()
+        results = await as_awaitable_dict(providers=providers, cache=cache)
+        # one request, not one more left behind to wait on
+        assert loop.time() - started < 1.5 * Slow.delay
+        assert results["raw_results"] == [Decimal("0.6")]
+        assert results["providers"]["slow"]["XRPUSD"]["age"] < cache.ttl
+        assert Slow.requests == 2
+
+    asyncio.run(main())
+
+
+def test_aggregator_serves_a_stale_price_at_once(registered: None) -> None:
+    async def main() -> None:
+        cache = PriceCache(ttl=0.05)
+        async with Aggregator(providers=[("slow", "XRPUSD")], cache=cache) as agg:
+            await agg.aggregate()
+            await asyncio.sleep(0.1)
+            Slow.price = "0.6"
+
+            loop = asyncio.get_event_loop()
+            started = loop.time()
+            results = await agg.aggregate()
+            assert loop.time() - started < Slow.delay / 2
+            # refreshed in the background
+            assert results["raw_results"] == [Decimal("0.5")]
+            assert results["providers"]["slow"]["XRPUSD"]["age"] > cache.ttl
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_deadline_cancels_the_stragglers(registered: None, cached: bool) -> None:
+    async def main() -> None:
+        Slow.delay = 1.0
+        loop = asyncio.get_event_loop()
+        started = loop.time()
+        results = await as_awaitable_dict(
+            providers=[("quick", "XRPUSD"), ("slow", "XRPUSD")],
+            deadline=0.2,
+            cache=PriceCache() if cached else None,
+        )
+        # not waiting on the straggler's fetch, cache or not
+        assert loop.time() - started < 0.6
+        assert results["dropped"] == {"slow": ["XRPUSD"]}
+        assert results["providers"]["slow"]["XRPUSD"]["status"] == "timeout"
+        assert results["raw_results_named"] == {
+            "quick": [Decimal("0.5")],
+            "slow": [],
+        }
+        assert Slow.cancelled == 1
+
+    try:
+        asyncio.run(main())
+    finally:
+        Slow.delay = 0.3
+
+
+def test_nothing_answering_before_the_deadline(registered: None) -> None:
+    async def main() -> None:
+        with pytest.raises(NoAggregateError) as raised:
+            await as_awaitable_dict(providers=[("slow", "XRPUSD")], deadline=0.05)
+        results = raised.value.results
+        assert results["error"] == "StatisticsError: no median for empty data"
+        assert results["dropped"] == {"slow": ["XRPUSD"]}
+        assert results["providers"]["slow"]["XRPUSD"]["status"] == "timeout"
+        assert Slow.cancelled == 1
+
+    asyncio.run(main())
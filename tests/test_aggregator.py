@@ -0,0 +1,106 @@
+"""
+The long-lived aggregator, keeping its clients between aggregate calls
+"""
+import asyncio
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List
+
+import httpx
+import pytest
+
+from xrp_price_aggregate.aggregator import Aggregator
+from xrp_price_aggregate.providers.base import FakeCCXT
+from xrp_price_aggregate.providers.registry import (
+    ATTRIBUTES,
+    PROVIDERS,
+    register_provider,
+)
+
+
+class Pooled(FakeCCXT):
+    """A registered provider requesting its price through its client"""
+
+    @property
+    def id(self) -> str:
+        return "pooled"
+
+    @classmethod
+    def price_to_precision(cls, _: str, value: str) -> str:
+        return value
+
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        resp = await self.request("GET", f"https://pooled.test/{symbol}")
+        return {"last": resp.json()["price"]}
+
+
+@pytest.fixture(name="clients")
+def fixture_clients(monkeypatch: pytest.MonkeyPatch) -> Iterator[List[Any]]:
+    """Registers the stand-in provider, recording the clients created"""
+    clients: List[Any] = []
+
+    class Recording(httpx.AsyncClient):
+        def __init__(self, **kwargs: Any) -> None:
+            self.limits = kwargs["limits"]
+            self.requests: List[str] = []
+            super().__init__(transport=httpx.MockTransport(self.answer), **kwargs)
+            clients.append(self)
+
+        def answer(self, request: httpx.Request) -> httpx.Response:
+            self.requests.append(request.url.path)
+            return httpx.Response(200, json={"price": "0.5"})
+
+    monkeypatch.setattr(httpx, "AsyncClient", Recording)
+    register_provider("pooled", Pooled)
+    yield clients
+    PROVIDERS.pop("pooled")
+    ATTRIBUTES.pop("pooled", None)
+
+
+def test_reuses_one_pooled_client(clients: List[Any]) -> None:
+    async def main() -> None:
+        async with Aggregator(
+            providers=[("pooled", "XRPUSD"), ("pooled", "XRPEUR")],
+            max_connections=4,
+            max_keepalive_connections=2,
+            keepalive_expiry=1.0,
+        ) as agg:
+            first = await agg.aggregate()
+            exchanges = set(agg.exchanges)
+            second = await agg.aggregate()
+            assert agg.exchanges == exchanges
+            assert first["raw_results"] == second["raw_results"] == [Decimal("0.5")] * 2
+
+        # one client for every exchange and every call, closed with the aggregator
+        (client,) = clients
+        assert client.limits == httpx.Limits(
+            max_connections=4, max_keepalive_connections=2, keepalive_expiry=1.0
+        )
+        assert [exchange.client for exchange in exchanges] == [client]
+        assert sorted(client.requests) == ["/XRPEUR", "/XRPEUR", "/XRPUSD", "/XRPUSD"]
+        assert client.is_closed
+        assert not agg.is_open
+
+    asyncio.run(main())
+
+
+def test_reopens_after_closing(clients: List[Any]) -> None:
+    async def main() -> None:
+        agg = Aggregator(providers=[("pooled", "XRPUSD")])
+        await agg.aggregate()
+        await agg.close()
+        await agg.aggregate()
+        await agg.close()
+        assert len(clients) == 2
+        assert all(client.is_closed for client in clients)
+
+    asyncio.run(main())
+
+
+def test_targets_are_aggregated_with_aggregate_targets() -> None:
+    async def main() -> None:
+        with pytest.raises(ValueError, match="using aggregate_targets"):
+            await Aggregator(targets=["XRP/USD"]).aggregate()
+        with pytest.raises(ValueError, match="needs the aggregator's targets"):
+            await Aggregator().aggregate_targets()
+
+    asyncio.run(main())
@@ -0,0 +1,238 @@
+"""
+``FakeCCXT.request``'s retries and circuit breaker, against an
+``httpx.MockTransport``
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+import pytest
+
+from xrp_price_aggregate.latency import HedgePolicy
+from xrp_price_aggregate.providers.base import (
+    CircuitBreaker,
+    CircuitOpenError,
+    FakeCCXT,
+)
+
+
+URL = "https://example.test/ticker"
+
+
+class Example(FakeCCXT):
+    """The least of a provider, the tests only go through ``request``"""
+
+    retry_backoff = 0.001
+    retry_backoff_max = 0.001
+
+    @property
+    def id(self) -> str:
+        return "example"
+
+    @classmethod
+    def price_to_precision(cls, _: str, value: str) -> str:
+        return value
+
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        resp = await self.request("GET", URL, params={"symbol": symbol})
+        return resp.json()
+
+
+class Responses:
+    """Answers each request with the next of its responses, the last one
+    over and over, an exception is raised instead and a coroutine function
+    is awaited
+    """
+
+    def __init__(self, *responses: Any) -> None:
+        self.responses = list(responses)
+        self.requests = 0
+
+    def __call__(self, request: httpx.Request) -> Any:
+        response = self.responses[min(self.requests, len(self.responses) - 1)]
+        self.requests += 1
+        if isinstance(response, Exception):
+            raise response
+        if callable(response):
+            return response()
+        return httpx.Response(response, json={"last": "0.72"})
+
+
+def run(
+    responses: Callable[[httpx.Request], Any],
+    test: Callable[[Example], Awaitable[None]],
+    **attributes: Any,
+) -> None:
+    """Runs the test with a provider answered by the responses"""
+
+    async def main() -> None:
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(responses)
+        ) as client:
+            provider = Example(client)
+            for attribute, value in attributes.items():
+                setattr(provider, attribute, value)
+            await asyncio.wait_for(test(provider), 5)
+
+    asyncio.run(main())
+
+
+async def hang() -> httpx.Response:
+    await asyncio.sleep(60)
+    raise AssertionError("never answered")
+
+
+@pytest.mark.parametrize("status", [500, 502, 503, 504, 429])
+def test_retries_a_status_worth_retrying(status: int) -> None:
+    responses = Responses(status, 200)
+
+    async def test(provider: Example) -> None:
+        assert (await provider.fetch_ticker("XRPUSD"))["last"] == "0.72"
+        assert responses.requests == 2
+        assert provider.circuit.failures == 0
+
+    run(responses, test)
+
+
+def test_retries_a_timeout() -> None:
+    responses = Responses(httpx.ReadTimeout("too slow"), 200)
+
+    async def test(provider: Example) -> None:
+        assert (await provider.fetch_ticker("XRPUSD"))["last"] == "0.72"
+        assert responses.requests == 2
+
+    run(responses, test)
+
+
+def test_raises_the_last_failure() -> None:
+    responses = Responses(503)
+
+    async def test(provider: Example) -> None:
+        with pytest.raises(httpx.HTTPStatusError) as raised:
+            await provider.fetch_ticker("XRPUSD")
+        assert raised.value.response.status_code == 503
+        assert responses.requests == provider.retry_attempts
+
+    run(responses, test)
+
+
+@pytest.mark.parametrize("status", [400, 404])
+def test_doesnt_retry_a_client_error(status: int) -> None:
+    responses = Responses(status, 200)
+
+    async def test(provider: Example) -> None:
+        resp = await provider.request("GET", URL)
+        assert resp.status_code == status
+        assert responses.requests == 1
+        assert provider.circuit.failures == 0
+
+    run(responses, test)
+
+
+def test_fails_over_between_urls() -> None:
+    urls: List[str] = []
+
+    def answer(request: httpx.Request) -> httpx.Response:
+        urls.append(str(request.url))
+        return httpx.Response(503 if len(urls) == 1 else 200)
+
+    async def test(provider: Example) -> None:
+        await provider.request("GET", [URL, "https://mirror.test/ticker"])
+        assert urls == [URL, "https://mirror.test/ticker"]
+
+    run(answer, test)
+
+
+def test_opens_after_the_failure_budget() -> None:
+    responses = Responses(503)
+
+    async def test(provider: Example) -> None:
+        # 2 tries per request, the budget runs out on the second request
+        for _ in range(2):
+            with pytest.raises(httpx.HTTPStatusError):
+                await provider.fetch_ticker("XRPUSD")
+        assert provider.circuit.is_open
+        with pytest.raises(CircuitOpenError):
+            await provider.fetch_ticker("XRPUSD")
+        # refused without a request
+        assert responses.requests == 4
+
+    run(responses, test, retry_attempts=2, failure_budget=4)
+
+
+def test_half_open_lets_one_trial_through() -> None:
+    responses = Responses(503, 503, 200)
+
+    async def test(provider: Example) -> None:
+        with pytest.raises(httpx.HTTPStatusError):
+            await provider.fetch_ticker("XRPUSD")
+        assert provider.circuit.is_open
+
+        await asyncio.sleep(0.06)
+        # the trial succeeds, closing the circuit
+        assert (await provider.fetch_ticker("XRPUSD"))["last"] == "0.72"
+        assert not provider.circuit.is_open
+        assert responses.requests == 3
+
+    run(responses, test, retry_attempts=2, failure_budget=2, circuit_cooldown=0.05)
+
+
+def test_failed_trial_opens_again() -> None:
+    responses = Responses(503)
+
+    async def test(provider: Example) -> None:
+        with pytest.raises(httpx.HTTPStatusError):
+            await provider.fetch_ticker("XRPUSD")
+        await asyncio.sleep(0.06)
+        # the trial fails, its retry is refused
+        with pytest.raises(CircuitOpenError):
+            await provider.fetch_ticker("XRPUSD")
+        assert responses.requests == 3
+        assert provider.circuit.is_open
+
+    run(responses, test, retry_attempts=2, failure_budget=2, circuit_cooldown=0.05)
+
+
+def test_half_open_refuses_while_the_trial_is_in_flight() -> None:
+    breaker = CircuitBreaker(failure_budget=1, cooldown=0.0)
+    breaker.failed()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.succeeded()
+    assert breaker.allow()
+
+
+def test_cancelled_trial_lets_another_through() -> None:
+    responses = Responses(503, hang, 200)
+
+    async def test(provider: Example) -> None:
+        with pytest.raises(httpx.HTTPStatusError):
+            await provider.fetch_ticker("XRPUSD")
+        await asyncio.sleep(0.06)
+
+        trial = asyncio.ensure_future(provider.fetch_ticker("XRPUSD"))
+        await asyncio.sleep(0.01)
+        assert provider.circuit.is_open
+        trial.cancel()
+        await asyncio.gather(trial, return_exceptions=True)
+
+        # not stuck half-open, and the cancelled trial isn't a failure
+        assert not provider.circuit.is_open
+        assert (await provider.fetch_ticker("XRPUSD"))["last"] == "0.72"
+
+    run(responses, test, retry_attempts=1, failure_budget=1, circuit_cooldown=0.05)
+
+
+def test_cancelled_hedge_isnt_a_failure() -> None:
+    responses = Responses(hang, 200)
+
+    async def test(provider: Example) -> None:
+        hedge = HedgePolicy(min_delay=0.01)
+        ticker = await hedge.run(0.01, lambda: provider.fetch_ticker("XRPUSD"))
+        assert ticker["last"] == "0.72"
+        assert hedge.hedges == 1
+        # the slow attempt was cancelled, not counted against the budget
+        assert provider.circuit.failures == 0
+        assert not provider.circuit.is_open
+
+    run(responses, test, failure_budget=1)
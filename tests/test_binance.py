@@ -0,0 +1,36 @@
+"""
+Binance's prices, against an ``httpx.MockTransport``
+"""
+import asyncio
+import json
+from typing import List
+
+import httpx
+
+from xrp_price_aggregate.providers.binance import Binance
+
+
+def test_fetch_tickers_in_one_request() -> None:
+    requests: List[httpx.Request] = []
+
+    def answer(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(
+            200,
+            json=[
+                {"symbol": "XRPUSDT", "price": "0.6"},
+                {"symbol": "XRPEUR", "price": "0.55"},
+            ],
+        )
+
+    async def main() -> None:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(answer)) as client:
+            tickers = await Binance(client).fetch_tickers(["XRPUSDT", "XRPEUR"])
+        assert tickers == {"XRPUSDT": {"last": "0.6"}, "XRPEUR": {"last": "0.55"}}
+
+    asyncio.run(main())
+    (request,) = requests
+    assert request.url.path == "/api/v3/ticker/price"
+    # a compact JSON array, like the endpoint wants
+    assert request.url.params["symbols"] == '["XRPUSDT","XRPEUR"]'
+    assert json.loads(request.url.params["symbols"]) == ["XRPUSDT", "XRPEUR"]
@@ -0,0 +1,30 @@
+"""
+Bitstamp's tickers, against an ``httpx.MockTransport``
+"""
+import asyncio
+
+import httpx
+
+from xrp_price_aggregate.providers.bitstamp import Bitstamp
+
+
+def test_fetch_tickers_leaves_out_an_unlisted_symbol() -> None:
+    def answer(_: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            json=[
+                {"pair": "XRP/USD", "last": "0.6", "timestamp": "1700000000"},
+                {"pair": "XRP/EUR", "last": "0.55", "timestamp": "1700000000"},
+            ],
+        )
+
+    async def main() -> None:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(answer)) as client:
+            tickers = await Bitstamp(client).fetch_tickers(
+                ["xrpusd", "xrpgbp", "xrpeur"]
+            )
+        assert list(tickers) == ["xrpusd", "xrpeur"]
+        assert tickers["xrpusd"]["last"] == "0.6"
+        assert tickers["xrpeur"]["timestamp"] == 1700000000000
+
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+"""
+Loading the providers from a TOML or JSON config, registering them only when
+asked to
+"""
+import asyncio
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+import pytest
+
+from xrp_price_aggregate.providers import config as config_module
+from xrp_price_aggregate.providers.base import FakeCCXT
+from xrp_price_aggregate.providers.config import (
+    ProviderSpec,
+    load_config,
+    parse_config,
+)
+from xrp_price_aggregate.providers.registry import (
+    ATTRIBUTES,
+    PROVIDERS,
+    create_provider,
+)
+
+
+class MyExchange(FakeCCXT):
+    """A provider configured by its "module:class" """
+
+    @property
+    def id(self) -> str:
+        return "myexchange"
+
+    @classmethod
+    def price_to_precision(cls, _: str, value: str) -> str:
+        return value
+
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        return {"last": "0.5"}
+
+
+TOML = """
+[[providers]]
+name = "kraken"
+pairs = ["XRPUSD", "XRPEUR"]
+weight = 2.0
+timeout = 1.5
+
+[[providers]]
+name = "myexchange"
+class = "test_config:MyExchange"
+pairs = "XRP-USD"
+fast = true
+"""
+
+
+@pytest.fixture(name="registry")
+def fixture_registry() -> Iterator[None]:
+    """Puts the registry back the way it was"""
+    providers, attributes = dict(PROVIDERS), dict(ATTRIBUTES)
+    yield
+    PROVIDERS.clear()
+    PROVIDERS.update(providers)
+    ATTRIBUTES.clear()
+    ATTRIBUTES.update(attributes)
+
+
+def test_loading_doesnt_register(registry: None, tmp_path: Path) -> None:
+    if config_module.tomllib is None:
+        pytest.skip("loading TOML needs Python 3.11+ or tomli installed")
+    path = tmp_path / "providers.toml"
+    path.write_text(TOML)
+    config = load_config(path)
+
+    assert config.provider_pairs == [
+        ("kraken", "XRPUSD"),
+        ("kraken", "XRPEUR"),
+        ("myexchange", "XRP-USD"),
+    ]
+    assert config.providers == {
+        "kraken": ProviderSpec(None, {"weight": 2.0, "request_timeout": 1.5}),
+        "myexchange": ProviderSpec("test_config:MyExchange", {"fast": True}),
+    }
+    assert "myexchange" not in PROVIDERS
+    assert "kraken" not in ATTRIBUTES
+
+
+def test_register_creates_the_configured_class(registry: None) -> None:
+    config = parse_config(
+        {
+            "providers": [
+                {
+                    "name": "myexchange",
+                    "class": "test_config:MyExchange",
+                    "pairs": ["XRP-USD"],
+                    "timeout": 2.5,
+                }
+            ]
+        }
+    )
+    assert config.register() == [("myexchange", "XRP-USD")]
+    exchange = create_provider("myexchange")
+    assert isinstance(exchange, MyExchange)
+    assert exchange.request_timeout == 2.5
+    assert exchange.provider_name == "myexchange"
+    asyncio.run(exchange.close())
+
+
+def test_configs_dont_leak_into_each_other(registry: None, tmp_path: Path) -> None:
+    first, second = tmp_path / "first.json", tmp_path / "second.json"
+    first.write_text(
+        json.dumps({"providers": [{"name": "kraken", "weight": 2.0, "fast": True}]})
+    )
+    second.write_text(json.dumps({"providers": [{"name": "kraken", "weight": 3.0}]}))
+
+    loaded = load_config(first), load_config(second)
+    assert loaded[0].providers["kraken"].attributes == {"weight": 2.0, "fast": True}
+    assert loaded[1].providers["kraken"].attributes == {"weight": 3.0}
+
+    for config in loaded:
+        config.register()
+    assert ATTRIBUTES["kraken"] == {"weight": 3.0}
+
+
+def test_missing_name() -> None:
+    with pytest.raises(ValueError, match="missing its name"):
+        parse_config({"providers": [{"pairs": ["XRPUSD"]}]})
@@ -0,0 +1,66 @@
+"""
+The weighted filter, weighing by volume when the quotes have it
+"""
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+import pytest
+
+from xrp_price_aggregate.aggregate_filter import _compute_aggregate
+from xrp_price_aggregate.filters import DecimalPrices
+from xrp_price_aggregate.quotes import Quote, QuoteBatch
+
+
+# few exchanges trading a lot at 0.72, more of them trading little at 0.80
+QUOTES: List[Tuple[str, str, Optional[str]]] = [
+    ("a", "0.80", "1"),
+    ("b", "0.80", "1"),
+    ("c", "0.80", "1"),
+    ("d", "0.72", "1000"),
+    ("e", "0.72", "1000"),
+]
+
+
+def batch(mode: str) -> QuoteBatch:
+    quotes = QuoteBatch(mode=mode)
+    for exchange, price, volume in QUOTES:
+        quotes.append(
+            exchange,
+            Quote(Decimal(price), volume=None if volume is None else Decimal(volume)),
+        )
+    return quotes
+
+
+@pytest.mark.parametrize("backend", ["decimal", "float"])
+def test_weighs_by_volume(backend: str) -> None:
+    results = _compute_aggregate(batch("volume"), None, backend, "weighted")
+    assert results["filtered_results"] == [Decimal("0.72")] * 2
+
+
+@pytest.mark.parametrize("backend", ["decimal", "float"])
+def test_every_exchange_counts_the_same_without_volumes(backend: str) -> None:
+    results = _compute_aggregate(batch("last"), None, backend, "weighted")
+    assert results["filtered_results"] == [Decimal("0.80")] * 3
+
+
+@pytest.mark.parametrize("backend", ["decimal", "float"])
+def test_falls_back_to_the_weights(backend: str) -> None:
+    weights = {"a": Decimal(1), "b": Decimal(1), "c": Decimal(1)}
+    weights.update(d=Decimal(10), e=Decimal(10))
+    results = _compute_aggregate(batch("last"), weights, backend, "weighted")
+    assert results["filtered_results"] == [Decimal("0.72")] * 2
+
+
+def test_quote_without_volume_counts_like_the_median() -> None:
+    prices = DecimalPrices(
+        [Decimal("0.72"), Decimal("0.73"), Decimal("0.74"), Decimal("0.74")],
+        [0, 1, 2, 2],
+        None,
+        [Decimal(10), None, Decimal(30), Decimal(50)],
+    )
+    assert [weight for _, weight in prices.weighted()] == [
+        Decimal(10),
+        Decimal(30),
+        Decimal(15),
+        Decimal(25),
+    ]
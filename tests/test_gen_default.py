@@ -0,0 +1,52 @@
+"""
+Selecting the providers of many targets at once
+"""
+import pytest
+
+from xrp_price_aggregate.providers.gen_default import (
+    DEFAULT_TARGET_PROVIDER_PAIRS,
+    target_provider_pairs,
+)
+
+
+def test_target_provider_pairs() -> None:
+    provider_pairs, pair_targets = target_provider_pairs(
+        ["XRP/USD", "XRP/EUR"],
+        {
+            "XRP/USD": [("kraken", "XRPUSD"), ("bitstamp", "xrpusd")],
+            "XRP/EUR": [("kraken", "XRPEUR")],
+            "XRP/BTC": [("kraken", "XRPXBT")],
+        },
+    )
+    assert provider_pairs == [
+        ("kraken", "XRPUSD"),
+        ("bitstamp", "xrpusd"),
+        ("kraken", "XRPEUR"),
+    ]
+    assert pair_targets == {
+        "XRPUSD": "XRP/USD",
+        "xrpusd": "XRP/USD",
+        "XRPEUR": "XRP/EUR",
+    }
+
+
+def test_default_targets_dont_share_pairs() -> None:
+    _, pair_targets = target_provider_pairs(list(DEFAULT_TARGET_PROVIDER_PAIRS))
+    assert set(pair_targets.values()) == set(DEFAULT_TARGET_PROVIDER_PAIRS)
+
+
+def test_a_pair_of_two_targets() -> None:
+    with pytest.raises(ValueError, match="USD is a pair of both XRP/USD and XRP/EUR"):
+        target_provider_pairs(
+            ["XRP/USD", "XRP/EUR"],
+            {
+                "XRP/USD": [("xrpl_oracle", "USD")],
+                # a mistake, the same pair can't tell the targets apart
+                "XRP/EUR": [("kraken", "XRPEUR"), ("xrpl_oracle", "USD")],
+            },
+        )
+
+
+def test_an_unknown_target() -> None:
+    with pytest.raises(ValueError, match="no providers are known for XRP/JPY"):
+        target_provider_pairs(["XRP/USD", "XRP/JPY"])
@@ -0,0 +1,78 @@
+"""
+Kraken's tickers, against an ``httpx.MockTransport``
+"""
+import asyncio
+from typing import Any, Dict, List
+
+import httpx
+import pytest
+
+from xrp_price_aggregate.providers.kraken import Kraken, KrakenError
+
+
+def ticker(price: str) -> Dict[str, Any]:
+    """One of Kraken's tickers, of the price"""
+    return {
+        "c": [price, "1"],
+        "a": [price, "1", "1"],
+        "b": [price, "1", "1"],
+        "v": ["100", "2500"],
+    }
+
+
+def fetch_tickers(json: Dict[str, Any], *symbols: str) -> Dict[str, Any]:
+    def answer(_: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=json)
+
+    async def main() -> Dict[str, Any]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(answer)) as client:
+            return await Kraken(client).fetch_tickers(list(symbols))
+
+    return asyncio.run(main())
+
+
+def test_fetch_tickers_leaves_out_an_unlisted_symbol() -> None:
+    tickers = fetch_tickers(
+        # legacy names, prefixed with X and Z
+        {
+            "error": [],
+            "result": {"XXRPZUSD": ticker("0.6"), "XXRPZEUR": ticker("0.55")},
+        },
+        "XRPUSD",
+        "XRPGBP",
+        "XRPEUR",
+    )
+    assert list(tickers) == ["XRPUSD", "XRPEUR"]
+    assert tickers["XRPUSD"]["last"] == "0.6"
+    assert tickers["XRPEUR"]["baseVolume"] == "2500"
+
+
+def test_fetch_tickers_raises_kraken_errors() -> None:
+    with pytest.raises(KrakenError, match="EQuery:Unknown asset pair"):
+        fetch_tickers({"error": ["EQuery:Unknown asset pair"]}, "XRPUSD")
+
+
+def test_fetch_tickers_in_one_request() -> None:
+    requests: List[httpx.Request] = []
+
+    def answer(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(
+            200,
+            json={
+                "error": [],
+                "result": {"XXRPZUSD": ticker("0.6"), "XRPEUR": ticker("0.55")},
+            },
+        )
+
+    async def main() -> Dict[str, Any]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(answer)) as client:
+            return await Kraken(client).fetch_tickers(["XRPUSD", "XRPEUR"])
+
+    tickers = asyncio.run(main())
+    assert {symbol: ticker["last"] for symbol, ticker in tickers.items()} == {
+        "XRPUSD": "0.6",
+        "XRPEUR": "0.55",
+    }
+    (request,) = requests
+    assert request.url.params["pair"] == "XRPUSD,XRPEUR"
@@ -0,0 +1,113 @@
+"""
+The metrics hooks receiving the events of the aggregation, and nothing being
+observed without any
+"""
+import asyncio
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pytest
+
+from xrp_price_aggregate import aggregate_filter
+from xrp_price_aggregate.aggregate_filter import _aggregate
+from xrp_price_aggregate.metrics import (
+    HOOKS,
+    MetricsHooks,
+    add_metrics_hooks,
+    remove_metrics_hooks,
+)
+
+
+class Exchange:
+    """A ccxt-like client answering its price, or failing without one"""
+
+    def __init__(self, name: str, price: Optional[str]) -> None:
+        self.id = name  # pylint: disable=invalid-name
+        self.has = {"fetchTickers": False}
+        self.price = price
+
+    @classmethod
+    def price_to_precision(cls, _: str, value: str) -> str:
+        return value
+
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        if self.price is None:
+            raise ValueError(f"no price of {symbol}")
+        return {"last": self.price}
+
+
+def aggregate(*exchanges: Exchange) -> Dict[str, Any]:
+    providers: Any = [(exchange, "XRPUSD") for exchange in exchanges]
+    return asyncio.run(_aggregate(set(exchanges), providers, 1, 0.0))
+
+
+class Recording(MetricsHooks):
+    """Keeps every event it receives"""
+
+    def __init__(self) -> None:
+        self.events: List[Tuple[Any, ...]] = []
+
+    def on_request(
+        self,
+        provider: str,
+        pairs: Sequence[str],
+        seconds: float,
+        error: Optional[BaseException],
+    ) -> None:
+        assert seconds >= 0
+        outcome = "ok" if error is None else type(error).__name__
+        self.events.append(("request", provider, list(pairs), outcome))
+
+    def on_filter(self, outlier_filter: str, kept: int, rejected: int) -> None:
+        self.events.append(("filter", outlier_filter, kept, rejected))
+
+    def on_aggregate(self, seconds: float, providers: int, dropped: int) -> None:
+        self.events.append(("aggregate", providers, dropped))
+
+
+@pytest.fixture(name="hooks")
+def fixture_hooks() -> Iterator[Recording]:
+    """Added for the test, removed afterwards"""
+    hooks = Recording()
+    add_metrics_hooks(hooks)
+    # added once however many times
+    add_metrics_hooks(hooks)
+    yield hooks
+    remove_metrics_hooks(hooks)
+    assert not HOOKS
+
+
+def test_hooks_receive_the_events(hooks: Recording) -> None:
+    results = aggregate(
+        Exchange("kraken", "0.5"),
+        Exchange("bitstamp", "0.6"),
+        Exchange("binance", None),
+    )
+    assert results["raw_results"] == [Decimal("0.5"), Decimal("0.6")]
+    assert sorted(event for event in hooks.events if event[0] == "request") == [
+        ("request", "binance", ["XRPUSD"], "ValueError"),
+        ("request", "bitstamp", ["XRPUSD"], "ok"),
+        ("request", "kraken", ["XRPUSD"], "ok"),
+    ]
+    assert hooks.events[-2:] == [("filter", "stdev", 2, 0), ("aggregate", 2, 0)]
+
+
+def test_failing_hooks_are_ignored(hooks: Recording) -> None:
+    def fail(*_: Any) -> None:
+        raise RuntimeError("broken hooks")
+
+    hooks.on_filter = fail  # type: ignore
+    results = aggregate(Exchange("kraken", "0.5"))
+    assert results["filtered_median"] == Decimal("0.5")
+    assert hooks.events[-1] == ("aggregate", 1, 0)
+
+
+def test_nothing_is_observed_without_hooks(monkeypatch: pytest.MonkeyPatch) -> None:
+    def observed(*_: Any) -> None:
+        raise AssertionError("observed without any hooks")
+
+    assert not HOOKS
+    for name in ("observe_request", "observe_filter", "_observe_aggregate"):
+        monkeypatch.setattr(aggregate_filter, name, observed)
+    results = aggregate(Exchange("kraken", "0.5"), Exchange("binance", None))
+    assert results["raw_results"] == [Decimal("0.5")]
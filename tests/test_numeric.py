@@ -0,0 +1,41 @@
+"""
+The float backend, and NumPy only being imported once it's used
+"""
+import os
+import subprocess
+import sys
+
+from decimal import Decimal
+
+import xrp_price_aggregate
+
+from xrp_price_aggregate.aggregate_filter import _compute_aggregate
+from xrp_price_aggregate.quotes import QuoteBatch
+
+
+NAMED = {
+    "bitstamp": [Decimal("0.7211"), Decimal("0.7213")],
+    "kraken": [Decimal("0.7212")],
+    "binance": [Decimal("0.7209"), Decimal("0.81")],
+}
+
+
+def test_importing_doesnt_import_numpy() -> None:
+    script = (
+        "import sys, xrp_price_aggregate\n"
+        "xrp_price_aggregate.as_dict\n"
+        "assert 'numpy' not in sys.modules, 'numpy was imported'\n"
+    )
+    # in a fresh interpreter, finding the package where we did
+    src = os.path.dirname(os.path.dirname(xrp_price_aggregate.__file__))
+    env = {**os.environ, "PYTHONPATH": src}
+    subprocess.run([sys.executable, "-c", script], check=True, env=env)
+
+
+def test_float_backend_matches_decimal() -> None:
+    batch = QuoteBatch.from_named(NAMED)
+    exact = _compute_aggregate(batch)
+    fast = _compute_aggregate(batch, backend="float")
+    assert fast["filtered_results"] == exact["filtered_results"]
+    for name in ("raw_median", "raw_stdev", "filtered_median", "filtered_mean"):
+        assert abs(fast[name] - exact[name]) <= abs(exact[name]) * Decimal("1e-12")
@@ -0,0 +1,87 @@
+"""
+The aggregate results, building their lists from the batch of quotes only
+when they're asked for
+"""
+import json
+from decimal import Decimal
+
+from xrp_price_aggregate.quotes import AggregateResults, Quote, QuoteBatch
+
+
+def results() -> AggregateResults:
+    """Of three quotes, the second filtered out, and one after them"""
+    batch = QuoteBatch(["kraken", "bitstamp", "binance"])
+    batch.extend(
+        [
+            ("kraken", Quote(Decimal("0.5"))),
+            ("bitstamp", Quote(Decimal("0.9"))),
+            ("kraken", Quote(Decimal("0.6"))),
+            # a later snapshot's, like when streaming
+            ("bitstamp", Quote(Decimal("0.7"))),
+        ]
+    )
+    return AggregateResults(
+        batch,
+        3,
+        bytearray([1, 0, 1]),
+        {
+            "raw_median": Decimal("0.6"),
+            "raw_stdev": Decimal("0.2"),
+            "filtered_median": Decimal("0.55"),
+        },
+    )
+
+
+def test_builds_only_what_is_asked_for() -> None:
+    aggregate = results()
+    assert "raw_results_named" in aggregate
+    assert aggregate["raw_results"] == [Decimal("0.5"), Decimal("0.9"), Decimal("0.6")]
+    assert aggregate.get("filtered_results") == [Decimal("0.5"), Decimal("0.6")]
+    # pylint: disable=protected-access
+    assert list(aggregate._built) == ["raw_results", "filtered_results"]
+    assert not dict.__contains__(aggregate, "raw_results_named")
+    assert aggregate._batch is not None
+
+
+def test_encodes_without_building() -> None:
+    aggregate = results()
+    encoded = aggregate.encoded()
+    assert json.loads(encoded) == {
+        "raw_results_named": {
+            "kraken": ["0.50000", "0.60000"],
+            "bitstamp": ["0.90000"],
+            "binance": [],
+        },
+        "raw_results": ["0.50000", "0.90000", "0.60000"],
+        "raw_median": "0.60000",
+        "raw_stdev": "0.20000",
+        "filtered_results": ["0.50000", "0.60000"],
+        "filtered_median": "0.55000",
+    }
+    assert aggregate.encoded() is encoded
+    assert not aggregate._built  # pylint: disable=protected-access
+
+    # encoded again once a key changes
+    aggregate["filtered_median"] = Decimal("0.6")
+    assert json.loads(aggregate.encoded())["filtered_median"] == "0.60000"
+
+
+def test_going_over_every_key_builds_them_all() -> None:
+    aggregate = results()
+    assert list(aggregate) == [
+        "raw_results_named",
+        "raw_results",
+        "raw_median",
+        "raw_stdev",
+        "filtered_results",
+        "filtered_median",
+    ]
+    # a plain dict from then on
+    assert aggregate._batch is None  # pylint: disable=protected-access
+    assert dict.__getitem__(aggregate, "raw_results_named") == {
+        "kraken": [Decimal("0.5"), Decimal("0.6")],
+        "bitstamp": [Decimal("0.9")],
+        "binance": [],
+    }
+    assert aggregate == results()
+    assert dict(results().items()) == dict(aggregate)
@@ -0,0 +1,105 @@
+"""
+The rolling aggregate against recomputing its statistics from every price in
+the window
+"""
+import random
+import statistics
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+import pytest
+
+from xrp_price_aggregate.rolling import RollingAggregate
+
+
+class Clock:
+    """Only moves when told to"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def recomputed(prices: List[Decimal]) -> Dict[str, Decimal]:
+    """The statistics of the aggregate, from scratch"""
+    raw_median = statistics.median(prices)
+    raw_stdev = statistics.stdev(prices) if len(prices) > 1 else Decimal(0)
+    filtered = [
+        price
+        for price in prices
+        if abs(price - raw_median) < raw_stdev or not raw_stdev
+    ]
+    return {
+        "raw_median": raw_median,
+        "raw_stdev": raw_stdev,
+        "filtered_median": statistics.median(filtered),
+        "filtered_mean": statistics.mean(filtered),
+    }
+
+
+def assert_matches(rolling: RollingAggregate, window: List[Decimal]) -> None:
+    assert len(rolling) == len(window)
+    expected = recomputed(window)
+    summary = rolling.summary()
+    assert summary["raw_median"] == expected["raw_median"]
+    assert summary["filtered_median"] == expected["filtered_median"]
+    # Welford's update rounds differently than summing every price again
+    for key in ("raw_stdev", "filtered_mean"):
+        assert abs(summary[key] - expected[key]) < Decimal("1e-20")
+    assert abs(rolling.raw_mean - statistics.mean(window)) < Decimal("1e-20")
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_recomputing_while_evicting(seed: int) -> None:
+    rng = random.Random(seed)
+    clock = Clock()
+    rolling = RollingAggregate(window=10.0, clock=clock)
+    added: List[Tuple[float, Decimal]] = []
+    for _ in range(300):
+        clock.now += rng.uniform(0, 0.5)
+        # repeated prices too, told apart in the treap
+        price = Decimal(rng.randint(7000, 7400)) / 10000
+        rolling.add("kraken", price)
+        added.append((clock.now, price))
+        window = [price for at, price in added if at >= clock.now - 10.0]
+        assert_matches(rolling, window)
+
+
+def test_evicts_a_price_added_out_of_order() -> None:
+    clock = Clock()
+    rolling = RollingAggregate(window=10.0, clock=clock)
+    clock.now = 50.0
+    rolling.add("kraken", Decimal("0.72"))
+    rolling.add("bitstamp", Decimal("0.73"), timestamp=45.0)
+    # older than the window already
+    rolling.add("binance", Decimal("9.99"), timestamp=1.0)
+    assert len(rolling) == 2
+    assert_matches(rolling, [Decimal("0.72"), Decimal("0.73")])
+
+    clock.now = 56.0
+    rolling.evict()
+    assert rolling.as_dict()["raw_results_named"] == {"kraken": [Decimal("0.72")]}
+
+    clock.now = 100.0
+    rolling.evict()
+    assert len(rolling) == 0
+    with pytest.raises(statistics.StatisticsError):
+        rolling.summary()
+
+
+def test_as_dict_is_in_the_shape_of_the_aggregate() -> None:
+    clock = Clock()
+    rolling = RollingAggregate(window=60.0, clock=clock)
+    rolling.add_results(
+        {"kraken": [Decimal("0.72"), Decimal("0.74")], "bitstamp": [Decimal("0.9")]}
+    )
+    results = rolling.as_dict()
+    assert results["raw_results_named"] == {
+        "kraken": [Decimal("0.72"), Decimal("0.74")],
+        "bitstamp": [Decimal("0.9")],
+    }
+    assert results["raw_results"] == [Decimal("0.72"), Decimal("0.74"), Decimal("0.9")]
+    assert results["filtered_results"] == [Decimal("0.72"), Decimal("0.74")]
+    assert results["filtered_median"] == Decimal("0.73")
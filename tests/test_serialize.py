@@ -0,0 +1,48 @@
+"""
+Serializing the aggregate results, and orjson only being imported once
+something is encoded
+"""
+import json
+import os
+import subprocess
+import sys
+
+from decimal import Decimal
+
+import xrp_price_aggregate
+
+from xrp_price_aggregate import serialize
+from xrp_price_aggregate.aggregate_filter import _compute_aggregate, default_for_decimal
+from xrp_price_aggregate.filters import get_filter
+from xrp_price_aggregate.quotes import QuoteBatch
+
+
+def test_importing_doesnt_import_orjson() -> None:
+    script = (
+        "import sys, xrp_price_aggregate\n"
+        "from xrp_price_aggregate import serialize\n"
+        "assert 'orjson' not in sys.modules, 'orjson was imported'\n"
+        "serialize.encode({'price': 1})\n"
+        "assert (serialize.orjson is None) == ('orjson' not in sys.modules)\n"
+    )
+    # in a fresh interpreter, finding the package where we did
+    src = os.path.dirname(os.path.dirname(xrp_price_aggregate.__file__))
+    env = {**os.environ, "PYTHONPATH": src}
+    subprocess.run([sys.executable, "-c", script], check=True, env=env)
+
+
+def test_encodes_like_json_dumps() -> None:
+    results = _compute_aggregate(
+        QuoteBatch.from_named(
+            {"kraken": [Decimal("0.7212")], "bitstamp": [Decimal("0.72134")]}
+        ),
+        None,
+        "decimal",
+        get_filter("stdev"),
+    )
+    expected = json.loads(json.dumps(results, default=default_for_decimal))
+    assert json.loads(serialize.encode(results)) == expected
+    assert expected["raw_results_named"] == {
+        "kraken": ["0.72120"],
+        "bitstamp": ["0.72134"],
+    }
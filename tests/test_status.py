@@ -0,0 +1,122 @@
+"""
+The status of each provider, by what it failed with
+"""
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import httpx
+import pytest
+
+from xrp_price_aggregate.aggregate_filter import _gather
+from xrp_price_aggregate.providers.base import FakeCCXT
+from xrp_price_aggregate.status import status_of
+
+
+# named like ccxt's, which are matched by name
+class RateLimitExceeded(Exception):
+    pass
+
+
+class DDoSProtection(Exception):
+    pass
+
+
+class RequestTimeout(Exception):
+    pass
+
+
+class StalePriceError(Exception):
+    pass
+
+
+def too_many_requests() -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "https://example.test/")
+    return httpx.HTTPStatusError(
+        "429", request=request, response=httpx.Response(429, request=request)
+    )
+
+
+@pytest.mark.parametrize(
+    "error, status",
+    [
+        (None, "ok"),
+        (asyncio.TimeoutError(), "timeout"),
+        (httpx.ReadTimeout("read timed out"), "timeout"),
+        (RequestTimeout(), "timeout"),
+        (too_many_requests(), "rate-limited"),
+        (RateLimitExceeded(), "rate-limited"),
+        (DDoSProtection(), "rate-limited"),
+        (StalePriceError(), "stale"),
+        (KeyError("XXRPZUSD"), "error"),
+    ],
+)
+def test_status_of(error: Optional[BaseException], status: str) -> None:
+    assert status_of(error) == status
+
+
+class Limited(FakeCCXT):
+    """Answering 429 to every request, without retrying"""
+
+    retry_attempts = 1
+
+    @property
+    def id(self) -> str:
+        return "limited"
+
+    @classmethod
+    def price_to_precision(cls, _: str, value: str) -> str:
+        return value
+
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        resp = await self.request("GET", f"https://limited.test/{symbol}")
+        return {"last": resp.json()["price"]}
+
+
+class TimingOut(Limited):
+    """Timing out on every request"""
+
+    @property
+    def id(self) -> str:
+        return "timing_out"
+
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        raise asyncio.TimeoutError()
+
+
+class Answering(Limited):
+    @property
+    def id(self) -> str:
+        return "answering"
+
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        return {"last": "0.5"}
+
+
+def test_statuses_of_the_providers() -> None:
+    requests: List[httpx.Request] = []
+
+    def answer(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(429)
+
+    async def main() -> None:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(answer)) as client:
+            providers: Any = [
+                (Limited(client), "XRPUSD"),
+                (TimingOut(client), "XRPUSD"),
+                (Answering(client), "XRPUSD"),
+            ]
+            results, _, statuses = await _gather(providers, 1, 0.0)
+        assert len(results) == 1
+        assert statuses["limited"]["XRPUSD"] == {
+            "status": "rate-limited",
+            "error": "HTTPStatusError: 429 from https://limited.test/XRPUSD",
+        }
+        assert statuses["timing_out"]["XRPUSD"] == {
+            "status": "timeout",
+            "error": "TimeoutError: ",
+        }
+        assert statuses["answering"]["XRPUSD"] == {"status": "ok", "error": None}
+
+    asyncio.run(main())
+    assert len(requests) == 1
@@ -0,0 +1,187 @@
+"""
+The websocket ticker providers against a local stand-in of Binance's
+websocket, the REST seeding requests going to an ``httpx.MockTransport``
+"""
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import pytest
+import websockets
+
+from xrp_price_aggregate.providers.binance_websocket import BinanceWebsocket
+from xrp_price_aggregate.providers.websocket_ticker import StalePriceError
+from xrp_price_aggregate.status import STALE, status_of
+
+
+class TickerServer:
+    """Records what's sent to it, pushing the frames it's given to the
+    latest connection
+    """
+
+    def __init__(self) -> None:
+        self.received: List[Dict[str, Any]] = []
+        self.connections: List[Any] = []
+        self.url = ""
+        self._server: Optional[Any] = None
+
+    async def __aenter__(self) -> "TickerServer":
+        self._server = await websockets.serve(self._handle, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, websocket: Any, _: str) -> None:
+        self.connections.append(websocket)
+        try:
+            async for message in websocket:
+                self.received.append(json.loads(message))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    async def push(self, symbol: str, price: str) -> None:
+        frame = {"e": "24hrMiniTicker", "s": symbol, "c": price}
+        await self.connections[-1].send(json.dumps(frame))
+
+    async def drop(self) -> None:
+        await self.connections[-1].close()
+
+
+class RestStandIn:
+    """Answers Binance's price endpoint, or fails once told to"""
+
+    def __init__(self, price: str = "0.5") -> None:
+        self.price = price
+        self.requests = 0
+        self.failing = False
+
+    def __call__(self, _: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.failing:
+            return httpx.Response(503, json={})
+        return httpx.Response(200, json={"price": self.price})
+
+
+async def until(condition: Callable[[], bool], timeout: float = 2.0) -> None:
+    """Wait for the condition to hold, checking every few milliseconds"""
+    loop = asyncio.get_event_loop()
+    ends_at = loop.time() + timeout
+    while not condition():
+        assert loop.time() < ends_at, "timed out waiting"
+        await asyncio.sleep(0.005)
+
+
+def run_with_provider(
+    test: Callable[[TickerServer, RestStandIn, BinanceWebsocket], Awaitable[None]],
+    **attributes: Any,
+) -> None:
+    """Runs the test with a provider connected to the stand-ins"""
+
+    async def main() -> None:
+        rest = RestStandIn()
+        async with TickerServer() as server, httpx.AsyncClient(
+            transport=httpx.MockTransport(rest)
+        ) as client:
+            provider = BinanceWebsocket(client)
+            provider.websocket_url = server.url
+            provider.reconnect_backoff = 0.01
+            provider.retry_attempts = 1
+            for attribute, value in attributes.items():
+                setattr(provider, attribute, value)
+            try:
+                await asyncio.wait_for(test(server, rest, provider), 5)
+            finally:
+                await provider.close()
+
+    asyncio.run(main())
+
+
+def test_seeds_subscribes_and_updates() -> None:
+    async def test(
+        server: TickerServer, rest: RestStandIn, provider: BinanceWebsocket
+    ) -> None:
+        ticker = await provider.fetch_ticker("XRPUSDT")
+        assert ticker["last"] == "0.5"
+        assert rest.requests == 1
+
+        await until(lambda: bool(server.received))
+        assert server.received[0]["method"] == "SUBSCRIBE"
+        assert server.received[0]["params"] == ["xrpusdt@miniTicker"]
+
+        await server.push("XRPUSDT", "0.72")
+        await until(lambda: provider.prices["XRPUSDT"] == "0.72")
+        assert (await provider.fetch_ticker("XRPUSDT"))["last"] == "0.72"
+        # served from memory
+        assert rest.requests == 1
+
+    run_with_provider(test)
+
+
+def test_reconnects_and_subscribes_again() -> None:
+    async def test(
+        server: TickerServer, rest: RestStandIn, provider: BinanceWebsocket
+    ) -> None:
+        await provider.fetch_ticker("XRPUSDT")
+        await until(lambda: len(server.received) == 1)
+
+        await server.drop()
+        await until(lambda: len(server.connections) == 2 and len(server.received) == 2)
+        assert server.received[1] == server.received[0]
+
+        await server.push("XRPUSDT", "0.73")
+        await until(lambda: provider.prices["XRPUSDT"] == "0.73")
+        assert (await provider.fetch_ticker("XRPUSDT"))["last"] == "0.73"
+
+    run_with_provider(test)
+
+
+def test_requests_a_stale_price_again() -> None:
+    async def test(
+        server: TickerServer, rest: RestStandIn, provider: BinanceWebsocket
+    ) -> None:
+        await provider.fetch_ticker("XRPUSDT")
+        await until(lambda: bool(server.received))
+        await server.push("XRPUSDT", "0.72")
+        await until(lambda: provider.prices["XRPUSDT"] == "0.72")
+        assert not provider.is_stale("XRPUSDT")
+
+        # nothing pushed since
+        await asyncio.sleep(0.1)
+        assert provider.is_stale("XRPUSDT")
+        rest.price = "0.74"
+        assert (await provider.fetch_ticker("XRPUSDT"))["last"] == "0.74"
+        assert rest.requests == 2
+
+    run_with_provider(test, max_age=0.05)
+
+
+def test_stale_price_fails_when_its_request_does() -> None:
+    async def test(
+        server: TickerServer, rest: RestStandIn, provider: BinanceWebsocket
+    ) -> None:
+        await provider.fetch_ticker("XRPUSDT")
+        await asyncio.sleep(0.1)
+        rest.failing = True
+        with pytest.raises(StalePriceError) as raised:
+            await provider.fetch_ticker("XRPUSDT")
+        assert status_of(raised.value) == STALE
+
+    run_with_provider(test, max_age=0.05)
+
+
+def test_serves_however_old_without_max_age() -> None:
+    async def test(
+        server: TickerServer, rest: RestStandIn, provider: BinanceWebsocket
+    ) -> None:
+        await provider.fetch_ticker("XRPUSDT")
+        await asyncio.sleep(0.1)
+        rest.failing = True
+        assert (await provider.fetch_ticker("XRPUSDT"))["last"] == "0.5"
+        assert rest.requests == 1
+
+    run_with_provider(test, max_age=None)
@@ -0,0 +1,33 @@
+"""
+The XRPL oracle's prices, against an ``httpx.MockTransport``
+"""
+import asyncio
+import json
+from typing import List
+
+import httpx
+
+from xrp_price_aggregate.providers.xrpl_oracle import XRPLOracle
+
+
+def test_fetch_tickers_fetches_the_lines_once() -> None:
+    requests: List[httpx.Request] = []
+
+    def answer(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        lines = [
+            {"currency": "USD", "limit_peer": "0.5"},
+            {"currency": "USD", "limit_peer": "0.7"},
+            {"currency": "EUR", "limit_peer": "0.55"},
+        ]
+        return httpx.Response(200, json={"result": {"lines": lines}})
+
+    async def main() -> None:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(answer)) as client:
+            tickers = await XRPLOracle(client).fetch_tickers(["USD", "EUR"])
+        # the mean of each currency's lines
+        assert tickers == {"USD": {"last": "0.6"}, "EUR": {"last": "0.55"}}
+
+    asyncio.run(main())
+    (request,) = requests
+    assert json.loads(request.content)["method"] == "account_lines"
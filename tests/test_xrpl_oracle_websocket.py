@@ -0,0 +1,190 @@
+"""
+The XRPL oracle websocket provider against local stand-ins of rippled nodes,
+replaying the oracle's ledger messages
+"""
+import asyncio
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import websockets
+
+from xrp_price_aggregate.providers.xrpl_oracle import XRPL_ORACLE__UNICORN_CAT
+from xrp_price_aggregate.providers.xrpl_oracle_websocket import (
+    ACCOUNT_LINES_ID,
+    XRPLOracleWebsocket,
+)
+
+
+def trust_lines(**prices: List[str]) -> List[Dict[str, Any]]:
+    """The oracle's trust lines, a line per price of each currency"""
+    return [
+        {
+            "account": "rPEPPER7kfTD9w2To4CQk6UCfuHM9c6GDY",
+            "balance": "0",
+            "currency": currency,
+            "limit": "0",
+            "limit_peer": price,
+        }
+        for currency, currency_prices in prices.items()
+        for price in currency_prices
+    ]
+
+
+class RippledNode:
+    """Answers subscribing and ``account_lines`` like rippled, and replays
+    the validated transactions touching the oracle's account
+    """
+
+    def __init__(self, lines: List[Dict[str, Any]]) -> None:
+        self.lines = lines
+        self.received: List[Dict[str, Any]] = []
+        self.connections: List[Any] = []
+        self.url = ""
+        self._server: Optional[Any] = None
+
+    async def start(self) -> "RippledNode":
+        self._server = await websockets.serve(self._handle, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{port}"
+        return self
+
+    async def stop(self) -> None:
+        """Drops every connection and refuses new ones"""
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, websocket: Any, _: str) -> None:
+        self.connections.append(websocket)
+        try:
+            async for message in websocket:
+                request = json.loads(message)
+                self.received.append(request)
+                await websocket.send(json.dumps(self._response(request)))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    def _response(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        if request["command"] == "account_lines":
+            result = {"account": request["account"], "lines": self.lines}
+        return {
+            "id": request.get("id"),
+            "result": result,
+            "status": "success",
+            "type": "response",
+        }
+
+    async def validate_transaction(self) -> None:
+        """A validated transaction touching the oracle's account"""
+        await self.connections[-1].send(
+            json.dumps(
+                {
+                    "type": "transaction",
+                    "validated": True,
+                    "engine_result": "tesSUCCESS",
+                    "transaction": {
+                        "TransactionType": "TrustSet",
+                        "Account": "rPEPPER7kfTD9w2To4CQk6UCfuHM9c6GDY",
+                    },
+                    "meta": {"AffectedNodes": []},
+                }
+            )
+        )
+
+
+async def until(condition: Callable[[], bool], timeout: float = 2.0) -> None:
+    """Wait for the condition to hold, checking every few milliseconds"""
+    loop = asyncio.get_event_loop()
+    ends_at = loop.time() + timeout
+    while not condition():
+        assert loop.time() < ends_at, "timed out waiting"
+        await asyncio.sleep(0.005)
+
+
+def no_requests(_: httpx.Request) -> httpx.Response:
+    raise AssertionError("the prices should come from the websocket")
+
+
+async def oracle(urls: List[str]) -> XRPLOracleWebsocket:
+    provider = XRPLOracleWebsocket(
+        httpx.AsyncClient(transport=httpx.MockTransport(no_requests))
+    )
+    provider.websocket_urls = urls
+    provider.reconnect_backoff = 0.01
+    return provider
+
+
+def test_prices_from_the_account_lines() -> None:
+    async def main() -> None:
+        node = await RippledNode(
+            trust_lines(USD=["0.70", "0.72"], EUR=["0.65"])
+        ).start()
+        provider = await oracle([node.url])
+        try:
+            await provider.watch("USD")
+            await provider.watch("EUR")
+            await until(lambda: {"USD", "EUR"} <= set(provider.prices))
+            assert node.received[0] == {
+                "command": "subscribe",
+                "accounts": [XRPL_ORACLE__UNICORN_CAT],
+            }
+            assert node.received[1]["id"] == ACCOUNT_LINES_ID
+            tickers = await provider.fetch_tickers(["USD", "EUR"])
+            assert tickers["USD"]["last"] == "0.71"
+            assert tickers["EUR"]["last"] == "0.65"
+
+            # the lines are read again on the next validated transaction
+            node.lines = trust_lines(USD=["0.74"], EUR=["0.66"])
+            await node.validate_transaction()
+            await until(lambda: provider.prices["USD"] == "0.74")
+            assert (await provider.fetch_ticker("EUR"))["last"] == "0.66"
+        finally:
+            await provider.close()
+            await provider.client.aclose()
+            await node.stop()
+
+    asyncio.run(asyncio.wait_for(main(), 5))
+
+
+def test_ignores_unvalidated_transactions() -> None:
+    async def main() -> None:
+        node = await RippledNode(trust_lines(USD=["0.70"])).start()
+        provider = await oracle([node.url])
+        try:
+            await provider.watch("USD")
+            await until(lambda: "USD" in provider.prices)
+            sent = len(node.received)
+            await node.connections[-1].send(
+                json.dumps({"type": "transaction", "validated": False})
+            )
+            await asyncio.sleep(0.05)
+            assert len(node.received) == sent
+        finally:
+            await provider.close()
+            await provider.client.aclose()
+            await node.stop()
+
+    asyncio.run(asyncio.wait_for(main(), 5))
+
+
+def test_fails_over_when_a_node_drops() -> None:
+    async def main() -> None:
+        first = await RippledNode(trust_lines(USD=["0.71"])).start()
+        second = await RippledNode(trust_lines(USD=["0.81"])).start()
+        provider = await oracle([first.url, second.url])
+        try:
+            await provider.watch("USD")
+            await until(lambda: provider.prices.get("USD") == "0.71")
+
+            await first.stop()
+            await until(lambda: provider.prices.get("USD") == "0.81")
+            # subscribed again on the next node
+            assert second.received[0]["command"] == "subscribe"
+            assert (await provider.fetch_ticker("USD"))["last"] == "0.81"
+        finally:
+            await provider.close()
+            await provider.client.aclose()
+            await second.stop()
+
+    asyncio.run(asyncio.wait_for(main(), 5))